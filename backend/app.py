@@ -5,15 +5,16 @@ import uvicorn
 from pybullet_env.env import BulletEnv
 from fastapi.middleware.cors import CORSMiddleware
 from pybullet_env.trainer import Trainer
-from google.cloud import storage
+from pybullet_env.asset_sync import sync_prefix
+from pybullet_env.asset_cache import get_asset_cache
+from pybullet_env.storage_backend import get_storage
 import os
 import xml.etree.ElementTree as ET
 from kubernetes import client, config
 import pybullet as p
-import tempfile
 
 app = FastAPI()
-storage_client = storage.Client()
+asset_storage = get_storage("genai-genesis-storage")
 
 app.add_middleware(
     CORSMiddleware,
@@ -69,24 +70,12 @@ def update_urdf_position(urdf_path, position, orientation):
     
 def download_env_from_gcp(env_name):
     """
-    Download all files (URDF and OBJ) from the GCP bucket for the given environment
-    into a temporary local directory while preserving folder structure.
+    Sync all files (URDF and OBJ) from the GCP bucket for the given environment into
+    assets/<env_name> while preserving folder structure. The directory links into the shared
+    asset cache, so repeated requests reuse it instead of leaving a new temp dir behind.
     """
-    bucket = storage.Client().bucket("genai-genesis-storage")
-    local_dir = tempfile.mkdtemp()
-    
-    # Assume your objects are stored under objects/{env_name}/...
-    prefix = f"{env_name}/objects"
-    blobs = bucket.list_blobs(prefix=prefix)
-    
-    for blob in blobs:
-        # Reconstruct local path
-        relative_path = blob.name[len(prefix):]  # file path relative to env folder
-        local_file_path = os.path.join(local_dir, relative_path)
-        os.makedirs(os.path.dirname(local_file_path), exist_ok=True)
-        blob.download_to_filename(local_file_path)
-    
-    
+    local_dir = os.path.join(os.getcwd(), "assets", env_name)
+    sync_prefix(asset_storage, f"{env_name}/objects/", local_dir, cache=get_asset_cache())
     return local_dir
 
 
@@ -96,9 +85,10 @@ def download_env_from_gcp(env_name):
 
 
 @app.post("/upload_filename")
-async def upload_filename(payload: FilenamePayload):
+def upload_filename(payload: FilenamePayload):
     """
     Upload a filename and find the corresponding .obj file.
+    A plain def runs in FastAPI's threadpool, so the sync does not block other requests.
     """
     download_env_from_gcp(payload.filename)
 
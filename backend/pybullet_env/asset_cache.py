@@ -0,0 +1,165 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+# Shared by every environment on this machine; keep it on the pod's ephemeral disk
+ASSET_CACHE_DIR = os.environ.get("ASSET_CACHE_DIR", os.path.join(os.getcwd(), "asset_cache"))
+ASSET_CACHE_BYTES = int(os.environ.get("ASSET_CACHE_BYTES", 2 * 1024 ** 3))
+
+
+class AssetCache:
+    """
+    Content-addressed file cache with a byte budget and least-recently-used eviction.
+
+    Files live under <root>/objects/<key[:2]>/<key>, where the key is a content hash plus the
+    original extension (pybullet picks the mesh loader by extension). Environment directories
+    are trees of symlinks into the cache (see asset_sync.sync_prefix), so environments that
+    share a mesh share one copy, and an evicted file shows up as a missing link that the next
+    sync fetches again. Sizes and last-use times are kept in <root>/index.json, so the LRU
+    order survives restarts; files found on disk but not in the index are adopted.
+
+    Files an environment is using are leased (see lease()): eviction never removes a leased
+    file, even when that leaves the cache over budget until the lease is released.
+    """
+    def __init__(self, root=ASSET_CACHE_DIR, max_bytes=ASSET_CACHE_BYTES):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+        self.objects_dir = os.path.join(self.root, "objects")
+        self.index_path = os.path.join(self.root, "index.json")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._lock = threading.RLock()
+        self._entries = {}  # key -> {"size": bytes, "last_used": unix time}
+        self._leases = {}   # owner -> keys it keeps from eviction
+        self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            saved = {}
+        # The files on disk are the truth; the index only contributes the LRU order
+        for directory, _, filenames in os.walk(self.objects_dir):
+            for filename in filenames:
+                stat = os.stat(os.path.join(directory, filename))
+                if filename.endswith(".partial"):
+                    # Left behind by a crashed download (recent ones may still be in progress elsewhere)
+                    if time.time() - stat.st_mtime > 3600:
+                        os.remove(os.path.join(directory, filename))
+                    continue
+                last_used = saved.get(filename, {}).get("last_used", stat.st_mtime)
+                self._entries[filename] = {"size": stat.st_size, "last_used": last_used}
+
+    def save(self):
+        """Write the index atomically."""
+        with self._lock:
+            data = json.dumps(self._entries)
+        fd, partial_path = tempfile.mkstemp(prefix=".index.", suffix=".partial", dir=self.root)
+        with os.fdopen(fd, "w") as f:
+            f.write(data)
+        os.replace(partial_path, self.index_path)
+
+    def path(self, key):
+        return os.path.join(self.objects_dir, key[:2], key)
+
+    @property
+    def total_bytes(self):
+        with self._lock:
+            return sum(entry["size"] for entry in self._entries.values())
+
+    def get(self, key):
+        """Path of the cached file for key (marking it recently used), or None on a miss."""
+        path = self.path(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if not os.path.exists(path):
+                del self._entries[key]
+                return None
+            entry["last_used"] = time.time()
+        return path
+
+    def fetch(self, key, write):
+        """
+        Path of the cached file for key, calling write(file) to fill it on a miss. The data
+        goes to a temporary file that is renamed into place, so readers never see a partial file.
+        """
+        path = self.get(key)
+        if path is not None:
+            return path
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, partial_path = tempfile.mkstemp(suffix=".partial", dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(partial_path, path)
+        except BaseException:
+            os.unlink(partial_path)
+            raise
+        with self._lock:
+            self._entries[key] = {"size": os.path.getsize(path), "last_used": time.time()}
+        return path
+
+    def lease(self, owner, keys):
+        """
+        Keep `keys` from eviction until release(owner). Owners are any hashable id of a user of
+        the files, e.g. a session or training run; leasing again under the same owner replaces
+        its keys.
+        """
+        with self._lock:
+            self._leases[owner] = frozenset(keys)
+
+    def release(self, owner):
+        """Drop the lease of `owner`; returns False if it held none."""
+        with self._lock:
+            return self._leases.pop(owner, None) is not None
+
+    def leased_keys(self):
+        with self._lock:
+            return set().union(*self._leases.values())
+
+    def evict(self, keep=()):
+        """
+        Remove least recently used files until the cache fits its budget. Leased keys and keys
+        in `keep` are never removed.
+        """
+        removed = []
+        with self._lock:
+            keep = set(keep) | self.leased_keys()
+            total = sum(entry["size"] for entry in self._entries.values())
+            for key in sorted(self._entries, key=lambda k: self._entries[k]["last_used"]):
+                if total <= self.max_bytes:
+                    break
+                if key in keep:
+                    continue
+                try:
+                    os.remove(self.path(key))
+                except FileNotFoundError:
+                    pass
+                total -= self._entries.pop(key)["size"]
+                removed.append(key)
+        if removed:
+            print(f"Evicted {len(removed)} files from the asset cache ({total} bytes in use)")
+        return removed
+
+    def stats(self):
+        with self._lock:
+            return {"files": len(self._entries), "bytes": self.total_bytes, "max_bytes": self.max_bytes,
+                    "leases": len(self._leases)}
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_asset_cache():
+    """The process-wide cache, created on first use from ASSET_CACHE_DIR and ASSET_CACHE_BYTES."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = AssetCache()
+    return _shared_cache
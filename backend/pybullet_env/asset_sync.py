@@ -0,0 +1,210 @@
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Concurrent blob downloads per sync; small files are latency-bound, so this is well above the CPU count
+SYNC_WORKERS = int(os.environ.get("ASSET_SYNC_WORKERS", 16))
+
+# Serializes syncs into the same directory within this process
+_dir_locks = {}
+_dir_locks_guard = threading.Lock()
+
+
+def _dir_lock(local_dir):
+    with _dir_locks_guard:
+        return _dir_locks.setdefault(os.path.realpath(local_dir), threading.Lock())
+
+
+def _file_md5(path):
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return base64.b64encode(digest.digest()).decode("ascii")
+
+
+def _manifest_path(local_dir, storage_name, prefix):
+    # One manifest per (bucket, prefix), so several prefixes can share a directory
+    key = hashlib.sha1(f"{storage_name}/{prefix}".encode("utf-8")).hexdigest()[:12]
+    return os.path.join(local_dir, f".gcs-sync-{key}.json")
+
+
+def _is_current(local_path, blob, entry):
+    """True if the local copy already holds this blob's content."""
+    if not os.path.exists(local_path):
+        return False
+    stat = os.stat(local_path)
+    if stat.st_size != blob.size:
+        return False
+    # Same generation and untouched since we wrote it: no need to read the file
+    if entry and entry.get("generation") == blob.generation and entry.get("mtime_ns") == stat.st_mtime_ns:
+        return True
+    # Copied in some other way (or touched): compare content hashes; composite blobs have no MD5
+    return blob.md5_hash is not None and _file_md5(local_path) == blob.md5_hash
+
+
+def _download(storage, blob, local_path):
+    """Download one blob to a temporary file next to local_path, then rename it into place."""
+    directory = os.path.dirname(local_path)
+    os.makedirs(directory, exist_ok=True)
+    fd, partial_path = tempfile.mkstemp(prefix=".", suffix=".partial", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            # Pin the generation we listed, so a concurrent upload cannot mix versions
+            storage.download_to_file(blob.name, f, generation=blob.generation)
+        os.replace(partial_path, local_path)
+    except BaseException:
+        os.unlink(partial_path)
+        raise
+
+
+def cache_key(storage_name, blob):
+    """Content address of a blob in an AssetCache: its MD5 plus the original extension."""
+    extension = os.path.splitext(blob.name)[1].lower()
+    if blob.md5_hash:
+        return base64.b64decode(blob.md5_hash).hex() + extension
+    # Composite blobs carry no MD5; a specific generation of a blob never changes either
+    version = f"{storage_name}/{blob.name}#{blob.generation}".encode("utf-8")
+    return "g" + hashlib.sha1(version).hexdigest() + extension
+
+
+def _link(target, local_path):
+    """Point local_path at target with a symlink, replacing whatever is there atomically."""
+    if os.path.islink(local_path) and os.readlink(local_path) == target:
+        return
+    os.makedirs(os.path.dirname(local_path), exist_ok=True)
+    link_path = f"{local_path}.{os.getpid()}.{threading.get_ident()}.link"
+    os.symlink(target, link_path)
+    os.replace(link_path, local_path)
+
+
+def _is_linked(local_path, cache, key):
+    """True if local_path links to a cached copy of key (and marks that copy recently used)."""
+    target = cache.get(key)
+    return target is not None and os.path.islink(local_path) and os.readlink(local_path) == target
+
+
+def linked_keys(local_dir, cache):
+    """Cache keys of the files under local_dir that are links into the cache."""
+    keys = set()
+    objects_dir = cache.objects_dir + os.sep
+    for directory, _, filenames in os.walk(local_dir):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            if os.path.islink(path) and os.readlink(path).startswith(objects_dir):
+                keys.add(os.path.basename(os.readlink(path)))
+    return keys
+
+
+def lease_dir(local_dir, cache, owner):
+    """
+    Keep the cached files an already synced directory links to from eviction until
+    cache.release(owner), e.g. while a simulation built from it is alive.
+    """
+    keys = linked_keys(local_dir, cache)
+    cache.lease(owner, keys)
+    return keys
+
+
+def sync_prefix(storage, prefix, local_dir, cache=None, max_workers=SYNC_WORKERS, lease=None):
+    """
+    Mirror the blobs under `prefix` of a StorageBackend into `local_dir` (paths relative to the prefix).
+
+    Files whose local copy matches the blob's generation or MD5 are skipped, the rest are
+    downloaded in parallel by up to `max_workers` threads, each to a temporary file renamed
+    into place, so readers never see a partial file. Files this routine downloaded before that
+    are no longer in the bucket are removed; other local files are left alone.
+
+    With an AssetCache, the bytes live in the cache under their content hash and local_dir
+    becomes a tree of symlinks into it: only cache misses are downloaded, and the cache is
+    trimmed to its budget afterwards. The files of this prefix are leased while it syncs, so
+    concurrent syncs cannot evict each other's files; with `lease` (an owner id) they stay
+    leased after the sync until cache.release(lease), for as long as the caller uses them.
+    Returns a summary dict (downloaded, skipped, removed, bytes).
+    """
+    local_dir = os.path.abspath(local_dir)
+    os.makedirs(local_dir, exist_ok=True)
+    with _dir_lock(local_dir):
+        manifest_path = _manifest_path(local_dir, storage.name, prefix)
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+
+        wanted = {}
+        for blob in storage.list(prefix):
+            relative_path = blob.name[len(prefix):].lstrip("/")
+            if not relative_path or blob.name.endswith("/"):
+                # "Folder" placeholder objects
+                continue
+            local_path = os.path.normpath(os.path.join(local_dir, relative_path))
+            if not local_path.startswith(local_dir + os.sep):
+                print(f"Skipping {blob.name}: path escapes {local_dir}")
+                continue
+            wanted[relative_path] = (blob, local_path)
+
+        if cache is not None:
+            keys = {path: cache_key(storage.name, blob) for path, (blob, _) in wanted.items()}
+            # Released below unless the caller takes the lease over
+            sync_lease = lease if lease is not None else ("sync", local_dir, threading.get_ident())
+            cache.lease(sync_lease, keys.values())
+            stale = [path for path in wanted if not _is_linked(wanted[path][1], cache, keys[path])]
+
+            def fetch(path):
+                blob, local_path = wanted[path]
+
+                def download(f):
+                    storage.download_to_file(blob.name, f, generation=blob.generation)
+                    downloaded.append(path)
+
+                _link(cache.fetch(keys[path], download), local_path)
+        else:
+            stale = [path for path in wanted if not _is_current(wanted[path][1], wanted[path][0], manifest.get(path))]
+
+            def fetch(path):
+                _download(storage, *wanted[path])
+                downloaded.append(path)
+
+        # Paths actually transferred; with a cache, other stale paths were linked to a file already cached
+        downloaded = []
+        try:
+            if stale:
+                with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(stale)))) as pool:
+                    # list() re-raises the first download error
+                    list(pool.map(fetch, stale))
+        except BaseException:
+            if cache is not None:
+                cache.release(sync_lease)
+            raise
+
+        removed = 0
+        for relative_path in set(manifest) - set(wanted):
+            try:
+                os.remove(os.path.join(local_dir, relative_path))
+                removed += 1
+            except FileNotFoundError:
+                pass
+
+        manifest = {}
+        for relative_path, (blob, local_path) in wanted.items():
+            manifest[relative_path] = {"generation": blob.generation, "md5": blob.md5_hash,
+                                       "mtime_ns": os.stat(local_path).st_mtime_ns}
+        if cache is not None:
+            cache.evict()
+            if lease is None:
+                cache.release(sync_lease)
+            cache.save()
+        fd, partial_path = tempfile.mkstemp(prefix=".", suffix=".partial", dir=local_dir)
+        with os.fdopen(fd, "w") as f:
+            json.dump(manifest, f)
+        os.replace(partial_path, manifest_path)
+
+    summary = {"downloaded": len(downloaded), "skipped": len(wanted) - len(downloaded), "removed": removed,
+               "bytes": sum(wanted[path][0].size or 0 for path in downloaded)}
+    print(f"Synced {storage.name}/{prefix} to {local_dir}: {summary}")
+    return summary
@@ -3,7 +3,6 @@ import gymnasium as gym
 import pybullet as p
 import pybullet_data
 import numpy as np
-import time
 
 from .detection import detect_collision
 from .agent import AgentBall
@@ -25,6 +24,8 @@ class BulletEnv(gym.Env):
         # Connect to PyBullet in GUI mode (change to p.DIRECT for headless)
         self.physics_client = p.connect(p.GUI)
         p.setAdditionalSearchPath(pybullet_data.getDataPath())
+        # Simulated seconds per stepSimulation call; step() advances sim_time by this instead of sleeping.
+        self.time_step = p.getPhysicsEngineParameters()["fixedTimeStep"]
         p.setGravity(0, 0, -9.81)
 
         # Load a plane as the ground
@@ -38,6 +39,7 @@ class BulletEnv(gym.Env):
         self.target_object.load()
 
         self.done = False
+        self.sim_time = 0.0
 
     def reset(self):
         # Reset simulation by reloading agent and target.
@@ -47,6 +49,7 @@ class BulletEnv(gym.Env):
         self.agent.load()
         self.target_object.load()
         self.done = False
+        self.sim_time = 0.0
         return self._get_obs()
 
     def _get_obs(self):
@@ -58,7 +61,7 @@ class BulletEnv(gym.Env):
         # Auto-steer agent toward target.
         self.agent.set_velocity_toward(self.target_object.position, speed=4.0)
         p.stepSimulation()
-        time.sleep(1/20)
+        self.sim_time += self.time_step
         obs = self._get_obs()
         reward = 0.0
         if detect_collision(self.agent.body_id, self.target_object.body_id):
@@ -7,8 +7,12 @@ import RenderPreview from './RenderPreview';
 import * as THREE from 'three';
 import { OrbitControls } from 'three/examples/jsm/controls/OrbitControls';
 import { OBJLoader } from 'three/examples/jsm/loaders/OBJLoader';
+import { GLTFLoader } from 'three/examples/jsm/loaders/GLTFLoader';
 import { io } from 'socket.io-client';
 
+// Socket.IO server; mesh URLs in its responses are relative to it
+const SERVER_URL = "http://localhost:8000";
+
 const spin = keyframes`
   0% { transform: rotate(0deg); }
   100% { transform: rotate(360deg); }
@@ -657,26 +661,49 @@ const ProjectGallery = ({ onSelectProject }) => {
 
   const socket = useRef(null);
   useEffect(() => {
-    socket.current = io("http://localhost:8000");
+    socket.current = io(SERVER_URL);
     socket.current.on("connect", () => {
       console.log("Connected to socket server");
     });
     // Listen for streamed data from the server.
-    socket.current.on("upload_filename_response", (data) => {
+    socket.current.on("upload_filename_response", async (data) => {
       console.log("Received filename response:", data);
       const newObjectFiles = {};
       
-      Object.keys(data).forEach((key) => {
+      // The response only references meshes; their URLs are content-addressed, so the
+      // browser cache serves repeat loads and other viewers of the same scene.
+      await Promise.all(Object.keys(data).map(async (key) => {
         const fileData = data[key];
-        if (fileData.obj_file_data) {
-          // Store the raw object file data
-          newObjectFiles[key] = {
-            objData: atob(fileData.obj_file_data),
-            position: fileData.position,
-            orientation: fileData.orientation
-          };
+        if (fileData.mesh) {
+          try {
+            let response = await fetch(new URL(fileData.mesh.url, SERVER_URL));
+            if (response.ok && fileData.mesh.format === "glb") {
+              // Quantized, indexed GLB converted on the server: smaller and faster to parse than OBJ
+              const gltf = await new GLTFLoader().parseAsync(await response.arrayBuffer(), "");
+              newObjectFiles[key] = {
+                object3D: gltf.scene,
+                position: fileData.position,
+                orientation: fileData.orientation
+              };
+              return;
+            }
+            if (!response.ok && fileData.mesh.source_url) {
+              // Conversion failed on the server; fall back to the original OBJ
+              response = await fetch(new URL(fileData.mesh.source_url, SERVER_URL));
+            }
+            if (!response.ok) {
+              throw new Error(`HTTP ${response.status}`);
+            }
+            newObjectFiles[key] = {
+              objData: await response.text(),
+              position: fileData.position,
+              orientation: fileData.orientation
+            };
+          } catch (error) {
+            console.error(`Failed to load mesh for ${key}:`, error);
+          }
         }
-      });
+      }));
       
       setObjectFiles(newObjectFiles);
       
@@ -757,8 +784,8 @@ const ProjectGallery = ({ onSelectProject }) => {
           console.log(`Loading object ${key}...`);
           setObjectTestInfo(`Loading object ${key}...`);
           
-          // Parse the OBJ data
-          const object3D = loader.parse(fileData.objData);
+          // Use the parsed GLB if there is one, otherwise parse the OBJ data
+          const object3D = fileData.object3D ? fileData.object3D.clone() : loader.parse(fileData.objData);
           
           // Set position if available
           if (fileData.position) {
@@ -842,6 +869,35 @@ const ProjectGallery = ({ onSelectProject }) => {
   useEffect(() => {
     if (!socket.current) return;
 
+    const applyPose = (obj) => {
+      // Check if this is the agent
+      if (obj.filename === 'agent') {
+        // Update agent if it exists
+        if (agentRef.current) {
+          agentRef.current.position.set(...obj.position);
+          if (obj.orientation) {
+            // Set quaternion directly
+            agentRef.current.quaternion.set(...obj.orientation);
+          }
+          
+          // Update agent info state for display, converting quaternion to Euler if needed
+          setAgentInfo({
+            position: obj.position,
+            orientation: obj.orientation || [0, 0, 0, 1]
+          });
+        }
+      } else {
+        // Update regular objects
+        if (simulationObjectsRef.current[obj.filename]) {
+          const object3D = simulationObjectsRef.current[obj.filename];
+          object3D.position.set(...obj.position);
+          if (obj.orientation) {
+            object3D.quaternion.set(...obj.orientation);
+          }
+        }
+      }
+    };
+
     // Listen for object position updates from the server
     socket.current.on("simulation_step", (data) => {
       console.log("Received simulation step:", data);
@@ -850,41 +906,36 @@ const ProjectGallery = ({ onSelectProject }) => {
       // Update object positions
       if (data.objects && testSceneRef.current) {
         // Process all objects in the data
-        data.objects.forEach(obj => {
-          // Check if this is the agent
-          if (obj.filename === 'agent') {
-            // Update agent if it exists
-            if (agentRef.current) {
-              agentRef.current.position.set(...obj.position);
-              if (obj.orientation) {
-                // Set quaternion directly
-                agentRef.current.quaternion.set(...obj.orientation);
-              }
-              
-              // Update agent info state for display, converting quaternion to Euler if needed
-              setAgentInfo({
-                position: obj.position,
-                orientation: obj.orientation || [0, 0, 0, 1]
-              });
-            }
-          } else {
-            // Update regular objects
-            if (simulationObjectsRef.current[obj.filename]) {
-              const object3D = simulationObjectsRef.current[obj.filename];
-              object3D.position.set(...obj.position);
-              if (obj.orientation) {
-                object3D.quaternion.set(...obj.orientation);
-              }
-            }
-          }
-        });
+        data.objects.forEach(applyPose);
+      }
+    });
+
+    // Delta-encoded stream: the object table arrives once, then binary frames carry
+    // quantized poses of only the bodies that moved (see pybullet_env/pose_stream.py)
+    let poseTable = null;
+    socket.current.on("pose_table", (table) => {
+      poseTable = table;
+    });
+    socket.current.on("pose_frame", (frame) => {
+      if (!poseTable) return;
+      const bytes = frame instanceof ArrayBuffer ? new Uint8Array(frame) : new Uint8Array(frame.buffer, frame.byteOffset, frame.byteLength);
+      const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+      setSimulationStep(view.getUint32(0, true));
+      if (!testSceneRef.current) return;
+      const count = view.getUint16(4, true);
+      for (let i = 0; i < count; i++) {
+        // Record: uint16 body index, int32[3] position, int16[4] quaternion (little-endian)
+        const offset = poseTable.header_size + i * poseTable.record_size;
+        const position = [0, 1, 2].map(axis => view.getInt32(offset + 2 + axis * 4, true) * poseTable.position_scale);
+        const orientation = [0, 1, 2, 3].map(axis => view.getInt16(offset + 14 + axis * 2, true) * poseTable.orientation_scale);
+        applyPose({ filename: poseTable.bodies[view.getUint16(offset, true)], position, orientation });
       }
-      
-      
     });
 
     return () => {
       socket.current.off("simulation_step");
+      socket.current.off("pose_table");
+      socket.current.off("pose_frame");
     };
   }, []);
 
@@ -1158,7 +1209,9 @@ const ProjectGallery = ({ onSelectProject }) => {
     
     const filenamePayload = {
       filename: "testingenv",
-      uid: currentUser.uid
+      uid: currentUser.uid,
+      // Binary delta-encoded poses (pose_table + pose_frame) instead of a JSON dict per step
+      pose_encoding: "delta"
     };
     // Emit event to start training, passing the filenames just like with upload_filename
     socket.current.emit("start_training", 
@@ -1,19 +1,25 @@
 import os
 import glob
 import json
-import base64
 import xml.etree.ElementTree as ET
 import socketio
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from google.cloud import storage
+from fastapi.responses import FileResponse
 import asyncio
 import uvicorn 
 
 from pybullet_env.trainer import Trainer  # Ensure these are correctly installed and available
 from pybullet_env.env import MultiObjectBulletEnv
 from pybullet_env.agent import AgentBall
-from pybullet_env.env_object import GeneralObject
+from pybullet_env.env_object import load_scene_objects
+from pybullet_env.pacing import SimulationPacer
+from pybullet_env.streaming import FrameMailbox, send_latest_frames, STREAM_FPS
+from pybullet_env.mesh_store import MeshStore, IMMUTABLE_CACHE_CONTROL
+from pybullet_env.sessions import SessionManager, CapacityError
+from pybullet_env.asset_sync import sync_prefix
+from pybullet_env.asset_cache import get_asset_cache
+from pybullet_env.storage_backend import get_storage
 
 ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -39,36 +45,73 @@ app.add_middleware(
 # Mount the Socket.IO ASGI app on top of the FastAPI app.
 asgi_app = socketio.ASGIApp(sio, other_asgi_app=app)
 
-# Initialize GCP storage client
-storage_client = storage.Client()
+# Simulated seconds covered by one start_simulation step
+SIMULATION_STEP_SECONDS = 0.1
+
+# GCS by default; STORAGE_BACKEND=local serves the bucket from a directory (no client is created until first use)
 BUCKET_NAME = os.environ.get('BUCKET_NAME', 'genai-genesis-storage')
+asset_storage = get_storage(BUCKET_NAME)
+
+# Meshes referenced by upload_filename responses, served by content hash from /meshes
+mesh_store = MeshStore()
+
+async def notify_session_evicted(sid):
+    """Tell a client its idle session was closed, so it reopens one before its next run."""
+    await sio.emit('session_closed', {"reason": "idle", "idle_ttl": session_manager.idle_ttl}, room=sid)
+
+def release_session_assets(session):
+    """Let the asset cache evict the files of a closed session's environment again."""
+    get_asset_cache().release(("session", session.key))
+
+# Live simulation environments of this pod, one per client. Sessions share the process (and
+# so one core), hence capacity defaults to 1 (MAX_SESSIONS overrides); idle sessions are closed
+# after SESSION_IDLE_TTL seconds and their clients get session_closed.
+session_manager = SessionManager(
+    idle_ttl=float(os.environ.get('SESSION_IDLE_TTL', 300)),
+    queue_timeout=float(os.environ.get('SESSION_QUEUE_TIMEOUT', 10)),
+    on_evict=notify_session_evicted,
+    on_close=release_session_assets,
+)
 
 @app.get("/")
 def read_root():
     return {"Hello": "World"}
 
-def download_env_from_gcp(env_name):
-    """Download all files (URDF and OBJ) from the GCP bucket."""
-    bucket = storage_client.bucket(BUCKET_NAME)
-    assets_dir = os.path.join(os.getcwd(), "assets", env_name)
-    os.makedirs(assets_dir, exist_ok=True)
-
-    prefix = f"{env_name}/objects/"
-    blobs = bucket.list_blobs(prefix=prefix)
+@app.get("/occupancy")
+def get_occupancy():
+    """Session load of this pod, for autoscaling and load balancing."""
+    return session_manager.occupancy()
 
-    for blob in blobs:
-        relative_path = blob.name[len(prefix):]
-        local_file_path = os.path.join(assets_dir, relative_path)
-        os.makedirs(os.path.dirname(local_file_path), exist_ok=True)
-        blob.download_to_filename(local_file_path)
+@app.get("/meshes/{name}")
+def get_mesh(name: str, request: Request):
+    """Serve a mesh by content hash. The URL never changes meaning, so clients cache it for good."""
+    # A plain (sync) route runs in the threadpool, so a first-time GLB conversion never blocks the event loop
+    resolved = mesh_store.resolve(name)
+    if resolved is None:
+        raise HTTPException(status_code=404, detail="Unknown mesh")
+    path, etag, media_type = resolved
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
 
+def download_env_from_gcp(env_name, lease=None):
+    """
+    Sync the environment's files (URDF and OBJ) from the bucket. assets/<env_name> links into
+    the shared asset cache, so only files missing from the cache are downloaded. With `lease`,
+    the files are kept from eviction until get_asset_cache().release(lease).
+    """
+    assets_dir = os.path.join(os.getcwd(), "assets", env_name)
+    sync_prefix(asset_storage, f"{env_name}/objects/", assets_dir, cache=get_asset_cache(), lease=lease)
     return assets_dir
 
 @sio.event
 async def upload_filename(sid, payload):
-    """Socket event to scan URDF files and emit data."""
+    """Socket event to scan URDF files and emit their poses and mesh references."""
     env_name = payload.get("filename")
-    assets_dir = download_env_from_gcp(env_name)
+    loop = asyncio.get_running_loop()
+    # The sync blocks on network I/O, so it runs off the event loop
+    assets_dir = await loop.run_in_executor(None, download_env_from_gcp, env_name)
     data = {}
     urdf_files = glob.glob(os.path.join(assets_dir, "**/*.urdf"), recursive=True)
 
@@ -85,19 +128,20 @@ async def upload_filename(sid, payload):
             position = [float(x) for x in origin.get("xyz").split()]
             orientation = [float(x) for x in origin.get("rpy").split()]
 
-            visual = link.find("visual")
-            obj_data = None
-            if visual and visual.find("geometry") and visual.find("geometry").find("mesh"):
-                mesh_filename = visual.find("geometry").find("mesh").get("filename")
-                obj_path = os.path.join(os.path.dirname(urdf_file), mesh_filename)
+            # A childless <mesh> element is falsy, so compare with None
+            mesh = link.find("visual/geometry/mesh")
+            mesh_ref = None
+            if mesh is not None and mesh.get("filename"):
+                obj_path = os.path.join(os.path.dirname(urdf_file), mesh.get("filename"))
                 if os.path.exists(obj_path):
-                    with open(obj_path, "rb") as f:
-                        obj_data = base64.b64encode(f.read()).decode("utf-8")
+                    # Reference only; the client fetches (and caches) the bytes from /meshes.
+                    # Hashing a new file reads all of it, so it runs off the event loop
+                    mesh_ref = await loop.run_in_executor(None, mesh_store.register, obj_path)
 
             data[os.path.basename(urdf_file)] = {
                 "position": position,
                 "orientation": orientation,
-                "obj_file_data": obj_data,
+                "mesh": mesh_ref,
             }
         except Exception as e:
             print(f"Error processing {urdf_file}: {e}")
@@ -107,41 +151,108 @@ async def upload_filename(sid, payload):
 async def start_simulation(sid, data):
     """Start a simulation that moves objects to the right."""
     objects = data.get('objects', [])
+    # Playback speed relative to real time; 0 or None streams unthrottled.
+    pacer = SimulationPacer(speed=data.get('speed', 1.0))
+    # Latest-frame-wins: a slow client skips intermediate steps instead of queueing them
+    mailbox = FrameMailbox()
+    sender = asyncio.create_task(send_latest_frames(
+        sio, sid, mailbox, lambda frame: ('simulation_step', frame), fps=data.get('fps', STREAM_FPS)))
     try:
         for step in range(1, 21):
             for obj in objects:
                 if "position" in obj:
                     obj["position"][0] += 0.2
-            await sio.emit('simulation_step', {"step": step, "objects": objects}, room=sid)
-            await asyncio.sleep(0.1)
+            # Snapshot the positions; the sender may serialize this frame after later steps ran
+            mailbox.publish({"step": step, "objects": [dict(obj, position=list(obj["position"])) if "position" in obj else obj
+                                                        for obj in objects]})
+            await pacer.wait(step * SIMULATION_STEP_SECONDS)
+        mailbox.close()
+        await sender
         await sio.emit('simulation_complete', {"message": "Simulation completed", "objects": objects}, room=sid)
     except Exception as e:
         print(f"Error during simulation: {e}")
+        mailbox.close()
+        await sender
+        await sio.emit('simulation_error', {"message": f"Simulation error: {str(e)}"}, room=sid)
+
+def build_session_env(sid, env_name):
+    """
+    Headless environment for a simulation session (runs in a worker thread). The assets are
+    re-synced (cheap when current) and leased until the session closes, since the env reloads
+    its meshes on reset.
+    """
+    assets_dir = download_env_from_gcp(env_name, lease=("session", sid))
+    try:
+        agent = AgentBall(start_pos=[0, 0, 1], radius=0.2)
+        return MultiObjectBulletEnv(objects=load_scene_objects(assets_dir), agent=agent, render_mode="rgb_array")
+    except BaseException:
+        get_asset_cache().release(("session", sid))
+        raise
+
+def run_episode(env, max_steps):
+    """Run one episode on a session's env; called through session_manager.run()."""
+    return Trainer(env, max_steps=max_steps).train()
+
+@sio.event
+async def open_session(sid, payload):
+    """
+    Open (or reuse) this client's simulation session for an environment. Waits for a free
+    slot when the pod is at capacity and answers with session_rejected if none frees up.
+    """
+    env_name = payload.get("filename")
+    session = session_manager.sessions.get(sid)
+    if session is not None and session.env_name != env_name:
+        # Switching environments: the old env is dropped rather than kept alongside
+        await session_manager.close(sid)
+    try:
+        session = await session_manager.open(sid, lambda: build_session_env(sid, env_name), env_name)
+    except CapacityError as e:
+        await sio.emit('session_rejected', {"message": str(e), "occupancy": session_manager.occupancy()}, room=sid)
+        return {"error": str(e)}
+    except Exception as e:
+        print(f"Error opening session for {sid}: {e}")
+        await sio.emit('simulation_error', {"message": f"Session error: {str(e)}"}, room=sid)
+        return {"error": str(e)}
+    await sio.emit('session_opened', {"filename": env_name, "occupancy": session_manager.occupancy()}, room=sid)
+    return {"filename": env_name}
+
+@sio.event
+async def start_training(sid, payload):
+    """Run an episode in this client's session, opening it first if needed, and report the result."""
+    session = session_manager.sessions.get(sid)
+    if session is None or session.env_name != payload.get("filename"):
+        opened = await open_session(sid, payload)
+        if "error" in opened:
+            return opened
+        session = session_manager.sessions[sid]
+    try:
+        result = await session_manager.run(session, run_episode, payload.get("max_steps", 1000))
+    except Exception as e:
+        print(f"Error during training: {e}")
         await sio.emit('simulation_error', {"message": f"Simulation error: {str(e)}"}, room=sid)
+        return {"error": str(e)}
+    await sio.emit('training_complete', result, room=sid)
+    return result
+
+@sio.event
+async def close_session(sid, payload=None):
+    """Release this client's session so its slot goes to the next client."""
+    closed = await session_manager.close(sid)
+    return {"closed": closed, "occupancy": session_manager.occupancy()}
+
+@sio.event
+async def disconnect(sid):
+    # A disconnected client's env would otherwise wait for the idle sweep
+    await session_manager.close(sid)
 
 def start_training_process(env_name):
     """Start the training process."""
-    objects = []
-    assets_dir = os.path.join(os.getcwd(), "assets", env_name)
-    urdf_files = glob.glob(os.path.join(assets_dir, "**/*.urdf"), recursive=True)
-    for urdf_file in urdf_files:
-        try:
-            tree = ET.parse(urdf_file)
-            root = tree.getroot()
-            link = root.find("link")
-            if link and (origin := next((child for child in link if child.tag == "origin" and child.get("xyz")), None)):
-                position = [float(x) for x in origin.get("xyz").split()]
-                if (visual := link.find("visual")) and (geometry := visual.find("geometry")) and (mesh := geometry.find("mesh")):
-                    mesh_filename = os.path.basename(mesh.get("filename"))
-                    objects.append(GeneralObject(filename=mesh_filename, position=position))
-        except Exception as e:
-            print(f"Error processing {urdf_file}: {e}")
-
     agent = AgentBall(start_pos=[0, 0, 1], radius=0.2)
-    env = MultiObjectBulletEnv(objects=objects, agent=agent)
+    env = MultiObjectBulletEnv(objects=load_scene_objects(os.path.join(os.getcwd(), "assets", env_name)), agent=agent)
     trainer = Trainer(env)
     training_result = trainer.train()
     env.render()
+    env.close()
     return training_result
 
 if __name__ == "__main__":
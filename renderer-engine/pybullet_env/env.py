@@ -3,18 +3,21 @@ import gymnasium as gym
 import pybullet as p
 import pybullet_data
 import numpy as np
-import time
 
-from .detection import detect_collision
+from .detection import detect_collision, detect_agent_contacts
 from .agent import AgentBall
 from .env_object import GeneralObject 
+from .camera import Camera
 
 class BulletEnv(gym.Env):
     """Custom Gym environment wrapping a PyBullet simulation."""
     metadata = {"render.modes": ["human", "rgb_array"]}
 
-    def __init__(self, target_filename, target_position):
+    def __init__(self, target_filename, target_position, render_mode="human", camera=None):
         super(BulletEnv, self).__init__()
+        self.render_mode = render_mode
+        # Headless camera used by render() in "rgb_array" mode
+        self.camera = camera if camera is not None else Camera()
         # Observation: agent and target positions (6 numbers)
         self.observation_space = spaces.Box(low=-np.inf, high=np.inf, shape=(6,), dtype=np.float32)
         # Dummy action space; actions are not manually controlled here.
@@ -22,54 +25,59 @@ class BulletEnv(gym.Env):
         self.target_filename = target_filename
         self.target_position = target_position
 
-        # Connect to PyBullet in GUI mode (change to p.DIRECT for headless)
-        self.physics_client = p.connect(p.GUI)
-        p.setAdditionalSearchPath(pybullet_data.getDataPath())
-        p.setGravity(0, 0, -9.81)
+        # Connect to PyBullet in GUI mode, or headless (DIRECT) when rendering to arrays
+        self.physics_client = p.connect(p.GUI if render_mode == "human" else p.DIRECT)
+        p.setAdditionalSearchPath(pybullet_data.getDataPath(), physicsClientId=self.physics_client)
+        # Simulated seconds per stepSimulation call; step() advances sim_time by this instead of sleeping.
+        self.time_step = p.getPhysicsEngineParameters(physicsClientId=self.physics_client)["fixedTimeStep"]
+        p.setGravity(0, 0, -9.81, physicsClientId=self.physics_client)
 
         # Load a plane as the ground
-        self.plane_id = p.loadURDF("plane.urdf")
+        self.plane_id = p.loadURDF("plane.urdf", physicsClientId=self.physics_client)
 
         # Create our agent (ball) and target object
         self.agent = AgentBall(radius=0.2, start_pos=[0, 0, 1])
-        self.agent.load()
+        self.agent.load(self.physics_client)
 
         self.target_object = GeneralObject(filename=self.target_filename, position=self.target_position)
-        self.target_object.load()
+        self.target_object.load(self.physics_client)
 
         self.done = False
+        self.sim_time = 0.0
 
     def reset(self):
         # Reset simulation by reloading agent and target.
-        p.resetSimulation()
-        p.setGravity(0, 0, -9.81)
-        p.loadURDF("plane.urdf")
-        self.agent.load()
-        self.target_object.load()
+        p.resetSimulation(physicsClientId=self.physics_client)
+        p.setGravity(0, 0, -9.81, physicsClientId=self.physics_client)
+        p.loadURDF("plane.urdf", physicsClientId=self.physics_client)
+        self.agent.load(self.physics_client)
+        self.target_object.load(self.physics_client)
         self.done = False
+        self.sim_time = 0.0
         return self._get_obs()
 
     def _get_obs(self):
-        pos_agent, _ = p.getBasePositionAndOrientation(self.agent.body_id)
-        pos_target, _ = p.getBasePositionAndOrientation(self.target_object.body_id)
+        pos_agent, _ = p.getBasePositionAndOrientation(self.agent.body_id, physicsClientId=self.physics_client)
+        pos_target, _ = p.getBasePositionAndOrientation(self.target_object.body_id, physicsClientId=self.physics_client)
         return np.array(list(pos_agent) + list(pos_target), dtype=np.float32)
 
     def step(self, action):
         # Auto-steer agent toward target.
         self.agent.set_velocity_toward(self.target_object.position, speed=4.0)
-        p.stepSimulation()
-        time.sleep(1/20)
+        p.stepSimulation(physicsClientId=self.physics_client)
+        self.sim_time += self.time_step
         obs = self._get_obs()
         reward = 0.0
-        if detect_collision(self.agent.body_id, self.target_object.body_id):
+        if detect_collision(self.agent.body_id, self.target_object.body_id, physics_client=self.physics_client):
             reward = 1.0
             self.done = True
 
         return obs, reward, self.done, {}
 
-    def render(self, mode="human"):
-        # Rendering is handled via the PyBullet GUI.
-        pass
+    def render(self, mode=None):
+        # "rgb_array" returns the camera's reused frame buffer; "human" is handled via the PyBullet GUI.
+        if (mode or self.render_mode) == "rgb_array":
+            return self.camera.capture(self.physics_client)
 
     def close(self):
         p.disconnect(self.physics_client)
@@ -80,35 +88,47 @@ class MultiObjectBulletEnv(gym.Env):
     """Custom Gym environment that loads multiple GeneralObject instances and an agent."""
     metadata = {"render.modes": ["human", "rgb_array"]}
 
-    def __init__(self, objects, agent):
+    def __init__(self, objects, agent, render_mode="human", camera=None):
         self.objects = objects  # List of GeneralObject instances
         self.agent = agent      # An AgentBall instance
+        self.render_mode = render_mode
+        # Headless camera used by render() in "rgb_array" mode
+        self.camera = camera if camera is not None else Camera()
         self.observation_space = spaces.Box(low=-np.inf, high=np.inf, shape=(6,), dtype=np.float32)
         self.action_space = spaces.Discrete(1)
         self.done = False
-        self.physics_client = p.connect(p.GUI)
-        p.setAdditionalSearchPath(pybullet_data.getDataPath())
-        p.setGravity(0, 0, -9.81)
-        self.plane_id = p.loadURDF("plane.urdf")
-        self.agent.load()
+        self.sim_time = 0.0
+        # GUI by default; "rgb_array" runs headless (DIRECT) and renders with the TinyRenderer
+        self.physics_client = p.connect(p.GUI if render_mode == "human" else p.DIRECT)
+        p.setAdditionalSearchPath(pybullet_data.getDataPath(), physicsClientId=self.physics_client)
+        # Simulated seconds per stepSimulation call; step() advances sim_time by this instead of sleeping.
+        self.time_step = p.getPhysicsEngineParameters(physicsClientId=self.physics_client)["fixedTimeStep"]
+        p.setGravity(0, 0, -9.81, physicsClientId=self.physics_client)
+        self.plane_id = p.loadURDF("plane.urdf", physicsClientId=self.physics_client)
+        self.agent.load(self.physics_client)
         for obj in self.objects:
-            obj.load()
+            obj.load(self.physics_client)
+        # Body id -> object, used to map agent contacts back to objects
+        self._objects_by_body = {obj.body_id: obj for obj in self.objects}
 
     def reset(self):
-        p.resetSimulation()
-        p.setGravity(0, 0, -9.81)
-        p.loadURDF("plane.urdf")
-        self.agent.load()
+        p.resetSimulation(physicsClientId=self.physics_client)
+        p.setGravity(0, 0, -9.81, physicsClientId=self.physics_client)
+        p.loadURDF("plane.urdf", physicsClientId=self.physics_client)
+        self.agent.load(self.physics_client)
         for obj in self.objects:
-            obj.load()
+            obj.load(self.physics_client)
+        # Body id -> object, used to map agent contacts back to objects
+        self._objects_by_body = {obj.body_id: obj for obj in self.objects}
         self.done = False
+        self.sim_time = 0.0
         return self._get_obs()
 
     def _get_obs(self):
-        pos_agent, _ = p.getBasePositionAndOrientation(self.agent.body_id)
+        pos_agent, _ = p.getBasePositionAndOrientation(self.agent.body_id, physicsClientId=self.physics_client)
         # For simplicity, we return agent position and the position of the first object.
         if self.objects:
-            pos_obj, _ = p.getBasePositionAndOrientation(self.objects[0].body_id)
+            pos_obj, _ = p.getBasePositionAndOrientation(self.objects[0].body_id, physicsClientId=self.physics_client)
         else:
             pos_obj = [0, 0, 0]
         return np.array(list(pos_agent) + list(pos_obj), dtype=np.float32)
@@ -117,13 +137,20 @@ class MultiObjectBulletEnv(gym.Env):
         # For demonstration, steer the agent toward the first object.
         if self.objects:
             self.agent.set_velocity_toward(self.objects[0].position, speed=4.0)
-        p.stepSimulation()
-        time.sleep(1/20)
+        p.stepSimulation(physicsClientId=self.physics_client)
+        self.sim_time += self.time_step
         obs = self._get_obs()
         reward = 0.0
-        for obj in self.objects:
-            if detect_collision(self.agent.body_id, obj.body_id):
-                reward = 1.0
-                self.done = True
-                break
-        return obs, reward, self.done, {}
\ No newline at end of file
+        # One contact query for the agent instead of one distance query per object
+        if detect_agent_contacts(self.agent.body_id, self._objects_by_body, physics_client=self.physics_client):
+            reward = 1.0
+            self.done = True
+        return obs, reward, self.done, {}
+
+    def render(self, mode=None):
+        # "rgb_array" returns the camera's reused frame buffer; "human" is handled via the PyBullet GUI.
+        if (mode or self.render_mode) == "rgb_array":
+            return self.camera.capture(self.physics_client)
+
+    def close(self):
+        p.disconnect(self.physics_client)
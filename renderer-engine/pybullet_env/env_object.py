@@ -1,19 +1,21 @@
 import pybullet as p
 import xml.etree.ElementTree as ET
+import glob
 import os
 
 
 class GeneralObject:
-    """A general object loaded from a mesh file."""
+    """A general object loaded from a mesh file, given relative to assets/ or as an absolute path."""
     def __init__(self, filename: str, position: list, scale=[1,1,1]):
         self.filename = filename
         self.position = position  # Expected to be a list [x, y, z]
         self.scale = scale
         self.body_id = None
+        self.physics_client = 0
 
-    def load(self):
+    def load(self, physics_client=0):
         """Load the mesh object as a collision and visual shape."""
-        # Construct the full path to the obj file in the assets directory
+        # Construct the full path to the obj file in the assets directory (absolute paths are kept)
         base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         obj_path = os.path.join(base_dir, "assets", self.filename)
         
@@ -27,21 +29,25 @@ class GeneralObject:
         collision_shape = p.createCollisionShape(
             shapeType=p.GEOM_MESH,
             fileName=obj_path,
-            meshScale=self.scale
+            meshScale=self.scale,
+            physicsClientId=physics_client
         )
         visual_shape = p.createVisualShape(
             shapeType=p.GEOM_MESH,
             fileName=obj_path,
             meshScale=self.scale,
-            rgbaColor=[0, 1, 0, 1]  # Green color
+            rgbaColor=[0, 1, 0, 1],  # Green color
+            physicsClientId=physics_client
         )
         self.body_id = p.createMultiBody(
             baseMass=1.0,
             baseCollisionShapeIndex=collision_shape,
             baseVisualShapeIndex=visual_shape,
             basePosition=self.position,
-            baseOrientation=p.getQuaternionFromEuler([0, 0, 0])
+            baseOrientation=p.getQuaternionFromEuler([0, 0, 0]),
+            physicsClientId=physics_client
         )
+        self.physics_client = physics_client
         return self.body_id
     
     # Create the root element of the URDF
@@ -53,7 +59,7 @@ class GeneralObject:
         A matching collision element is also added.
         """
         # Get the current position and orientation (as quaternion) of the body.
-        pos, orn = p.getBasePositionAndOrientation(self.body_id)
+        pos, orn = p.getBasePositionAndOrientation(self.body_id, physicsClientId=self.physics_client)
         # Convert quaternion to Euler angles (roll, pitch, yaw)
         rpy = p.getEulerFromQuaternion(orn)
         
@@ -104,4 +110,28 @@ class GeneralObject:
         # Write the XML tree to file.
         tree = ET.ElementTree(robot)
         tree.write(filename)
-        print(f"URDF snapshot saved to {filename}")
\ No newline at end of file
+        print(f"URDF snapshot saved to {filename}")
+
+
+def load_scene_objects(assets_dir):
+    """
+    GeneralObjects for every URDF with an origin and a visual mesh under assets_dir. Mesh
+    filenames are resolved against the directory of the URDF that references them.
+    """
+    objects = []
+    urdf_files = glob.glob(os.path.join(assets_dir, "**/*.urdf"), recursive=True)
+    for urdf_file in urdf_files:
+        try:
+            link = ET.parse(urdf_file).getroot().find("link")
+            if link is None:
+                continue
+            origin = next((child for child in link if child.tag == "origin" and child.get("xyz")), None)
+            mesh = link.find("visual/geometry/mesh")
+            if origin is None or mesh is None or not mesh.get("filename"):
+                continue
+            position = [float(x) for x in origin.get("xyz").split()]
+            mesh_path = os.path.join(os.path.dirname(os.path.abspath(urdf_file)), mesh.get("filename"))
+            objects.append(GeneralObject(filename=mesh_path, position=position))
+        except Exception as e:
+            print(f"Error processing {urdf_file}: {e}")
+    return objects
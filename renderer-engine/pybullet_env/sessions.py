@@ -0,0 +1,215 @@
+import asyncio
+import os
+import time
+
+
+class CapacityError(Exception):
+    """Raised when no session slot frees up within the queue timeout."""
+
+
+class SimulationSession:
+    """A live environment owned by the session manager, plus the bookkeeping it needs to evict it."""
+    def __init__(self, key, env, env_name=None):
+        self.key = key
+        self.env = env
+        self.env_name = env_name
+        self.created = time.monotonic()
+        self.last_active = self.created
+        # Work currently running on the env; busy sessions are never evicted
+        self.busy = 0
+        # Work on one env runs one call at a time
+        self.lock = asyncio.Lock()
+        # Set when the session was closed while busy; the env is closed once its work returns
+        self.closing = False
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+    def idle_seconds(self):
+        return 0.0 if self.busy else time.monotonic() - self.last_active
+
+
+class SessionManager:
+    """
+    Owns the live simulation environments of this pod, keyed by client sid or environment.
+
+    At most `capacity` sessions are open at once (default: the MAX_SESSIONS environment
+    variable, else 1). Session work runs on threads of this process and pybullet holds the
+    GIL while it steps, so all sessions of a pod share one core whatever its CPU count: scale
+    out with more pods, and raise MAX_SESSIONS only if sessions are mostly idle.
+    Opening a session beyond capacity waits up to `queue_timeout` seconds for a slot and then
+    raises CapacityError; a timeout of 0 rejects immediately. Sessions unused for `idle_ttl`
+    seconds are closed by a background sweep, which disconnects their pybullet client and
+    then awaits on_evict(key) so the owner can tell its client. on_close(session) runs after
+    any session's env is closed, to release what the session held besides its env.
+    """
+    def __init__(self, capacity=None, idle_ttl=300.0, queue_timeout=10.0, on_evict=None, on_close=None):
+        self.capacity = capacity or int(os.environ.get("MAX_SESSIONS", 0)) or 1
+        self.idle_ttl = idle_ttl
+        self.queue_timeout = queue_timeout
+        self.on_evict = on_evict
+        self.on_close = on_close
+        self.sessions = {}
+        # Keys whose environment is being opened -> future of the session, shared by concurrent openers
+        self._opening = {}
+        self.waiting = 0
+        self.rejected = 0
+        self.evicted = 0
+        # Slots reserved by sessions whose environment is still being built or finishing its work after close()
+        self._building = 0
+        self._closing = 0
+        self._slot_freed = asyncio.Condition()
+        self._sweeper = None
+
+    def _full(self):
+        return len(self.sessions) + self._building + self._closing >= self.capacity
+
+    async def open(self, key, make_env, env_name=None):
+        """
+        Return the session for `key`, building its environment with make_env() if needed.
+        make_env runs in a worker thread, as loading meshes and connecting pybullet block.
+        Concurrent calls for the same key share one build and get the same session.
+        """
+        self._ensure_sweeper()
+        session = self.sessions.get(key)
+        if session is not None:
+            session.touch()
+            return session
+        opening = self._opening.get(key)
+        if opening is not None:
+            # shield: a cancelled waiter must not cancel the build the other callers wait for
+            return await asyncio.shield(opening)
+
+        opening = asyncio.get_running_loop().create_future()
+        self._opening[key] = opening
+        try:
+            session = await self._open(key, make_env, env_name)
+        except BaseException as e:
+            if not isinstance(e, Exception):
+                e = CapacityError(f"Opening simulation session {key} was cancelled")
+            opening.set_exception(e)
+            # Marks the exception retrieved when no other caller was waiting for it
+            opening.exception()
+            raise
+        else:
+            opening.set_result(session)
+            return session
+        finally:
+            del self._opening[key]
+
+    async def _open(self, key, make_env, env_name):
+        async with self._slot_freed:
+            if self._full():
+                if not self.queue_timeout:
+                    self.rejected += 1
+                    raise CapacityError(f"All {self.capacity} simulation sessions are in use")
+                self.waiting += 1
+                try:
+                    await asyncio.wait_for(self._slot_freed.wait_for(lambda: not self._full()), self.queue_timeout)
+                except asyncio.TimeoutError:
+                    self.rejected += 1
+                    raise CapacityError(f"No simulation session freed up within {self.queue_timeout}s")
+                finally:
+                    self.waiting -= 1
+            self._building += 1
+
+        try:
+            env = await asyncio.get_running_loop().run_in_executor(None, make_env)
+        except BaseException:
+            await self._release_slot()
+            raise
+        session = SimulationSession(key, env, env_name)
+        self.sessions[key] = session
+        await self._release_slot()
+        print(f"Opened simulation session {key} ({len(self.sessions)}/{self.capacity})")
+        return session
+
+    async def _release_slot(self):
+        async with self._slot_freed:
+            self._building -= 1
+            self._slot_freed.notify_all()
+
+    async def run(self, session, fn, *args):
+        """
+        Run fn(session.env, *args) in a worker thread and return its result. Calls on one
+        session run one at a time, and the session is neither idle nor closed meanwhile.
+        """
+        async with session.lock:
+            if session.closing or self.sessions.get(session.key) is not session:
+                raise CapacityError(f"Simulation session {session.key} was closed")
+            session.busy += 1
+            try:
+                return await asyncio.get_running_loop().run_in_executor(None, fn, session.env, *args)
+            finally:
+                session.busy -= 1
+                session.touch()
+                if session.closing:
+                    self._close_env(session)
+                    async with self._slot_freed:
+                        self._closing -= 1
+                        self._slot_freed.notify_all()
+
+    def _close_env(self, session):
+        try:
+            session.env.close()
+        except Exception as e:
+            print(f"Error closing simulation session {session.key}: {e}")
+        if self.on_close is not None:
+            try:
+                self.on_close(session)
+            except Exception as e:
+                print(f"Error releasing simulation session {session.key}: {e}")
+        print(f"Closed simulation session {session.key} ({len(self.sessions)}/{self.capacity})")
+
+    async def close(self, key):
+        """Close the session for `key` (if open) and hand its slot to a waiting client."""
+        session = self.sessions.pop(key, None)
+        if session is None:
+            return False
+        if session.busy:
+            # The env is still stepping in a worker thread; run() closes it when that returns
+            session.closing = True
+            self._closing += 1
+            return True
+        self._close_env(session)
+        async with self._slot_freed:
+            self._slot_freed.notify_all()
+        return True
+
+    async def evict_idle(self):
+        """Close every session that has been idle for longer than idle_ttl and notify on_evict."""
+        expired = [key for key, session in self.sessions.items() if session.idle_seconds() > self.idle_ttl]
+        for key in expired:
+            if await self.close(key):
+                self.evicted += 1
+                if self.on_evict is not None:
+                    try:
+                        await self.on_evict(key)
+                    except Exception as e:
+                        print(f"Error notifying eviction of simulation session {key}: {e}")
+        return expired
+
+    def _ensure_sweeper(self):
+        # Started lazily so the manager can be created before the event loop runs
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep())
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(max(1.0, self.idle_ttl / 4))
+            await self.evict_idle()
+
+    def occupancy(self):
+        """Load figures for autoscaling: open, building and waiting sessions against capacity."""
+        active = len(self.sessions)
+        return {
+            "active": active,
+            "building": self._building,
+            "closing": self._closing,
+            "busy": sum(1 for session in self.sessions.values() if session.busy),
+            "waiting": self.waiting,
+            "capacity": self.capacity,
+            "utilization": (active + self._building + self._closing + self.waiting) / self.capacity,
+            "rejected_total": self.rejected,
+            "evicted_total": self.evicted,
+        }
@@ -0,0 +1,265 @@
+import base64
+import hashlib
+import mimetypes
+import os
+import shutil
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from urllib.parse import quote
+
+# "gcs" talks to Google Cloud Storage; "local" keeps each bucket in a directory under STORAGE_ROOT
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "gcs")
+STORAGE_ROOT = os.environ.get("STORAGE_ROOT", os.path.join(os.getcwd(), "storage"))
+
+_CHUNK_SIZE = 8 << 20
+
+
+class ObjectInfo:
+    """
+    Metadata of one stored object. `generation` changes whenever the object is rewritten and
+    `md5_hash` is the base64 MD5 of its content (None where the backend has none).
+    """
+    def __init__(self, name, size, generation=None, md5_hash=None, content_type=None, updated=None):
+        self.name = name
+        self.size = size
+        self.generation = generation
+        self.md5_hash = md5_hash
+        self.content_type = content_type
+        self.updated = updated
+
+
+class ObjectNotFound(Exception):
+    """Raised when an object does not exist (or no longer has the requested generation)."""
+
+
+class StorageBackend(ABC):
+    """
+    The operations the services need from object storage. Names are "/"-separated keys
+    relative to the bucket, e.g. "<env_id>/objects/plane.urdf".
+    """
+    name = None
+
+    @abstractmethod
+    def list(self, prefix=""):
+        """ObjectInfo for every object whose name starts with prefix."""
+
+    @abstractmethod
+    def stat(self, name):
+        """ObjectInfo for the object, or None if it does not exist."""
+
+    @abstractmethod
+    def get_range(self, name, start=0, end=None):
+        """Bytes [start, end) of the object; end=None reads to the end."""
+
+    @abstractmethod
+    def put_stream(self, name, stream, content_type=None):
+        """Store everything read from the file-like `stream` under name and return its ObjectInfo."""
+
+    @abstractmethod
+    def url(self, name):
+        """Where clients can fetch the object directly."""
+
+    def download_to_file(self, name, f, generation=None):
+        """
+        Write the object into the open binary file f, in chunks. With a generation, raise
+        ObjectNotFound rather than return other content if the object was replaced meanwhile.
+        """
+        info = self.stat(name)
+        if info is None or (generation is not None and info.generation != generation):
+            raise ObjectNotFound(f"{self.name}/{name} (generation {generation})")
+        for start in range(0, info.size, _CHUNK_SIZE):
+            f.write(self.get_range(name, start, min(start + _CHUNK_SIZE, info.size)))
+
+    def read(self, name):
+        return self.get_range(name)
+
+    def download_to_filename(self, name, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, partial_path = tempfile.mkstemp(prefix=".", suffix=".partial", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                self.download_to_file(name, f)
+            os.replace(partial_path, path)
+        except BaseException:
+            os.unlink(partial_path)
+            raise
+
+    def upload_from_filename(self, path, name, content_type=None):
+        with open(path, "rb") as f:
+            return self.put_stream(name, f, content_type or mimetypes.guess_type(path)[0])
+
+
+class GCSStorage(StorageBackend):
+    """A Google Cloud Storage bucket. The client is created on first use, not at import."""
+    def __init__(self, bucket_name, client=None):
+        if not bucket_name:
+            raise ValueError("A bucket name is required for the GCS storage backend")
+        self.bucket_name = bucket_name
+        self.name = f"gs://{bucket_name}"
+        self._client = client
+        self._bucket = None
+        self._lock = threading.Lock()
+
+    @property
+    def bucket(self):
+        with self._lock:
+            if self._bucket is None:
+                if self._client is None:
+                    from google.cloud import storage
+                    self._client = storage.Client()
+                self._bucket = self._client.bucket(self.bucket_name)
+        return self._bucket
+
+    @staticmethod
+    def _info(blob):
+        return ObjectInfo(blob.name, blob.size, blob.generation, blob.md5_hash, blob.content_type, blob.updated)
+
+    def list(self, prefix=""):
+        for blob in self.bucket.list_blobs(prefix=prefix):
+            yield self._info(blob)
+
+    def stat(self, name):
+        blob = self.bucket.get_blob(name)
+        return None if blob is None else self._info(blob)
+
+    def get_range(self, name, start=0, end=None):
+        from google.api_core.exceptions import NotFound
+        if end is not None and end <= start:
+            return b""
+        try:
+            # GCS ranges include their last byte
+            return self.bucket.blob(name).download_as_bytes(start=start, end=None if end is None else end - 1)
+        except NotFound:
+            raise ObjectNotFound(f"{self.name}/{name}")
+
+    def download_to_file(self, name, f, generation=None):
+        from google.api_core.exceptions import NotFound, PreconditionFailed
+        try:
+            self.bucket.blob(name).download_to_file(f, if_generation_match=generation)
+        except (NotFound, PreconditionFailed):
+            raise ObjectNotFound(f"{self.name}/{name} (generation {generation})")
+
+    def put_stream(self, name, stream, content_type=None):
+        blob = self.bucket.blob(name)
+        # Resumable upload in chunks, so large files are never held in memory
+        blob.chunk_size = _CHUNK_SIZE
+        blob.upload_from_file(stream, content_type=content_type)
+        return self._info(blob)
+
+    def url(self, name):
+        return f"https://storage.googleapis.com/{self.bucket_name}/{quote(name)}"
+
+
+class LocalStorage(StorageBackend):
+    """
+    A bucket kept as a directory tree, for running the services without cloud credentials.
+    The generation is the file's mtime in nanoseconds; MD5s are computed on demand and
+    remembered per (size, mtime). Content types are guessed from the extension.
+    """
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.name = f"file://{self.root}"
+        os.makedirs(self.root, exist_ok=True)
+        self._md5s = {}  # path -> ((size, mtime_ns), md5)
+
+    def _path(self, name):
+        path = os.path.normpath(os.path.join(self.root, name))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Object name {name!r} escapes {self.root}")
+        return path
+
+    def _md5(self, path, stat):
+        key = (stat.st_size, stat.st_mtime_ns)
+        cached = self._md5s.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        digest = hashlib.md5()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        md5_hash = base64.b64encode(digest.digest()).decode("ascii")
+        self._md5s[path] = (key, md5_hash)
+        return md5_hash
+
+    def _info(self, name, path):
+        from datetime import datetime, timezone
+        stat = os.stat(path)
+        return ObjectInfo(name, stat.st_size, stat.st_mtime_ns, self._md5(path, stat),
+                          mimetypes.guess_type(name)[0],
+                          datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc))
+
+    def list(self, prefix=""):
+        # Only walk the directory the prefix points into
+        directory = self.root
+        if "/" in prefix:
+            directory = self._path(prefix.rsplit("/", 1)[0])
+        names = []
+        for parent, _, filenames in os.walk(directory):
+            for filename in filenames:
+                if filename.endswith(".partial"):
+                    continue
+                path = os.path.join(parent, filename)
+                name = os.path.relpath(path, self.root).replace(os.sep, "/")
+                if name.startswith(prefix):
+                    names.append((name, path))
+        # Sorted by name, as GCS lists them
+        for name, path in sorted(names):
+            try:
+                yield self._info(name, path)
+            except FileNotFoundError:
+                continue
+
+    def stat(self, name):
+        path = self._path(name)
+        if not os.path.isfile(path):
+            return None
+        return self._info(name, path)
+
+    def get_range(self, name, start=0, end=None):
+        try:
+            with open(self._path(name), "rb") as f:
+                f.seek(start)
+                return f.read() if end is None else f.read(max(0, end - start))
+        except FileNotFoundError:
+            raise ObjectNotFound(f"{self.name}/{name}")
+
+    def download_to_file(self, name, f, generation=None):
+        try:
+            with open(self._path(name), "rb") as source:
+                if generation is not None and os.fstat(source.fileno()).st_mtime_ns != generation:
+                    raise ObjectNotFound(f"{self.name}/{name} (generation {generation})")
+                shutil.copyfileobj(source, f, _CHUNK_SIZE)
+        except FileNotFoundError:
+            raise ObjectNotFound(f"{self.name}/{name}")
+
+    def put_stream(self, name, stream, content_type=None):
+        path = self._path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written beside the target and renamed, so readers never see a partial object
+        fd, partial_path = tempfile.mkstemp(prefix=".", suffix=".partial", dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                shutil.copyfileobj(stream, f, _CHUNK_SIZE)
+            os.replace(partial_path, path)
+        except BaseException:
+            os.unlink(partial_path)
+            raise
+        return self._info(name, path)
+
+    def url(self, name):
+        return f"file://{quote(self._path(name))}"
+
+
+def get_storage(bucket_name, backend=None):
+    """
+    The storage for bucket_name, chosen by `backend` or the STORAGE_BACKEND environment
+    variable: "gcs" (default) or "local", which maps the bucket to STORAGE_ROOT/<bucket_name>.
+    """
+    backend = (backend or STORAGE_BACKEND).lower()
+    if backend == "gcs":
+        return GCSStorage(bucket_name)
+    if backend == "local":
+        return LocalStorage(os.path.join(STORAGE_ROOT, bucket_name or "default"))
+    raise ValueError(f"Unknown storage backend {backend!r} (expected 'gcs' or 'local')")
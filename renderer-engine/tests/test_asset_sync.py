@@ -0,0 +1,124 @@
+import io
+import os
+
+import pytest
+
+from pybullet_env.asset_cache import AssetCache
+from pybullet_env.asset_sync import sync_prefix, linked_keys
+from pybullet_env.storage_backend import LocalStorage, ObjectInfo
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = LocalStorage(tmp_path / "bucket")
+    storage.put_stream("env/objects/plane.urdf", io.BytesIO(b"<robot/>"))
+    storage.put_stream("env/objects/meshes/cube.obj", io.BytesIO(b"v 0 0 0\n" * 100))
+    return storage
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_sync_downloads_then_skips_unchanged_files(storage, tmp_path):
+    local_dir = tmp_path / "assets"
+    first = sync_prefix(storage, "env/objects/", local_dir)
+    assert first["downloaded"] == 2
+    assert read(local_dir / "plane.urdf") == b"<robot/>"
+    assert read(local_dir / "meshes" / "cube.obj") == b"v 0 0 0\n" * 100
+
+    second = sync_prefix(storage, "env/objects/", local_dir)
+    assert second == {"downloaded": 0, "skipped": 2, "removed": 0, "bytes": 0}
+
+
+def test_sync_fetches_changed_files(storage, tmp_path):
+    local_dir = tmp_path / "assets"
+    sync_prefix(storage, "env/objects/", local_dir)
+    storage.put_stream("env/objects/plane.urdf", io.BytesIO(b"<robot name='new'/>"))
+
+    summary = sync_prefix(storage, "env/objects/", local_dir)
+    assert summary["downloaded"] == 1
+    assert read(local_dir / "plane.urdf") == b"<robot name='new'/>"
+
+
+def test_sync_removes_only_files_it_synced(storage, tmp_path):
+    local_dir = tmp_path / "assets"
+    sync_prefix(storage, "env/objects/", local_dir)
+    (local_dir / "notes.txt").write_bytes(b"local file")
+    os.remove(storage._path("env/objects/meshes/cube.obj"))
+
+    summary = sync_prefix(storage, "env/objects/", local_dir)
+    assert summary["removed"] == 1
+    assert not (local_dir / "meshes" / "cube.obj").exists()
+    assert (local_dir / "plane.urdf").exists()
+    assert read(local_dir / "notes.txt") == b"local file"
+
+
+class EscapingStorage(LocalStorage):
+    """Lists an extra object whose name would resolve outside the target directory."""
+    def list(self, prefix=""):
+        yield from super().list(prefix)
+        yield ObjectInfo(f"{prefix}../../outside.txt", 4, generation=1)
+
+
+def test_sync_skips_paths_that_escape_the_target(tmp_path):
+    storage = EscapingStorage(tmp_path / "bucket")
+    storage.put_stream("env/objects/plane.urdf", io.BytesIO(b"<robot/>"))
+    local_dir = tmp_path / "work" / "assets"
+
+    summary = sync_prefix(storage, "env/objects/", local_dir)
+    assert summary["downloaded"] == 1
+    assert not (tmp_path / "outside.txt").exists()
+    assert not (tmp_path / "work" / "outside.txt").exists()
+
+
+def test_sync_with_cache_links_into_cache_and_shares_files(storage, tmp_path):
+    storage.put_stream("other/objects/cube.obj", io.BytesIO(b"v 0 0 0\n" * 100))
+    cache = AssetCache(tmp_path / "cache")
+
+    first = sync_prefix(storage, "env/objects/", tmp_path / "env", cache=cache)
+    assert first["downloaded"] == 2
+    link = tmp_path / "env" / "meshes" / "cube.obj"
+    assert os.path.islink(link)
+    assert os.readlink(link).startswith(cache.objects_dir)
+    assert read(link) == b"v 0 0 0\n" * 100
+
+    # Same content under another prefix: linked to the cached copy, not downloaded again
+    other = sync_prefix(storage, "other/objects/", tmp_path / "other", cache=cache)
+    assert other == {"downloaded": 0, "skipped": 1, "removed": 0, "bytes": 0}
+    assert os.readlink(tmp_path / "other" / "cube.obj") == os.readlink(link)
+    assert cache.stats()["files"] == 2
+
+    again = sync_prefix(storage, "env/objects/", tmp_path / "env", cache=cache)
+    assert again["downloaded"] == 0
+
+
+def test_sync_with_cache_refetches_evicted_files(storage, tmp_path):
+    cache = AssetCache(tmp_path / "cache")
+    sync_prefix(storage, "env/objects/", tmp_path / "env", cache=cache)
+    for key in linked_keys(tmp_path / "env", cache):
+        os.remove(cache.path(key))
+
+    summary = sync_prefix(storage, "env/objects/", tmp_path / "env", cache=cache)
+    assert summary["downloaded"] == 2
+    assert read(tmp_path / "env" / "plane.urdf") == b"<robot/>"
+
+
+def test_eviction_spares_leased_environments(tmp_path):
+    storage = LocalStorage(tmp_path / "bucket")
+    for env in ("a", "b"):
+        for i in range(3):
+            storage.put_stream(f"{env}/objects/mesh{i}.obj", io.BytesIO(os.urandom(1000)))
+    cache = AssetCache(tmp_path / "cache", max_bytes=3500)
+
+    sync_prefix(storage, "a/objects/", tmp_path / "a", cache=cache, lease="run-a")
+    sync_prefix(storage, "b/objects/", tmp_path / "b", cache=cache)
+    # Over budget, but a's files are leased and b's were just synced
+    assert all(os.path.exists(tmp_path / "a" / f"mesh{i}.obj") for i in range(3))
+    assert all(os.path.exists(tmp_path / "b" / f"mesh{i}.obj") for i in range(3))
+
+    cache.release("run-a")
+    sync_prefix(storage, "b/objects/", tmp_path / "b", cache=cache)
+    assert cache.total_bytes <= cache.max_bytes
+    assert not any(os.path.exists(tmp_path / "a" / f"mesh{i}.obj") for i in range(3))
@@ -0,0 +1,37 @@
+import os
+
+from pybullet_env.mesh_store import MeshStore
+
+
+def write_mesh(path, offset):
+    # Distinct content per file, so each gets its own hash and conversion
+    path.write_text(f"v {offset} 0 0\nv 1 0 0\nv 0 1 0\nv 0 0 1\nf 1 3 2\nf 1 2 4\nf 1 4 3\nf 2 3 4\n")
+    return str(path)
+
+
+def convert(store, path):
+    reference = store.register(path)
+    resolved = store.resolve(os.path.basename(reference["url"]))
+    assert resolved is not None
+    return resolved[0]
+
+
+def test_conversions_are_evicted_least_recently_served_first(tmp_path):
+    meshes = [write_mesh(tmp_path / f"mesh{i}.obj", i) for i in range(3)]
+    probe = MeshStore(cache_dir=str(tmp_path / "probe"))
+    glb_size = os.path.getsize(convert(probe, meshes[0]))
+
+    store = MeshStore(cache_dir=str(tmp_path / "cache"), max_bytes=2 * glb_size)
+    first, second = convert(store, meshes[0]), convert(store, meshes[1])
+    os.utime(first, ns=(1, 1))
+    os.utime(second, ns=(2, 2))
+    # Serving the first conversion again makes the second the least recently used
+    assert convert(store, meshes[0]) == first
+    third = convert(store, meshes[2])
+    assert os.path.exists(first) and os.path.exists(third)
+    assert not os.path.exists(second)
+
+    # An evicted conversion is redone on its next request
+    assert convert(store, meshes[1]) == second
+    assert os.path.exists(second)
+    assert sum(entry.stat().st_size for entry in os.scandir(tmp_path / "cache")) <= 2 * glb_size
@@ -0,0 +1,53 @@
+import pybullet as p
+
+from pybullet_env.agent import AgentBall
+from pybullet_env.env import MultiObjectBulletEnv
+from pybullet_env.env_object import load_scene_objects
+
+TETRAHEDRON = "v 0 0 0\nv 1 0 0\nv 0 1 0\nv 0 0 1\nf 1 3 2\nf 1 2 4\nf 1 4 3\nf 2 3 4\n"
+
+
+def write_urdf(path, mesh_filename, xyz):
+    path.write_text(f"""<robot name="{path.stem}">
+  <link name="body_0">
+    <origin xyz="{xyz}" rpy="0 0 0"/>
+    <visual><geometry><mesh filename="{mesh_filename}"/></geometry></visual>
+  </link>
+</robot>""")
+
+
+def make_env_dir(root):
+    """An env laid out as synced from the bucket: URDFs next to (or above) their meshes."""
+    env_dir = root / "assets" / "my_env"
+    (env_dir / "meshes").mkdir(parents=True)
+    (env_dir / "meshes" / "cube.obj").write_text(TETRAHEDRON)
+    write_urdf(env_dir / "cube.urdf", "meshes/cube.obj", "2 0 0.5")
+    (env_dir / "parts").mkdir()
+    (env_dir / "parts" / "wedge.obj").write_text(TETRAHEDRON)
+    write_urdf(env_dir / "parts" / "wedge.urdf", "wedge.obj", "-2 0 0.5")
+    # Skipped: no visual mesh
+    (env_dir / "empty.urdf").write_text('<robot name="empty"><link name="l"><origin xyz="0 0 0"/></link></robot>')
+    return env_dir
+
+
+def test_load_scene_objects_resolves_meshes_against_their_urdf(tmp_path):
+    env_dir = make_env_dir(tmp_path)
+    objects = sorted(load_scene_objects(str(env_dir)), key=lambda obj: obj.position[0])
+    assert [obj.filename for obj in objects] == [str(env_dir / "parts" / "wedge.obj"),
+                                                 str(env_dir / "meshes" / "cube.obj")]
+    assert [obj.position for obj in objects] == [[-2.0, 0.0, 0.5], [2.0, 0.0, 0.5]]
+
+
+def test_session_env_builds_from_env_dir(tmp_path, monkeypatch):
+    # Mesh paths must not depend on the working directory the service was started from
+    monkeypatch.chdir(tmp_path)
+    objects = load_scene_objects(str(make_env_dir(tmp_path)))
+    env = MultiObjectBulletEnv(objects=objects, agent=AgentBall(start_pos=[0, 0, 1], radius=0.2),
+                               render_mode="rgb_array")
+    try:
+        env.reset()
+        for obj in objects:
+            assert p.getCollisionShapeData(obj.body_id, -1, physicsClientId=env.physics_client)
+        env.step(0)
+    finally:
+        env.close()
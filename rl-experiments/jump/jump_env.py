@@ -5,13 +5,23 @@ from gymnasium import spaces
 import pybullet as p
 import pybullet_data
 
+from physics import validate_physics_settings, apply_physics_settings
+
 class BlockJumpEnv(gym.Env):
     metadata = {'render.modes': ['human', 'rgb_array']}
     
-    def __init__(self, render_mode=None):
+    def __init__(self, render_mode=None, action_repeat=5, time_step=1/240, solver_iterations=50, settle_steps=20):
         super().__init__()
         
         self.render_mode = render_mode
+
+        # Fidelity/throughput knobs: physics substeps per action, seconds per substep,
+        # constraint solver iterations and substeps run after reset to let bodies settle.
+        validate_physics_settings(action_repeat, time_step, solver_iterations, settle_steps)
+        self.action_repeat = action_repeat
+        self.time_step = time_step
+        self.solver_iterations = solver_iterations
+        self.settle_steps = settle_steps
         
         # Initialize connection to physics server
         if render_mode == "human":
@@ -22,6 +32,7 @@ class BlockJumpEnv(gym.Env):
         # Configure physics client
         p.setAdditionalSearchPath(pybullet_data.getDataPath())
         p.setGravity(0, 0, -9.8)
+        apply_physics_settings(self.client, self.time_step, self.solver_iterations)
         
         # Set up observation and action spaces
         # [robot_x, robot_y, robot_z, vel_x, vel_y, vel_z, target_x, target_y, target_z]
@@ -32,6 +43,15 @@ class BlockJumpEnv(gym.Env):
         
         self.step_counter = 0
         self.max_episode_steps = 2000
+
+        # Per-step state snapshot, fetched once after stepping and shared by
+        # observation, reward and termination (see _fetch_state)
+        self._position = np.zeros(3)
+        self._velocity = np.zeros(3)
+        self._angular_velocity = np.zeros(3)
+        self._target = np.zeros(3)
+        self._in_contact = False
+        self._observation = np.zeros(9, dtype=np.float32)
         
         # Debug flags
         self.debug_mode = False
@@ -43,6 +63,8 @@ class BlockJumpEnv(gym.Env):
         # Reset simulation
         p.resetSimulation()
         p.setGravity(0, 0, -9.8)
+        # resetSimulation restores some engine defaults, so re-apply the solver settings
+        apply_physics_settings(self.client, self.time_step, self.solver_iterations)
         
         # Load plane
         plane_id = p.loadURDF("plane.urdf")
@@ -78,6 +100,7 @@ class BlockJumpEnv(gym.Env):
         table_center_y = (min_coords[1] + max_coords[1]) / 2
         
         self.target_position = [table_center_x, table_center_y, table_height]
+        self._target[:] = self.target_position
         
         # Print table dimensions for debugging
         if self.render_mode == "human":
@@ -125,10 +148,11 @@ class BlockJumpEnv(gym.Env):
         self.debug_mode = True
         
         # Wait for physics to stabilize
-        for _ in range(20):  # Increased from 10 to 20 for better stability
+        for _ in range(self.settle_steps):
             p.stepSimulation()
         
         # Get initial observation
+        self._fetch_state()
         observation = self._get_observation()
         info = {}
         
@@ -149,10 +173,11 @@ class BlockJumpEnv(gym.Env):
         
         # Step the simulation for each action the agent takes
         # Make physics more stable by stepping multiple times
-        for _ in range(5):
+        for _ in range(self.action_repeat):
             p.stepSimulation()
         
         # Get observation, calculate reward, check if done
+        self._fetch_state()
         observation = self._get_observation()
         reward = self._compute_reward()
         self.step_counter += 1
@@ -162,25 +187,27 @@ class BlockJumpEnv(gym.Env):
         
         return observation, reward, terminated, truncated, info
 
-    def _get_observation(self):
-        # Get robot state
+    def _fetch_state(self):
+        """Query the robot's state from Bullet once per step into the preallocated arrays."""
         position, _ = p.getBasePositionAndOrientation(self.robot_body)
-        linear_vel, _ = p.getBaseVelocity(self.robot_body)
-        
-        # Create observation vector
-        observation = np.array([
-            position[0], position[1], position[2],          # Robot position
-            linear_vel[0], linear_vel[1], linear_vel[2],    # Robot velocity
-            self.target_position[0], self.target_position[1], self.target_position[2]  # Target position
-        ])
-        
-        return observation.astype(np.float32)
+        linear_vel, angular_vel = p.getBaseVelocity(self.robot_body)
+        self._position[:] = position
+        self._velocity[:] = linear_vel
+        self._angular_velocity[:] = angular_vel
+        self._in_contact = bool(p.getContactPoints(self.robot_body, self.block_id))
+
+    def _get_observation(self):
+        # [robot position, robot velocity, target position]
+        self._observation[0:3] = self._position
+        self._observation[3:6] = self._velocity
+        self._observation[6:9] = self._target
+        return self._observation.copy()
 
     def _compute_reward(self):
-        robot_pos, _ = p.getBasePositionAndOrientation(self.robot_body)
+        robot_pos = self._position
         
         # Base reward: negative distance to target
-        distance = np.sqrt(sum([(robot_pos[i] - self.target_position[i])**2 for i in range(3)]))
+        distance = np.linalg.norm(robot_pos - self._target)
         reward = -0.1 * distance  # Small penalty for distance
         
         # Check if robot is above the table surface
@@ -197,24 +224,23 @@ class BlockJumpEnv(gym.Env):
             # Extra bonus for being close to center of table
             center_x = (self.table_dims['x_min'] + self.table_dims['x_max']) / 2
             center_y = (self.table_dims['y_min'] + self.table_dims['y_max']) / 2
-            center_dist = np.sqrt((robot_pos[0] - center_x)**2 + (robot_pos[1] - center_y)**2)
+            center_dist = np.hypot(robot_pos[0] - center_x, robot_pos[1] - center_y)
             
             if center_dist < 0.2:
                 reward += 2.0
         
         # Reward for contacting the table
-        contact_points = p.getContactPoints(self.robot_body, self.block_id)
-        if contact_points:
+        if self._in_contact:
             reward += 0.5
         
         # Penalty for falling off
         if robot_pos[2] < 0.1:
             reward -= 5.0
             
-        return reward
+        return float(reward)
 
     def _is_terminated(self):
-        robot_pos, _ = p.getBasePositionAndOrientation(self.robot_body)
+        robot_pos = self._position
 
         return False
         
@@ -233,16 +259,12 @@ class BlockJumpEnv(gym.Env):
             abs(robot_pos[2] - self.table_dims['height'] - 0.1) < 0.3  # 0.1 is half height of robot
         )
         
-        # Check contact with table
-        contact_points = p.getContactPoints(self.robot_body, self.block_id)
-        
         # Stable on table condition - must be relatively stationary
-        _, vel = p.getBaseVelocity(self.robot_body)
-        is_stable = np.linalg.norm(vel) < 0.2  # Increased threshold slightly
+        is_stable = np.linalg.norm(self._angular_velocity) < 0.2  # Increased threshold slightly
         
         # Only terminate on success if the robot has been in the environment for a while
         # and is stable on the table
-        if is_above_table and contact_points and is_stable and self.step_counter > 50:
+        if is_above_table and self._in_contact and is_stable and self.step_counter > 50:
             return True
         
         return False
@@ -3,6 +3,7 @@ import gymnasium as gym
 import numpy as np
 
 from jump_env import BlockJumpEnv
+from shared_vec_env import SharedMemoryVecEnv, available_cpus
 
 from stable_baselines3 import PPO
 from stable_baselines3.common.env_util import make_vec_env
@@ -24,7 +25,7 @@ log_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__)
 os.makedirs(log_dir, exist_ok=True)
 stats_path = os.path.join(log_dir, "block_jump_normalize.pkl")
 
-def train(checkpoint_path=None, total_timesteps=200000, n_steps=2048, batch_size=64, n_epochs=10, n_envs=4):
+def train(checkpoint_path=None, total_timesteps=200000, n_steps=2048, batch_size=64, n_epochs=10, n_envs=4, n_workers=None):
     """
     Parameters:
     - checkpoint_path: path to a saved model to continue training
@@ -33,6 +34,8 @@ def train(checkpoint_path=None, total_timesteps=200000, n_steps=2048, batch_size
     - batch_size: number of experiences per update
     - n_epochs: number of times to reuse each collected batch of experience for training
     - n_envs: number of environments to run in parallel
+    - n_workers: rollout worker processes (default: one per available CPU, at most n_envs);
+      with more than one, envs run in subprocesses that share observation buffers
 
     Note:
     - total_training_updates = total_timesteps / (n_envs * n_steps)
@@ -40,7 +43,13 @@ def train(checkpoint_path=None, total_timesteps=200000, n_steps=2048, batch_size
     - times_each_experience_used = n_epochs
     """
     # Create vectorized environment
-    vec_env = make_vec_env('BlockJump-v0', n_envs=n_envs)
+    n_workers = min(n_envs, n_workers or available_cpus())
+    if n_workers > 1:
+        print(f"Running {n_envs} envs in {n_workers} worker processes")
+        vec_env = make_vec_env('BlockJump-v0', n_envs=n_envs,
+                               vec_env_cls=SharedMemoryVecEnv, vec_env_kwargs={"n_workers": n_workers})
+    else:
+        vec_env = make_vec_env('BlockJump-v0', n_envs=n_envs)
     vec_env = VecNormalize(vec_env, norm_obs=True, norm_reward=True, clip_obs=10.0)
     
     if checkpoint_path:
@@ -135,6 +144,6 @@ if __name__ == "__main__":
             batch_size=256,
             n_epochs=10,
             n_steps=2048,
-            n_envs=4)
+            n_envs=max(4, available_cpus()))
     elif args.test:
         test_on_rendered("../logs/ppo_block_jump")
@@ -0,0 +1,29 @@
+import numbers
+
+import pybullet as p
+
+
+def _is_integer(value):
+    # numbers.Integral covers numpy integers; bool is an Integral too but never a valid count
+    return isinstance(value, numbers.Integral) and not isinstance(value, bool)
+
+
+def validate_physics_settings(action_repeat, time_step, solver_iterations, settle_steps):
+    """Raise ValueError if any of the stepping/solver settings is out of range."""
+    if not _is_integer(action_repeat) or action_repeat < 1:
+        raise ValueError(f"action_repeat must be an integer >= 1, got {action_repeat!r}")
+    if not isinstance(time_step, numbers.Real) or isinstance(time_step, bool) or not time_step > 0:
+        raise ValueError(f"time_step must be positive, got {time_step!r}")
+    if not _is_integer(solver_iterations) or solver_iterations < 1:
+        raise ValueError(f"solver_iterations must be an integer >= 1, got {solver_iterations!r}")
+    if not _is_integer(settle_steps) or settle_steps < 0:
+        raise ValueError(f"settle_steps must be an integer >= 0, got {settle_steps!r}")
+
+
+def apply_physics_settings(physics_client, time_step, solver_iterations):
+    """Apply the timestep and solver settings. Call again after resetSimulation, which resets some of them."""
+    p.setPhysicsEngineParameter(
+        fixedTimeStep=time_step,
+        numSolverIterations=solver_iterations,
+        physicsClientId=physics_client
+    )
@@ -1,11 +1,12 @@
 import os
+import re
 import zipfile
 import io
 import logging
 import mimetypes
 from flask import Flask, request, jsonify, send_file, make_response, after_this_request
 from flask_cors import CORS
-from google.cloud import storage
+from storage_backend import get_storage, ObjectNotFound
 from werkzeug.exceptions import BadRequest, NotFound, InternalServerError
 
 # Configure logging
@@ -15,23 +16,45 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 
 # Enable CORS for all origins to work with React frontend
-CORS(app, resources={r"/*": {"origins": "*", "methods": ["GET", "PUT", "OPTIONS"], "allow_headers": ["Content-Type", "Authorization"]}})
+CORS(app, resources={r"/*": {"origins": "*", "methods": ["GET", "PUT", "OPTIONS"], "allow_headers": ["Content-Type", "Authorization", "Range"]}})
 
-# Configure cloud storage
-try:
-    storage_client = storage.Client()
-    bucket_name = os.environ.get("GCS_BUCKET_NAME")
+# Configure object storage: GCS when a bucket is configured, otherwise a local directory
+# (STORAGE_BACKEND overrides the choice; STORAGE_ROOT sets where local buckets live)
+bucket_name = os.environ.get("GCS_BUCKET_NAME")
+storage_backend = os.environ.get("STORAGE_BACKEND") or ("gcs" if bucket_name else "local")
+if storage_backend == "local" and not bucket_name:
+    logger.warning("GCS_BUCKET_NAME is not set; storing objects in a local directory")
+store = get_storage(bucket_name or "object-storage", storage_backend)
+logger.info(f"Using object storage at {store.name}")
 
-    if not bucket_name:
-        raise ValueError("GCS_BUCKET_NAME environment variable must be set.")
-    
-    # Pre-initialize bucket for reuse
-    bucket = storage_client.bucket(bucket_name)
-    
-    logger.info(f"Successfully connected to GCS bucket: {bucket_name}")
-except Exception as e:
-    logger.error(f"Failed to initialize Google Cloud Storage: {str(e)}")
-    raise
+# Read from an upload before anything is stored, to reject empty bodies
+UPLOAD_PEEK_BYTES = 64 * 1024
+
+# "bytes=<start>-<end>" or "bytes=-<suffix length>"; multiple ranges are not supported
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+class PrefixedStream:
+    """Read-only file-like view of `head` followed by the rest of `stream`."""
+    def __init__(self, head, stream):
+        self.head = head
+        self.stream = stream
+        self.position = 0
+
+    def read(self, size=-1):
+        if self.position < len(self.head):
+            end = len(self.head) if size is None or size < 0 else min(len(self.head), self.position + size)
+            data = self.head[self.position:end]
+            if size is None or size < 0:
+                data += self.stream.read()
+            elif len(data) < size:
+                data += self.stream.read(size - len(data))
+        else:
+            data = self.stream.read() if size is None or size < 0 else self.stream.read(size)
+        self.position += len(data)
+        return data
+
+    def tell(self):
+        return self.position
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -41,12 +64,14 @@ def health_check():
 @app.route('/objects/<envid>/<filename>', methods=['PUT'])
 def upload_object(envid, filename):
     """
-    Upload an object to Google Cloud Storage
+    Upload an object to storage
     Handles Content-Type for proper React frontend interaction
+    The body is streamed to storage rather than read into memory
     """
     try:
-        data = request.get_data()
-        if not data:
+        # Chunked uploads carry no Content-Length, so check for a first chunk before writing anything
+        head = request.stream.read(UPLOAD_PEEK_BYTES)
+        if not head:
             logger.warning(f"Received empty data for {envid}/{filename}")
             raise BadRequest("Empty file content")
 
@@ -55,17 +80,15 @@ def upload_object(envid, filename):
         if not content_type or content_type == 'application/octet-stream':
             content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
         
-        # Create blob with the appropriate object path
+        # Upload under the appropriate object path
         safe_envid = secure_filename_component(envid)
         safe_filename = secure_filename_component(filename)
-        blob = bucket.blob(f"{safe_envid}/{safe_filename}")
-        
-        # Set content type and upload
-        blob.content_type = content_type
-        blob.upload_from_string(data)
+        info = store.put_stream(f"{safe_envid}/{safe_filename}", PrefixedStream(head, request.stream), content_type)
+        if info.size == 0:
+            raise BadRequest("Empty file content")
         
         # Generate a public URL valid for client access
-        public_url = blob.public_url
+        public_url = store.url(info.name)
         
         logger.info(f"Successfully uploaded {safe_envid}/{safe_filename}")
         
@@ -77,7 +100,7 @@ def upload_object(envid, filename):
                 "filename": filename,
                 "path": f"{safe_envid}/{safe_filename}",
                 "contentType": content_type,
-                "size": len(data),
+                "size": info.size,
                 "url": public_url
             }
         }), 200
@@ -94,6 +117,7 @@ def download_object(envid, filename):
     """
     Download a specific object
     Returns the file with appropriate headers for React to handle
+    A single Range header is honoured, so large files can be fetched in parts
     """
     try:
         # Create safe path components
@@ -101,28 +125,45 @@ def download_object(envid, filename):
         safe_filename = secure_filename_component(filename)
         blob_name = f"{safe_envid}/{safe_filename}"
         
-        # Check if blob exists
-        blob = bucket.blob(blob_name)
-        if not blob.exists():
+        # Check if the object exists
+        info = store.stat(blob_name)
+        if info is None:
             logger.warning(f"File not found: {blob_name}")
             raise NotFound(f"File {filename} not found")
         
         # Get content type
-        content_type = blob.content_type or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        content_type = info.content_type or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
         
-        # Download as bytes
-        data = blob.download_as_bytes()
+        # Download the requested range (the whole object without a Range header)
+        start, end = 0, info.size
+        range_header = request.headers.get('Range')
+        match = RANGE_PATTERN.match(range_header.strip()) if range_header else None
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                if match.group(2):
+                    end = min(int(match.group(2)) + 1, info.size)
+            else:
+                start = max(0, info.size - int(match.group(2)))
+            if start >= end:
+                response = make_response("", 416)
+                response.headers.set('Content-Range', f"bytes */{info.size}")
+                return response
+        data = store.get_range(blob_name, start, end)
         
         # Create a response with correct content type
-        response = make_response(data)
+        response = make_response(data, 206 if (start, end) != (0, info.size) else 200)
+        if response.status_code == 206:
+            response.headers.set('Content-Range', f"bytes {start}-{end - 1}/{info.size}")
+        response.headers.set('Accept-Ranges', 'bytes')
         response.headers.set('Content-Type', content_type)
         response.headers.set('Content-Disposition', f'inline; filename="{filename}"')
-        response.headers.set('Access-Control-Expose-Headers', 'Content-Disposition')
+        response.headers.set('Access-Control-Expose-Headers', 'Content-Disposition, Content-Range, Accept-Ranges')
         
         logger.info(f"Successfully downloaded {blob_name}")
         return response
         
-    except NotFound as e:
+    except (NotFound, ObjectNotFound) as e:
         return jsonify({"success": False, "error": str(e)}), 404
     except Exception as e:
         logger.error(f"Error downloading object: {str(e)}")
@@ -138,8 +179,8 @@ def download_objects(envid):
         # Create safe path component
         safe_envid = secure_filename_component(envid)
         
-        # List all blobs with the specified prefix
-        blobs_list = list(bucket.list_blobs(prefix=f"{safe_envid}/"))
+        # List all objects with the specified prefix
+        blobs_list = list(store.list(f"{safe_envid}/"))
         
         if not blobs_list:
             logger.warning(f"No files found for environment: {safe_envid}")
@@ -154,7 +195,7 @@ def download_objects(envid):
                 # Only include specific file types if needed
                 # Remove this condition if you want all files
                 if blob.name.endswith(('.urdf', '.obj')):
-                    data = blob.download_as_bytes()
+                    data = store.read(blob.name)
                     # Use relative path in zip by removing the prefix
                     relative_path = blob.name.replace(f"{safe_envid}/", "")
                     zip_file.writestr(relative_path, data)
@@ -195,7 +236,7 @@ def list_objects(envid):
     """
     try:
         safe_envid = secure_filename_component(envid)
-        blobs = bucket.list_blobs(prefix=f"{safe_envid}/")
+        blobs = store.list(f"{safe_envid}/")
         
         files = []
         for blob in blobs:
@@ -208,7 +249,7 @@ def list_objects(envid):
                 "size": blob.size,
                 "contentType": blob.content_type,
                 "updated": blob.updated.isoformat() if blob.updated else None,
-                "url": blob.public_url
+                "url": store.url(blob.name)
             })
         
         logger.info(f"Listed {len(files)} objects for {safe_envid}")
@@ -219,7 +260,7 @@ def list_objects(envid):
         return jsonify({"success": False, "error": "Failed to list files"}), 500
 
 def secure_filename_component(component):
-    """Ensure filename components are safe to use in GCS paths"""
+    """Ensure filename components are safe to use in object paths"""
     # Replace potentially dangerous characters
     return component.replace('/', '_').replace('\\', '_').replace('..', '_')
 
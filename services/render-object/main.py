@@ -1,19 +1,29 @@
 import os
 import glob
 import json
-import base64
 import xml.etree.ElementTree as ET
 
 
 import socketio
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from google.cloud import storage
+from fastapi.responses import FileResponse
 import asyncio
+import multiprocessing
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
-from pybullet_env.env import MultiObjectBulletEnv
-from pybullet_env.agent import AgentBall
-from pybullet_env.env_object import GeneralObject
+from pybullet_env.env import POSE_SIZE
+from pybullet_env.mesh_store import MeshStore, IMMUTABLE_CACHE_CONTROL
+from pybullet_env.asset_sync import sync_prefix, lease_dir
+from pybullet_env.asset_cache import get_asset_cache
+from pybullet_env.storage_backend import get_storage
+from pybullet_env.pacing import SimulationPacer
+from pybullet_env.streaming import FrameBroadcast, FrameMailbox, send_latest_frames, STREAM_FPS
+from pybullet_env.trajectory import TrajectoryReader
+from pybullet_env.session import FrameWriter, run_training_session
 
 # Create a Socket.IO server instance with ASGI mode.
 sio = socketio.AsyncServer(async_mode="asgi", cors_allowed_origins=["http://localhost:3000"])
@@ -28,78 +38,107 @@ app.add_middleware(
 # Mount the Socket.IO ASGI app on top of the FastAPI app.
 asgi_app = socketio.ASGIApp(sio, other_asgi_app=app)
 
-# Initialize GCP storage client
-storage_client = storage.Client()
+# GCS by default; STORAGE_BACKEND=local serves the buckets from directories (no client is created until first use)
 BUCKET_NAME = os.environ.get('BUCKET_NAME', 'your-bucket-name')
+config_storage = get_storage(BUCKET_NAME)
+asset_storage = get_storage("genai-genesis-storage")
+
+# Meshes referenced by upload_filename responses, served by content hash from /meshes
+mesh_store = MeshStore()
+
+# Simulated seconds covered by one start_simulation step
+SIMULATION_STEP_SECONDS = 0.1
+
+# Trajectory files written by start_training(record=True) and served by the replay events
+RECORDINGS_DIR = os.environ.get('RECORDINGS_DIR', os.path.join(os.getcwd(), "recordings"))
+
+
+def recording_path(recording_id):
+    """Path of a recording inside RECORDINGS_DIR; ids are plain names, never paths."""
+    if not recording_id or os.path.basename(recording_id) != recording_id:
+        raise ValueError(f"Invalid recording id: {recording_id!r}")
+    return os.path.join(RECORDINGS_DIR, f"{recording_id}.traj")
+
+
+# Most steps one trajectory_frames event carries; clients page through longer recordings
+MAX_TRAJECTORY_FRAMES = int(os.environ.get('MAX_TRAJECTORY_FRAMES', 1000))
+
+
+# Simulation sessions run in worker processes. Each has its own pybullet client, so one
+# session's physics never blocks the event loop or another client's socket traffic.
+SIMULATION_WORKERS = int(os.environ.get('SIMULATION_WORKERS', os.cpu_count() or 1))
+_simulation_pool = None
+_frame_manager = None
+
+
+def get_simulation_pool():
+    """The worker pool for simulation sessions, created on first use."""
+    global _simulation_pool
+    if _simulation_pool is None:
+        _simulation_pool = ProcessPoolExecutor(max_workers=SIMULATION_WORKERS)
+    return _simulation_pool
+
+
+def discard_simulation_pool(pool):
+    """
+    Drop a pool that a dying worker broke: every later submit to it would fail, so the
+    next session starts a new one.
+    """
+    global _simulation_pool
+    if _simulation_pool is pool:
+        print("A simulation worker died; replacing the worker pool")
+        _simulation_pool = None
+        pool.shutdown(wait=False)
+
+
+def get_frame_manager():
+    """Manager whose queues carry frames from the worker processes back to the event loop."""
+    global _frame_manager
+    if _frame_manager is None:
+        _frame_manager = multiprocessing.Manager()
+    return _frame_manager
 
 
 @app.get("/")
 def read_root():
     return {"Hello": "World"}
 
+@app.get("/meshes/{name}")
+def get_mesh(name: str, request: Request):
+    """Serve a mesh by content hash. The URL never changes meaning, so clients cache it for good."""
+    # A plain (sync) route runs in the threadpool, so a first-time GLB conversion never blocks the event loop
+    resolved = mesh_store.resolve(name)
+    if resolved is None:
+        raise HTTPException(status_code=404, detail="Unknown mesh")
+    path, etag, media_type = resolved
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
+
 def get_environment_config(environment_id):
-    """Get environment configuration from GCP bucket"""
-    bucket = storage_client.bucket(BUCKET_NAME)
-    blob = bucket.blob(f"{environment_id}/config.json")
-    
-    # Download as string and parse JSON
-    content = blob.download_as_string()
+    """Get environment configuration from the bucket"""
+    content = config_storage.read(f"{environment_id}/config.json")
     return json.loads(content)
 
 def render_environment(env_name):
     """
-    Download all files (URDF and OBJ) from the GCP bucket for the given environment
+    Sync all files (URDF and OBJ) from the GCP bucket for the given environment
     into the /assets directory (in the current working directory) while preserving folder structure.
     """
-    # Set up GCP storage bucket.
-    bucket = storage.Client().bucket("genai-genesis-storage")
-    
-    # Define the local directory as "./assets"
     local_dir = os.path.join(os.getcwd(), "assets")
-    os.makedirs(local_dir, exist_ok=True)
-    
-    # Assume your objects are stored under objects/{env_name}/...
-    prefix = f"{env_name}/objects"
-    blobs = bucket.list_blobs(prefix=prefix)
-    
-    for blob in blobs:
-        # Reconstruct local path:
-        relative_path = blob.name[len(prefix):]  # file path relative to env folder
-        local_file_path = os.path.join(local_dir, relative_path)
-        os.makedirs(os.path.dirname(local_file_path), exist_ok=True)
-        blob.download_to_filename(local_file_path)
-        print(f"Downloaded {blob.name} to {local_file_path}")
-    
+    sync_prefix(asset_storage, f"{env_name}/objects/", local_dir, cache=get_asset_cache())
     return local_dir
 
 def download_env_from_gcp(env_name):
     """
-    Download all files (URDF and OBJ) from the GCP bucket for the given environment
-    into a temporary local directory while preserving folder structure.
+    Sync all files (URDF and OBJ) from the GCP bucket for the given environment into
+    assets/<env_name>, preserving folder structure. Files already on disk with the same
+    generation or MD5 are not downloaded again; the rest are fetched in parallel.
+    The directory links into the shared asset cache, which keeps disk use within its budget.
     """
-
-    bucket = storage.Client().bucket("genai-genesis-storage")
-    
-    # Create an "assets" directory in the current working directory
-    current_dir = os.getcwd()
-    print(env_name)
-    assets_dir = os.path.join(current_dir, "assets", env_name)
-    print(assets_dir)
-    os.makedirs(assets_dir, exist_ok=True)
-    
-    prefix = f"{env_name}/objects/"
-    blobs = bucket.list_blobs(prefix=prefix)
-
-    print(f"Downloading files from {prefix} to {assets_dir}")
-    
-    for blob in blobs:
-        # Reconstruct local path relative to the assets directory
-        relative_path = blob.name[len(prefix):]  # file path relative to env folder
-        local_file_path = os.path.join(assets_dir, relative_path)
-        os.makedirs(os.path.dirname(local_file_path), exist_ok=True)
-        blob.download_to_filename(local_file_path)
-        print(f"Downloaded {blob.name} to {local_file_path}")
-    
+    assets_dir = os.path.join(os.getcwd(), "assets", env_name)
+    sync_prefix(asset_storage, f"{env_name}/objects/", assets_dir, cache=get_asset_cache())
     return assets_dir
 
 @sio.event
@@ -107,12 +146,14 @@ async def upload_filename(sid, payload):
     """
     Socket event that scans the assets directory for URDF files.
     For each URDF file, it extracts the position, orientation (from the <origin> element)
-    and reads the associated OBJ file (which is base64 encoded) from the visual element.
-    Then, it emits the data back to the client.
+    and a reference (content hash + URL) to the OBJ file of the visual element.
+    Then, it emits the data back to the client, which fetches the meshes from /meshes.
     """
     print(f"Received payload from {sid}: {payload}")
     env_name = payload.get("filename")
-    assets_dir = download_env_from_gcp(env_name)
+    loop = asyncio.get_running_loop()
+    # The sync blocks on network I/O, so it runs off the event loop
+    assets_dir = await loop.run_in_executor(None, download_env_from_gcp, env_name)
     
     # Initialize a dictionary to hold data per URDF file.
     data = {}
@@ -141,7 +182,7 @@ async def upload_filename(sid, payload):
 
             # Extract the mesh filename from the visual element.
             visual = link.find("visual")
-            obj_data = None
+            mesh_ref = None
             if visual is not None:
                 geometry = visual.find("geometry")
                 if geometry is not None:
@@ -153,15 +194,14 @@ async def upload_filename(sid, payload):
                         obj_path = os.path.join(urdf_dir, mesh_filename)
                         print(obj_path)
                         if os.path.exists(obj_path):
-                            # Open in binary mode and encode in base64.
-                            with open(obj_path, "rb") as f:
-                                encoded_bytes = base64.b64encode(f.read())
-                                obj_data = encoded_bytes.decode("utf-8")
+                            # Send a reference only; the bytes are served (and cached) over HTTP.
+                            # Hashing a new file reads all of it, so it runs off the event loop
+                            mesh_ref = await loop.run_in_executor(None, mesh_store.register, obj_path)
             file_key = os.path.basename(urdf_file)
             data[file_key] = {
                 "position": position,
                 "orientation": orientation,
-                "obj_file_data": obj_data
+                "mesh": mesh_ref
             }
         except Exception as e:
             print(f"Error processing {urdf_file}: {e}")
@@ -173,6 +213,12 @@ async def start_simulation(sid, data):
     """Start a simulation that moves objects to the right"""
     print(f"Starting simulation for client {sid}")
     objects = data.get('objects', [])
+    # Playback speed relative to real time; 0 or None streams unthrottled.
+    pacer = SimulationPacer(speed=data.get('speed', 1.0))
+    # Newest step wins if the client falls behind; sent at most `fps` times per second
+    mailbox = FrameMailbox()
+    sender = asyncio.create_task(send_latest_frames(sio, sid, mailbox, lambda frame: ('simulation_step', frame),
+                                                    fps=data.get('fps', STREAM_FPS)))
     
     try:
         # Run 20 simulation steps
@@ -182,18 +228,17 @@ async def start_simulation(sid, data):
                 if "position" in obj:
                     # Increase x position by 0.2
                     obj["position"][0] += 0.2
-            print({
+            # Publish a snapshot, since the objects keep changing while the frame waits to be sent
+            mailbox.publish({
                 "step": step,
-                "objects": objects
+                "objects": [dict(obj, position=list(obj["position"])) if "position" in obj else dict(obj)
+                            for obj in objects]
             })
-            # Send the updated positions to the client
-            await sio.emit('simulation_step', {
-                "step": step,
-                "objects": objects
-            }, room=sid)
             
-            # Wait a short time between steps
-            await asyncio.sleep(0.1)
+            # Wait until the next step is due in simulated time
+            await pacer.wait(step * SIMULATION_STEP_SECONDS)
+        mailbox.close()
+        await sender
         
         # Send simulation completed message
         await sio.emit('simulation_complete', {
@@ -203,99 +248,224 @@ async def start_simulation(sid, data):
         
     except Exception as e:
         print(f"Error during simulation: {e}")
+        mailbox.close()
+        await sender
         await sio.emit('simulation_error', {
             "message": f"Simulation error: {str(e)}"
         }, room=sid)
 
+def _read_frames(worker_frames, loop, messages):
+    """Forward a worker's frame queue into an asyncio queue, until the closing None."""
+    while True:
+        message = worker_frames.get()
+        loop.call_soon_threadsafe(messages.put_nowait, message)
+        if message is None:
+            return
+
+
+async def _relay_session(broadcast, worker_frames, speed, pose_encoding):
+    """
+    Relay one session's frames from its worker to the viewers of its broadcast. Frames are
+    paced on the simulated clock into the broadcast's latest-frame-wins mailbox; its sender
+    encodes only the frames it transmits, once for the whole room.
+    """
+    loop = asyncio.get_running_loop()
+    pacer = SimulationPacer(speed=speed)
+    # The blocking get() runs on a reader thread of its own for the whole session (which may
+    # first wait for a free worker), so it never occupies the default pool used by asset syncs
+    messages = asyncio.Queue()
+    threading.Thread(target=_read_frames, args=(worker_frames, loop, messages),
+                     name=f"frames-{broadcast.room}", daemon=True).start()
+    try:
+        while True:
+            message = await messages.get()
+            if message is None:
+                break
+            if message[0] == "scene":
+                writer = FrameWriter(message[1], pose_encoding)
+                await broadcast.start(lambda frame: writer.frame(*frame), header=writer.header,
+                                      keyframe=writer.keyframe)
+            else:
+                _, sim_time, step, poses = message
+                await pacer.wait(sim_time)
+                broadcast.publish((step, poses))
+    finally:
+        dropped = await broadcast.close()
+        if dropped:
+            print(f"Dropped {dropped} stale frames in {broadcast.room}")
+
+# Running training sessions by session key -> (broadcast, future of the session's result).
+# Clients that start a session that is already running join its room instead.
+training_sessions = {}
+
 @sio.event
 async def start_training(sid, env_name):
     """
-    Load all URDF files (and their linked OBJ files) from the assets directory for the given env_name.
-    For each URDF file, create a GeneralObject instance.
-    Also create an agent instance and build the environment.
-    Finally, start the training using the Trainer class.
+    Build the environment for the given env_name and stream its episode to the client.
+    Sessions are keyed by `session_id` (default: the environment name); a client starting a
+    session that is already running joins it as a viewer, so physics runs and each frame is
+    encoded once however many clients watch. Speed, fps, encoding and recording are set by
+    the client that started the session.
+    The physics runs in a worker process; frames travel back over a queue and are relayed
+    by per-session coroutines, so the event loop keeps serving every other client.
     """
-    env_name = env_name.get("filename")
-    objects = []
-    object_names = []
-    assets_dir = os.path.join(os.getcwd(), "assets", env_name)
-    # Find all URDF files recursively.
-    urdf_files = glob.glob(os.path.join(assets_dir, "**/*.urdf"), recursive=True)
-    for urdf_file in urdf_files:
+    # Checked before anything else reads the payload, so a bad request gets an error event
+    filename = env_name.get("filename") if isinstance(env_name, dict) else None
+    if not isinstance(filename, str) or not filename:
+        await sio.emit('simulation_error', {"message": "start_training needs an environment filename"}, room=sid)
+        return {"error": "start_training needs an environment filename"}
+
+    speed = env_name.get("speed", 1.0)
+    record = env_name.get("record", False)
+    # "delta" streams a pose_table and binary pose_frame events instead of simulation_step dicts
+    pose_encoding = env_name.get("pose_encoding", "json")
+    # Upper bound on frames per second sent to the viewers; stale frames are dropped
+    fps = env_name.get("fps", STREAM_FPS)
+    session_key = env_name.get("session_id") or filename
+    env_name = filename
+    if not isinstance(session_key, str):
+        await sio.emit('simulation_error', {"message": f"Invalid session_id: {session_key!r}"}, room=sid)
+        return {"error": f"Invalid session_id: {session_key!r}"}
+
+    if session_key in training_sessions:
+        broadcast, result = training_sessions[session_key]
+        await broadcast.join(sid)
+        return await asyncio.shield(result)
+
+    if pose_encoding not in FrameWriter.ENCODINGS:
+        await sio.emit('simulation_error', {"message": f"Unknown pose encoding: {pose_encoding}"}, room=sid)
+        return {"error": f"Unknown pose encoding: {pose_encoding}"}
+
+    recording_id = None
+    recording_file = None
+    if record:
+        recording_id = f"{os.path.basename(env_name)}-{uuid.uuid4().hex[:8]}"
+        recording_file = recording_path(recording_id)
+
+    loop = asyncio.get_running_loop()
+    broadcast = FrameBroadcast(sio, f"session:{session_key}", fps=fps)
+    result = loop.create_future()
+    training_sessions[session_key] = (broadcast, result)
+    try:
+        # Joined first, so errors reported to the room reach the starting client as well
+        await broadcast.join(sid)
+        # The worker loads the meshes upload_filename synced; keep them from eviction until it is done
+        lease_dir(os.path.join(os.getcwd(), "assets", env_name), get_asset_cache(), ("session", session_key))
+        worker_frames = get_frame_manager().Queue()
+        relay = asyncio.create_task(_relay_session(broadcast, worker_frames, speed, pose_encoding))
         try:
-            tree = ET.parse(urdf_file)
-            root = tree.getroot()
-            link = root.find("link")
-            if link is None:
-                continue
-            origin = None
-            for child in link:
-                if child.tag == "origin" and child.get("xyz"):
-                    origin = child
-                    break
-            if origin is None:
-                continue
-            xyz_str = origin.get("xyz")
-            rpy_str = origin.get("rpy")
-            position = [float(x) for x in xyz_str.split()]
-            # We use only the position for loading the object.
-            # Extract the mesh filename from the visual element.
-            visual = link.find("visual")
-            if visual is not None:
-                geometry = visual.find("geometry")
-                if geometry is not None:
-                    mesh = geometry.find("mesh")
-                    if mesh is not None:
-                        mesh_filename = os.path.basename(mesh.get("filename"))
-                    else:
-                        continue
-                else:
-                    continue
-            else:
-                continue
-            # Create a GeneralObject instance for this object.
-            object_names.append(mesh_filename)
-            obj_instance = GeneralObject(filename=mesh_filename, position=position, env_name = env_name)
-            objects.append(obj_instance)
+            pool = get_simulation_pool()
+            try:
+                summary = await loop.run_in_executor(pool, run_training_session,
+                                                     env_name, worker_frames, recording_file)
+            except BrokenProcessPool:
+                discard_simulation_pool(pool)
+                raise
         except Exception as e:
-            print(f"Error processing {urdf_file}: {e}")
-    # Create an agent.
-    agent = AgentBall(start_pos=[0, 0, 1], radius=0.2)
-    # Build the environment with all objects.
-    env = MultiObjectBulletEnv(objects=objects, agent=agent)
-    # Create the trainer and start training.
-    # Optionally, render (if render() is implemented).
-
-    max_steps = 1000
-    obs = env.reset()
-    done = False
-    step_count = 0
-    total_reward = 0
-    
-    while not done and step_count < max_steps:
-        # For now using a simple action (0), this would be replaced with your agent's policy
-        action = 0  
-        obs, reward, done, info = env.step(action)
-        
-        print(obs)
-        frontend = {'step': step_count,
-            'objects': [{"filename": "agent", "position": obs[:3].tolist(), "orientation": obs[3:7].tolist()}]
-        }
-        for a, object_name in enumerate(object_names):
-            frontend['objects'].append({"filename": f"{object_name[:-3]}urdf", "position": obs[7+7*a:10+7*a].tolist(), "orientation": obs[10+7*a:14+7*a].tolist()})
-
-        await sio.emit('simulation_step', frontend, room=sid)
-        asyncio.sleep(0.2)
-        total_reward += reward
-        step_count += 1
+            print(f"Error during training: {e}")
+            # The worker may have died before closing its stream
+            worker_frames.put(None)
+            await relay
+            await sio.emit('simulation_error', {"message": f"Simulation error: {str(e)}"}, room=broadcast.room)
+            result.set_result({"error": str(e)})
+            return result.result()
+        await relay
 
-        
-        if reward == 1:
-            print(f"Collision detected at step {step_count}. Reward: {reward}")
-            break
-    
-    print(f"Training finished after {step_count} steps. Total reward: {total_reward}")
-    return {"steps": step_count, "total_reward": total_reward, "done": done}
+        if recording_id is not None:
+            await sio.emit('recording_saved', {"recording_id": recording_id, "steps": summary["recorded_steps"]},
+                           room=broadcast.room)
+        result.set_result({"steps": summary["steps"], "total_reward": summary["total_reward"],
+                           "done": summary["done"], "recording_id": recording_id})
+        return result.result()
+    except asyncio.CancelledError:
+        # The session itself was cancelled (e.g. on shutdown); its joiners are cancelled with it
+        result.cancel()
+        raise
+    except Exception as e:
+        # Failed outside the worker, e.g. while leasing the assets
+        print(f"Error starting training session {session_key}: {e}")
+        await sio.emit('simulation_error', {"message": f"Simulation error: {str(e)}"}, room=broadcast.room)
+        if not result.done():
+            result.set_result({"error": str(e)})
+        return result.result()
+    finally:
+        get_asset_cache().release(("session", session_key))
+        del training_sessions[session_key]
+        if not result.done():
+            # Joiners wait on this future; give them an outcome rather than a CancelledError
+            result.set_exception(RuntimeError(f"Training session {session_key} ended without a result"))
+        for viewer in list(broadcast.viewers):
+            await broadcast.leave(viewer)
+
+@sio.event
+async def disconnect(sid):
+    """Stop sending a disconnected client the frames of the sessions it was watching."""
+    for broadcast, _ in list(training_sessions.values()):
+        if sid in broadcast.viewers:
+            await broadcast.leave(sid)
+
+@sio.event
+async def replay_trajectory(sid, payload):
+    """
+    Stream steps [start, stop) of a recording as simulation_step events (or pose_table and
+    pose_frame events with pose_encoding="delta"), paced at the recorded step rate times
+    `speed` (0 or None runs unthrottled); a slow client gets the newest step, up to `fps`.
+    Frames come straight from the trajectory file; no physics is run.
+    """
+    try:
+        reader = TrajectoryReader(recording_path(payload.get("recording_id")))
+        start = max(0, int(payload.get("start", 0)))
+        stop = min(len(reader), int(payload.get("stop") or len(reader)))
+        writer = FrameWriter(reader.body_names, payload.get("pose_encoding", "json"))
+        for event, data in writer.header():
+            await sio.emit(event, data, room=sid)
+        mailbox = FrameMailbox()
+        sender = asyncio.create_task(send_latest_frames(sio, sid, mailbox, lambda frame: writer.frame(*frame),
+                                                        fps=payload.get("fps", STREAM_FPS)))
+        pacer = SimulationPacer(speed=payload.get("speed", 1.0))
+        pacer.start()
+        try:
+            for step, poses in enumerate(reader.frames(start, stop), start=start):
+                mailbox.publish((step, poses))
+                await pacer.wait((step - start + 1) / reader.step_rate)
+        finally:
+            mailbox.close()
+            await sender
+        await sio.emit('replay_complete', {"recording_id": payload.get("recording_id"), "start": start, "stop": stop},
+                       room=sid)
+    except (OSError, ValueError) as e:
+        print(f"Error during replay: {e}")
+        await sio.emit('replay_error', {"message": f"Replay error: {str(e)}"}, room=sid)
+
+@sio.event
+async def get_trajectory_frames(sid, payload):
+    """
+    Send steps [start, stop) of a recording in one trajectory_frames event for scrubbing:
+    poses are raw little-endian float32 bytes of shape (steps, bodies, pose_size).
+    At most MAX_TRAJECTORY_FRAMES steps are sent; the reply's `stop` says where they end.
+    """
+    try:
+        reader = TrajectoryReader(recording_path(payload.get("recording_id")))
+        start = int(payload.get("start", 0))
+        stop = int(payload["stop"]) if payload.get("stop") is not None else len(reader)
+        if start < 0 or stop < 0:
+            raise ValueError(f"Negative step range [{start}, {stop})")
+        if start > stop:
+            raise ValueError(f"Step range [{start}, {stop}) starts after it stops")
+        stop = min(stop, len(reader), start + MAX_TRAJECTORY_FRAMES)
+        frames = reader.frames(start, stop)
+        await sio.emit('trajectory_frames', {
+            "recording_id": payload.get("recording_id"),
+            "start": start,
+            "stop": max(start, stop),
+            "bodies": reader.body_names,
+            "step_rate": reader.step_rate,
+            "pose_size": POSE_SIZE,
+            "poses": frames.tobytes(),
+        }, room=sid)
+    except (OSError, ValueError, TypeError) as e:
+        print(f"Error reading trajectory: {e}")
+        await sio.emit('replay_error', {"message": f"Replay error: {str(e)}"}, room=sid)
 
 
 
@@ -3,11 +3,12 @@ import gymnasium as gym
 import pybullet as p
 import pybullet_data
 import numpy as np
-import time
 
-from .detection import detect_collision
+from .detection import detect_collision, detect_agent_contacts
 from .agent import AgentBall
 from .env_object import GeneralObject 
+# POSE_SIZE: floats per body in an observation, shared with the trajectory file format
+from .trajectory import POSE_SIZE, TrajectoryRecorder
 
 class BulletEnv(gym.Env):
     """Custom Gym environment wrapping a PyBullet simulation."""
@@ -22,9 +23,11 @@ class BulletEnv(gym.Env):
         self.target_filename = target_filename
         self.target_position = target_position
 
-        # Connect to PyBullet in GUI mode (change to p.DIRECT for headless)
-        self.physics_client = p.connect(p.GUI)
+        # Headless: the service runs in containers and worker processes without a display
+        self.physics_client = p.connect(p.DIRECT)
         p.setAdditionalSearchPath(pybullet_data.getDataPath())
+        # Simulated seconds per stepSimulation call; step() advances sim_time by this instead of sleeping.
+        self.time_step = p.getPhysicsEngineParameters()["fixedTimeStep"]
         p.setGravity(0, 0, -9.81)
 
         # Load a plane as the ground
@@ -38,6 +41,7 @@ class BulletEnv(gym.Env):
         self.target_object.load()
 
         self.done = False
+        self.sim_time = 0.0
 
     def reset(self):
         # Reset simulation by reloading agent and target.
@@ -47,6 +51,7 @@ class BulletEnv(gym.Env):
         self.agent.load()
         self.target_object.load()
         self.done = False
+        self.sim_time = 0.0
         return self._get_obs()
 
     def _get_obs(self):
@@ -58,7 +63,7 @@ class BulletEnv(gym.Env):
         # Auto-steer agent toward target.
         self.agent.set_velocity_toward(self.target_object.position, speed=4.0)
         p.stepSimulation()
-        time.sleep(1/20)
+        self.sim_time += self.time_step
         obs = self._get_obs()
         reward = 0.0
         if detect_collision(self.agent.body_id, self.target_object.body_id):
@@ -84,8 +89,20 @@ class MultiObjectBulletEnv(gym.Env):
         self.objects = objects  # List of GeneralObject instances
         self.agent = agent      # An AgentBall instance
         
-        # Calculate observation space size: 3 values for agent position + 3 values per object
-        obs_dim = 3 + (len(objects) * 3)
+        # Observation layout: the agent's pose followed by one pose per object. Each entry names
+        # the body and gives the slices of its position and orientation in the observation.
+        self.obs_layout = []
+        for index, name in enumerate(["agent"] + [obj.filename for obj in objects]):
+            offset = index * POSE_SIZE
+            self.obs_layout.append({
+                "name": name,
+                "position": slice(offset, offset + 3),
+                "orientation": slice(offset + 3, offset + POSE_SIZE),
+            })
+        obs_dim = POSE_SIZE * len(self.obs_layout)
+
+        # Reused every step; step()/reset() return this buffer, so copy it to keep a frame.
+        self._obs_buffer = np.zeros(obs_dim, dtype=np.float32)
         
         self.observation_space = spaces.Box(
             low=-np.inf, 
@@ -96,13 +113,37 @@ class MultiObjectBulletEnv(gym.Env):
         
         self.action_space = spaces.Discrete(1)
         self.done = False
-        self.physics_client = p.connect(p.GUI)
+        self.sim_time = 0.0
+        # Headless: GUI would fail (and can kill a pool worker) without a display
+        self.physics_client = p.connect(p.DIRECT)
         p.setAdditionalSearchPath(pybullet_data.getDataPath())
+        # Simulated seconds per stepSimulation call; step() advances sim_time by this instead of sleeping.
+        self.time_step = p.getPhysicsEngineParameters()["fixedTimeStep"]
         p.setGravity(0, 0, -9.81)
-        self.plane_id = p.loadURDF("plane.urdf")
-        self.agent.load()
-        for obj in self.objects:
-            obj.load()
+        try:
+            self.plane_id = p.loadURDF("plane.urdf")
+            self.agent.load()
+            for obj in self.objects:
+                obj.load()
+        except Exception:
+            # The caller never gets an env to close, so release the client here
+            p.disconnect(self.physics_client)
+            raise
+        # Body id -> object, used to map agent contacts back to objects
+        self._objects_by_body = {obj.body_id: obj for obj in self.objects}
+        self.recorder = None
+
+    def start_recording(self, path):
+        """Record the pose of every body after each reset() and step() to a trajectory file."""
+        self.stop_recording()
+        self.recorder = TrajectoryRecorder(path, [layout["name"] for layout in self.obs_layout],
+                                           step_rate=1.0 / self.time_step)
+        return self.recorder
+
+    def stop_recording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
 
     def reset(self):
         p.resetSimulation()
@@ -111,43 +152,44 @@ class MultiObjectBulletEnv(gym.Env):
         self.agent.load()
         for obj in self.objects:
             obj.load()
+        # Body id -> object, used to map agent contacts back to objects
+        self._objects_by_body = {obj.body_id: obj for obj in self.objects}
         self.done = False
-        return self._get_obs()
+        self.sim_time = 0.0
+        obs = self._get_obs()
+        if self.recorder is not None:
+            self.recorder.append(obs)
+        return obs
 
     def _get_obs(self):
-        # Get agent position and orientation
-        pos_agent, orn_agent = p.getBasePositionAndOrientation(self.agent.body_id)
-        print(f'pos_agent: {pos_agent}')
-        print(f'orn_agent: {orn_agent}')
-        
-        # Get positions of all objects
-        obj_positions = []
-        for obj in self.objects:
-            pos_obj, orn_obj = p.getBasePositionAndOrientation(obj.body_id)
-            obj_positions.extend(pos_obj)
-            obj_positions.extend(orn_obj)  # Add the x, y, z coordinates
-        
-        # If no objects, return zeros
-        if not obj_positions:
-            obj_positions = [0, 0, 0]
-        
-        # Combine agent position with all object positions
-        combined_obs = np.array(list(pos_agent) + list(orn_agent) + obj_positions, dtype=np.float32)
-        
-        return combined_obs
+        # Write each body's pose into its fixed slot of the reused buffer
+        self._write_pose(self.agent.body_id, 0)
+        for index, obj in enumerate(self.objects, start=1):
+            self._write_pose(obj.body_id, index * POSE_SIZE)
+        return self._obs_buffer
+
+    def _write_pose(self, body_id, offset):
+        position, orientation = p.getBasePositionAndOrientation(body_id)
+        self._obs_buffer[offset:offset + 3] = position
+        self._obs_buffer[offset + 3:offset + POSE_SIZE] = orientation
 
     def step(self, action):
         # For demonstration, steer the agent toward the first object.
         if self.objects:
             self.agent.set_velocity_toward(self.objects[0].position, speed=4.0)
         p.stepSimulation()
+        self.sim_time += self.time_step
         
         obs = self._get_obs()
-        print(obs)
+        if self.recorder is not None:
+            self.recorder.append(obs)
         reward = 0.0
-        for obj in self.objects:
-            if detect_collision(self.agent.body_id, obj.body_id):
-                reward = 1.0
-                self.done = True
-                break
-        return obs, reward, self.done, {}
\ No newline at end of file
+        # One contact query for the agent instead of one distance query per object
+        if detect_agent_contacts(self.agent.body_id, self._objects_by_body):
+            reward = 1.0
+            self.done = True
+        return obs, reward, self.done, {}
+
+    def close(self):
+        self.stop_recording()
+        p.disconnect(self.physics_client)
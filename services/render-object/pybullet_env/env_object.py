@@ -14,7 +14,7 @@ class GeneralObject:
 
     def load(self):
         """Load the mesh object as a collision and visual shape."""
-        # Construct the full path to the obj file in the assets directory
+        # Construct the full path to the obj file in the assets directory (absolute paths are kept)
         base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         obj_path = os.path.join(base_dir, "assets", self.env_name, self.filename)
         
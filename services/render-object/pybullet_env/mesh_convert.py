@@ -0,0 +1,146 @@
+import json
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+GLB_CONTENT_TYPE = "model/gltf-binary"
+
+# glTF constants
+_BYTE, _UNSIGNED_BYTE, _SHORT, _UNSIGNED_SHORT, _UNSIGNED_INT = 5120, 5121, 5122, 5123, 5125
+_ARRAY_BUFFER, _ELEMENT_ARRAY_BUFFER = 34962, 34963
+_SHORT_MAX = 32767
+_BYTE_MAX = 127
+
+
+def load_obj(path):
+    """
+    Read the geometry of an OBJ file: (positions float32 (n, 3), triangles int64 (m, 3)).
+    Polygons are fan-triangulated; texture coordinates, normals and materials are ignored.
+    """
+    positions = []
+    triangles = []
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if line.startswith("v "):
+                positions.append(line.split()[1:4])
+            elif line.startswith("f "):
+                # "v", "v/vt", "v//vn" or "v/vt/vn"; indices are 1-based, negative ones count back
+                corners = [int(token.split("/", 1)[0]) for token in line.split()[1:]]
+                corners = [c - 1 if c > 0 else len(positions) + c for c in corners]
+                for i in range(1, len(corners) - 1):
+                    triangles.append((corners[0], corners[i], corners[i + 1]))
+    positions = np.array(positions, dtype=np.float32).reshape(-1, 3)
+    triangles = np.array(triangles, dtype=np.int64).reshape(-1, 3)
+    if len(triangles) and (triangles.min() < 0 or triangles.max() >= len(positions)):
+        raise ValueError(f"{path} has faces referencing missing vertices")
+    return positions, triangles
+
+
+def quantize_mesh(positions, triangles):
+    """
+    Quantize positions to int16 in the mesh's bounding cube and weld vertices that land on
+    the same quantized point. Returns (quantized positions (n, 3) int16, triangles indexing
+    them, center, scale) with positions ~= quantized / 32767 * scale + center.
+    """
+    lo, hi = positions.min(axis=0), positions.max(axis=0)
+    center = (lo + hi) / 2.0
+    # One scale for all axes keeps the dequantizing node transform uniform, so normals stay valid
+    scale = float((hi - lo).max() / 2.0) or 1.0
+    quantized = np.rint((positions - center) / scale * _SHORT_MAX).astype(np.int16)
+    quantized, remap = np.unique(quantized, axis=0, return_inverse=True)
+    triangles = remap.reshape(-1)[triangles]
+    # Drop triangles that collapsed to a line or point when their corners were welded
+    keep = ((triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2]) &
+            (triangles[:, 0] != triangles[:, 2]))
+    return quantized, triangles[keep], center, scale
+
+
+def vertex_normals(positions, triangles):
+    """Area-weighted smooth normals of an indexed mesh, as unit float32 vectors."""
+    corners = positions[triangles].astype(np.float64)
+    face_normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    normals = np.zeros((len(positions), 3))
+    for i in range(3):
+        np.add.at(normals, triangles[:, i], face_normals)
+    length = np.linalg.norm(normals, axis=1, keepdims=True)
+    normals = np.divide(normals, length, out=np.zeros_like(normals), where=length > 0)
+    return normals.astype(np.float32)
+
+
+def _padded(data, alignment=4, fill=b"\0"):
+    return data + fill * (-len(data) % alignment)
+
+
+def build_glb(quantized, triangles, normals, center, scale):
+    """
+    Pack an indexed, quantized mesh into GLB bytes. Positions are normalized int16 and normals
+    normalized int8 (KHR_mesh_quantization, both padded to 4 components so every vertex stays
+    4-byte aligned); the node's scale and translation undo the position quantization.
+    """
+    vertex_count = len(quantized)
+    positions = np.zeros((vertex_count, 4), dtype="<i2")
+    positions[:, :3] = quantized
+    packed_normals = np.zeros((vertex_count, 4), dtype="i1")
+    packed_normals[:, :3] = np.rint(normals * _BYTE_MAX)
+    index_type, index_dtype = (_UNSIGNED_SHORT, "<u2") if vertex_count < 65536 else (_UNSIGNED_INT, "<u4")
+    indices = triangles.astype(index_dtype).reshape(-1)
+
+    views = []
+    binary = b""
+    for data, stride, target in ((positions.tobytes(), 8, _ARRAY_BUFFER),
+                                 (packed_normals.tobytes(), 4, _ARRAY_BUFFER),
+                                 (indices.tobytes(), None, _ELEMENT_ARRAY_BUFFER)):
+        view = {"buffer": 0, "byteOffset": len(binary), "byteLength": len(data), "target": target}
+        if stride:
+            view["byteStride"] = stride
+        views.append(view)
+        binary += _padded(data)
+
+    gltf = {
+        "asset": {"version": "2.0", "generator": "pybullet_env.mesh_convert"},
+        "extensionsUsed": ["KHR_mesh_quantization"],
+        "extensionsRequired": ["KHR_mesh_quantization"],
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"mesh": 0, "translation": [float(c) for c in center], "scale": [scale] * 3}],
+        "meshes": [{"primitives": [{"attributes": {"POSITION": 0, "NORMAL": 1}, "indices": 2}]}],
+        "buffers": [{"byteLength": len(binary)}],
+        "bufferViews": views,
+        "accessors": [
+            # Bounds are in quantized units, as the loader applies the normalization itself
+            {"bufferView": 0, "componentType": _SHORT, "normalized": True, "count": vertex_count, "type": "VEC3",
+             "min": quantized.min(axis=0).tolist(), "max": quantized.max(axis=0).tolist()},
+            {"bufferView": 1, "componentType": _BYTE, "normalized": True, "count": vertex_count, "type": "VEC3"},
+            {"bufferView": 2, "componentType": index_type, "count": len(indices), "type": "SCALAR"},
+        ],
+    }
+    json_chunk = _padded(json.dumps(gltf, separators=(",", ":")).encode("utf-8"), fill=b" ")
+    length = 12 + 8 + len(json_chunk) + 8 + len(binary)
+    return b"".join([
+        struct.pack("<4sII", b"glTF", 2, length),
+        struct.pack("<I4s", len(json_chunk), b"JSON"), json_chunk,
+        struct.pack("<I4s", len(binary), b"BIN\0"), binary,
+    ])
+
+
+def obj_to_glb(obj_path, glb_path):
+    """Convert an OBJ file into a quantized, indexed GLB at glb_path (written atomically)."""
+    positions, triangles = load_obj(obj_path)
+    if not len(positions) or not len(triangles):
+        raise ValueError(f"{obj_path} has no triangles")
+    quantized, triangles, center, scale = quantize_mesh(positions, triangles)
+    normals = vertex_normals(quantized, triangles)
+    data = build_glb(quantized, triangles, normals, center, scale)
+    os.makedirs(os.path.dirname(os.path.abspath(glb_path)), exist_ok=True)
+    # Write to a temporary name first so a concurrent reader never sees a partial file
+    fd, partial_path = tempfile.mkstemp(suffix=".partial", dir=os.path.dirname(os.path.abspath(glb_path)))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(partial_path, glb_path)
+    except BaseException:
+        os.unlink(partial_path)
+        raise
+    return glb_path
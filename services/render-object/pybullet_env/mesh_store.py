@@ -0,0 +1,144 @@
+import hashlib
+import os
+import threading
+
+from .mesh_convert import GLB_CONTENT_TYPE, obj_to_glb
+
+# Mesh URLs contain the content hash, so a response never changes and clients may keep it forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Converted meshes, named by the hash of their source file
+MESH_CACHE_DIR = os.environ.get("MESH_CACHE_DIR", os.path.join(os.getcwd(), "mesh_cache"))
+# Byte budget of MESH_CACHE_DIR; the least recently served conversions are deleted beyond it
+MESH_CACHE_BYTES = int(os.environ.get("MESH_CACHE_BYTES", 512 * 1024 ** 2))
+
+
+class MeshStore:
+    """
+    Content-addressed index of the mesh files referenced by the scenes this server has loaded.
+    Clients get a mesh reference (hash + URL) in the socket response and fetch the bytes over
+    HTTP, where the hash doubles as the ETag. Hashes are remembered per (path, size, mtime),
+    so a reconnect does not re-read unchanged files.
+
+    OBJ sources are offered as a quantized, indexed GLB (see mesh_convert), converted on the
+    first request and cached in `cache_dir` by source hash; the OBJ stays available as a fallback.
+    Conversions can always be redone, so the cache keeps at most `max_bytes` of them.
+    """
+    def __init__(self, url_prefix="/meshes", cache_dir=MESH_CACHE_DIR, max_bytes=MESH_CACHE_BYTES):
+        self.url_prefix = url_prefix.rstrip("/")
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._paths = {}   # hash -> path on disk
+        self._hashes = {}  # path -> ((size, mtime_ns), hash)
+        self._convert_lock = threading.Lock()
+
+    @staticmethod
+    def _hash_file(path, chunk_size=1 << 20):
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def register(self, path):
+        """
+        Index the file at `path` and return its reference for the client. New or changed
+        files are hashed here, so call this off the event loop.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        key = (stat.st_size, stat.st_mtime_ns)
+        cached = self._hashes.get(path)
+        if cached is not None and cached[0] == key:
+            mesh_hash = cached[1]
+        else:
+            mesh_hash = self._hash_file(path)
+            self._hashes[path] = (key, mesh_hash)
+        self._paths[mesh_hash] = path
+        extension = os.path.splitext(path)[1].lower()
+        source_url = f"{self.url_prefix}/{mesh_hash}{extension}"
+        reference = {
+            "hash": mesh_hash,
+            "url": source_url,
+            "format": extension.lstrip("."),
+            "size": stat.st_size,
+            "filename": os.path.basename(path),
+        }
+        if extension == ".obj":
+            reference.update(url=f"{self.url_prefix}/{mesh_hash}.glb", format="glb", source_url=source_url)
+        return reference
+
+    def converted_path(self, mesh_hash):
+        """Where the GLB conversion of the source with this hash is cached."""
+        return os.path.join(self.cache_dir, f"{mesh_hash}.glb")
+
+    def _evict(self, keep):
+        """Delete the least recently served conversions until the cache fits in max_bytes."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".glb") and entry.path != keep:
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries) + os.path.getsize(keep)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def _source_path(self, mesh_hash):
+        path = self._paths.get(mesh_hash)
+        if path is None:
+            return None
+        # The file may have been replaced since it was hashed (e.g. a fresh download); never
+        # serve other bytes under an immutable URL
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if self._hashes[path] != ((stat.st_size, stat.st_mtime_ns), mesh_hash):
+            return None
+        return path
+
+    def resolve(self, name):
+        """
+        (path, etag, media type) for a "<hash>.<ext>" URL name, or None if the mesh is unknown.
+        "<hash>.glb" of an OBJ source is converted here on first use, so call this off the event loop.
+        """
+        mesh_hash, _, extension = name.partition(".")
+        extension = extension.lower()
+        if not mesh_hash or mesh_hash.strip("0123456789abcdef"):
+            return None
+        if extension == "glb":
+            glb_path = self.converted_path(mesh_hash)
+            try:
+                # The mtime marks the conversion as recently served, for eviction
+                os.utime(glb_path)
+                return glb_path, f'"{mesh_hash}-glb"', GLB_CONTENT_TYPE
+            except FileNotFoundError:
+                pass
+            source = self._source_path(mesh_hash)
+            if source is None or not source.lower().endswith(".obj"):
+                return None
+            with self._convert_lock:
+                if not os.path.exists(glb_path):
+                    try:
+                        obj_to_glb(source, glb_path)
+                    except (OSError, ValueError) as e:
+                        # Clients fall back to the reference's source_url
+                        print(f"Error converting {source}: {e}")
+                        return None
+                    print(f"Converted {source} to {glb_path}")
+                    self._evict(keep=glb_path)
+            return glb_path, f'"{mesh_hash}-glb"', GLB_CONTENT_TYPE
+
+        source = self._source_path(mesh_hash)
+        if source is None:
+            return None
+        return source, f'"{mesh_hash}"', "text/plain"
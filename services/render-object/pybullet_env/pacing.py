@@ -0,0 +1,32 @@
+import asyncio
+import time
+
+
+class SimulationPacer:
+    """
+    Paces a stream of simulation frames against the wall clock using simulated time.
+    speed=None (or <= 0) streams as fast as the simulation runs, 1.0 is real time
+    and N plays back at N times real time.
+    """
+    def __init__(self, speed=1.0):
+        self.speed = speed if speed and speed > 0 else None
+        self.wall_start = None
+        self.sim_start = 0.0
+
+    def start(self, sim_time=0.0):
+        """Anchor the pacer to the current wall clock and simulated time."""
+        self.wall_start = time.monotonic()
+        self.sim_start = sim_time
+
+    def delay(self, sim_time):
+        """Seconds to wait before the frame at sim_time is due (0 when unthrottled or late)."""
+        if self.speed is None:
+            return 0.0
+        if self.wall_start is None:
+            self.start(sim_time)
+        due = self.wall_start + (sim_time - self.sim_start) / self.speed
+        return max(0.0, due - time.monotonic())
+
+    async def wait(self, sim_time):
+        """Yield to the event loop until the frame at sim_time is due."""
+        await asyncio.sleep(self.delay(sim_time))
@@ -0,0 +1,75 @@
+import struct
+
+import numpy as np
+
+# Frame layout (little-endian): header (uint32 step, uint16 record count) followed by one
+# packed record per body that moved: uint16 body index into the object table, int32[3]
+# position in units of position_scale metres, int16[4] quaternion (x, y, z, w) * 32767.
+FRAME_HEADER = struct.Struct("<IH")
+POSE_RECORD = np.dtype([("index", "<u2"), ("position", "<i4", (3,)), ("orientation", "<i2", (4,))])
+ORIENTATION_QUANTA = 32767
+
+
+class PoseStreamEncoder:
+    """
+    Delta encoder for streaming body poses. The object table (body names and scales) is sent
+    once; each frame then carries quantized poses for only the bodies that moved more than
+    the thresholds since they were last sent, so static furniture costs nothing per frame.
+    """
+    def __init__(self, body_names, position_scale=1e-4, position_threshold=1e-3, orientation_threshold=1e-3):
+        self.body_names = list(body_names)
+        self.position_scale = position_scale
+        # Thresholds in quantized units
+        self._position_threshold = position_threshold / position_scale
+        self._orientation_threshold = orientation_threshold * ORIENTATION_QUANTA
+        self._records = np.zeros(len(self.body_names), dtype=POSE_RECORD)
+        self._records["index"] = np.arange(len(self.body_names))
+        self._last_position = None
+        self._last_orientation = None
+
+    def object_table(self):
+        """One-time description a client needs to decode the frames."""
+        return {
+            "bodies": self.body_names,
+            "position_scale": self.position_scale,
+            "orientation_scale": 1.0 / ORIENTATION_QUANTA,
+            "header_size": FRAME_HEADER.size,
+            "record_size": POSE_RECORD.itemsize,
+        }
+
+    def keyframe(self):
+        """Make the next frame carry every body, e.g. for a client that joins mid-stream."""
+        self._last_position = None
+        self._last_orientation = None
+
+    def encode(self, step, poses):
+        """Encode a (bodies, 7) array of position + quaternion poses into a binary frame."""
+        poses = np.asarray(poses, dtype=np.float64).reshape(len(self.body_names), -1)
+        position = np.rint(poses[:, :3] / self.position_scale).astype(np.int64)
+        position = np.clip(position, np.iinfo(np.int32).min, np.iinfo(np.int32).max).astype(np.int32)
+        orientation = np.rint(np.clip(poses[:, 3:7], -1.0, 1.0) * ORIENTATION_QUANTA).astype(np.int16)
+
+        if self._last_position is None:
+            moved = np.ones(len(self.body_names), dtype=bool)
+            self._last_position = position.astype(np.int64)
+            self._last_orientation = orientation.astype(np.int32)
+        else:
+            # Compared against the last pose sent, so slow drift is still sent once it adds up
+            moved = ((np.abs(position - self._last_position).max(axis=1) > self._position_threshold) |
+                     (np.abs(orientation - self._last_orientation).max(axis=1) > self._orientation_threshold))
+            self._last_position[moved] = position[moved]
+            self._last_orientation[moved] = orientation[moved]
+
+        records = self._records[moved]
+        records["position"] = position[moved]
+        records["orientation"] = orientation[moved]
+        return FRAME_HEADER.pack(step, len(records)) + records.tobytes()
+
+
+def decode_frame(data, position_scale=1e-4):
+    """Inverse of PoseStreamEncoder.encode: (step, body indices, positions, quaternions)."""
+    step, count = FRAME_HEADER.unpack_from(data)
+    records = np.frombuffer(data, dtype=POSE_RECORD, count=count, offset=FRAME_HEADER.size)
+    positions = records["position"] * position_scale
+    orientations = records["orientation"] / ORIENTATION_QUANTA
+    return step, records["index"].astype(np.int64), positions, orientations
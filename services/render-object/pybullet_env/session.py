@@ -0,0 +1,152 @@
+import glob
+import os
+import xml.etree.ElementTree as ET
+
+from .env import MultiObjectBulletEnv, POSE_SIZE
+from .agent import AgentBall
+from .env_object import GeneralObject
+from .pose_stream import PoseStreamEncoder
+
+
+def frontend_name(name):
+    """Objects are keyed by their URDF on the frontend; the agent keeps its own name."""
+    return name if name == "agent" else f"{name[:-3]}urdf"
+
+
+def pose_payload(step, body_names, poses):
+    """simulation_step payload for one frame; poses is a (bodies, POSE_SIZE) array."""
+    objects = []
+    for name, pose in zip(body_names, poses):
+        objects.append({"filename": frontend_name(name), "position": pose[:3].tolist(),
+                        "orientation": pose[3:POSE_SIZE].tolist()})
+    return {"step": step, "objects": objects}
+
+
+class FrameWriter:
+    """
+    Turns (step, poses) into the events of one stream. "json" sends a full simulation_step
+    dict per frame; "delta" sends a pose_table once and then binary pose_frame payloads
+    holding only the bodies that moved (see pose_stream).
+    """
+    ENCODINGS = ("json", "delta")
+
+    def __init__(self, body_names, encoding="json"):
+        if encoding not in self.ENCODINGS:
+            raise ValueError(f"Unknown pose encoding: {encoding!r}")
+        self.body_names = body_names
+        self.encoding = encoding
+        self.encoder = PoseStreamEncoder([frontend_name(name) for name in body_names]) if encoding == "delta" else None
+
+    def header(self):
+        """Events to send before the first frame."""
+        if self.encoder is None:
+            return []
+        return [("pose_table", self.encoder.object_table())]
+
+    def keyframe(self):
+        """Make the next frame self-contained, for viewers that missed earlier ones."""
+        if self.encoder is not None:
+            self.encoder.keyframe()
+
+    def frame(self, step, poses):
+        if self.encoder is None:
+            return "simulation_step", pose_payload(step, self.body_names, poses)
+        return "pose_frame", self.encoder.encode(step, poses)
+
+
+def load_scene_objects(env_name):
+    """
+    Load all URDF files (and their linked OBJ files) from the assets directory for the given env_name.
+    For each URDF file with an origin and a visual mesh, create a GeneralObject instance.
+    """
+    objects = []
+    assets_dir = os.path.join(os.getcwd(), "assets", env_name)
+    # Find all URDF files recursively.
+    urdf_files = glob.glob(os.path.join(assets_dir, "**/*.urdf"), recursive=True)
+    for urdf_file in urdf_files:
+        try:
+            tree = ET.parse(urdf_file)
+            root = tree.getroot()
+            link = root.find("link")
+            if link is None:
+                continue
+            origin = None
+            for child in link:
+                if child.tag == "origin" and child.get("xyz"):
+                    origin = child
+                    break
+            if origin is None:
+                continue
+            xyz_str = origin.get("xyz")
+            position = [float(x) for x in xyz_str.split()]
+            # We use only the position for loading the object.
+            # Extract the mesh filename from the visual element.
+            visual = link.find("visual")
+            if visual is not None:
+                geometry = visual.find("geometry")
+                if geometry is not None:
+                    mesh = geometry.find("mesh")
+                    if mesh is not None:
+                        # Resolved against the URDF's directory, where the sync put the mesh
+                        mesh_filename = os.path.join(os.path.dirname(os.path.abspath(urdf_file)), mesh.get("filename"))
+                    else:
+                        continue
+                else:
+                    continue
+            else:
+                continue
+            # Create a GeneralObject instance for this object.
+            obj_instance = GeneralObject(filename=mesh_filename, position=position, env_name=env_name)
+            objects.append(obj_instance)
+        except Exception as e:
+            print(f"Error processing {urdf_file}: {e}")
+    return objects
+
+
+def run_training_session(env_name, frames, recording_file=None, max_steps=1000):
+    """
+    Build the scene for env_name and step it until the agent hits an object or max_steps.
+    Runs in a worker process and puts on `frames`: ("scene", body_names) once, then
+    ("frame", sim_time, step, poses) per step and None once the session ends. Encoding is
+    left to the sender, which only encodes the frames it actually transmits.
+    The summary dict is returned to the caller. The env is closed however the session ends,
+    since the worker process is reused for the next session.
+    """
+    env = None
+    try:
+        # Create an agent and build the environment with all objects.
+        agent = AgentBall(start_pos=[0, 0, 1], radius=0.2)
+        env = MultiObjectBulletEnv(objects=load_scene_objects(env_name), agent=agent)
+        body_names = [layout["name"] for layout in env.obs_layout]
+        frames.put(("scene", body_names))
+        if recording_file is not None:
+            # Keep every step on disk so the episode can be replayed without re-running physics
+            env.start_recording(recording_file)
+
+        obs = env.reset()
+        done = False
+        step_count = 0
+        total_reward = 0
+
+        while not done and step_count < max_steps:
+            # For now using a simple action (0), this would be replaced with your agent's policy
+            action = 0
+            obs, reward, done, info = env.step(action)
+
+            # obs is the env's reused buffer: one POSE_SIZE slot per body, in env.obs_layout order
+            frames.put(("frame", env.sim_time, step_count, obs.reshape(-1, POSE_SIZE).copy()))
+            total_reward += reward
+            step_count += 1
+
+            if reward == 1:
+                print(f"Collision detected at step {step_count}. Reward: {reward}")
+                break
+
+        print(f"Training finished after {step_count} steps. Total reward: {total_reward}")
+        recorded_steps = env.recorder.steps if env.recorder is not None else None
+        return {"steps": step_count, "total_reward": total_reward, "done": done, "recorded_steps": recorded_steps}
+    finally:
+        if env is not None:
+            # Also stops the recording; leaving the client connected would leak it into the next session
+            env.close()
+        frames.put(None)
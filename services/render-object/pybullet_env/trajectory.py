@@ -0,0 +1,119 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+# Floats per body per step: position (x, y, z) + orientation quaternion (x, y, z, w)
+POSE_SIZE = 7
+
+# File layout: fixed prefix, JSON header, zero padding to DATA_ALIGN, then float32 rows of
+# len(bodies) * POSE_SIZE values, one per recorded step.
+MAGIC = b"TRAJ"
+VERSION = 1
+PREFIX = struct.Struct("<4sHHIQ")  # magic, version, reserved, header length, step count
+STEP_COUNT_OFFSET = 12
+DATA_ALIGN = 64
+
+
+def _data_offset(header_length):
+    end = PREFIX.size + header_length
+    return end + (-end % DATA_ALIGN)
+
+
+class TrajectoryRecorder:
+    """
+    Appends per-step poses of a fixed set of bodies to a memory-mapped float32 file.
+    The file grows in chunks of `chunk_steps` rows; the step count in the prefix is updated
+    on every append, so a TrajectoryReader can follow a recording that is still running.
+    """
+    def __init__(self, path, body_names, step_rate, chunk_steps=1024):
+        self.path = path
+        self.body_names = list(body_names)
+        self.step_rate = step_rate
+        self.chunk_steps = chunk_steps
+        self.row_size = len(self.body_names) * POSE_SIZE
+        self.steps = 0
+
+        header = json.dumps({"bodies": self.body_names, "pose_size": POSE_SIZE,
+                             "step_rate": step_rate, "dtype": "float32"}).encode("utf-8")
+        self.data_offset = _data_offset(len(header))
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(PREFIX.pack(MAGIC, VERSION, 0, len(header), 0))
+            f.write(header)
+            f.write(b"\0" * (self.data_offset - PREFIX.size - len(header)))
+
+        self._step_count = np.memmap(path, dtype="<u8", mode="r+", offset=STEP_COUNT_OFFSET, shape=(1,))
+        self._rows = None
+        self._capacity = 0
+        self._grow()
+
+    def _grow(self):
+        """Extend the file by one chunk and remap the data region."""
+        if self._rows is not None:
+            self._rows.flush()
+        self._capacity += self.chunk_steps
+        with open(self.path, "r+b") as f:
+            f.truncate(self.data_offset + self._capacity * self.row_size * 4)
+        self._rows = np.memmap(self.path, dtype="<f4", mode="r+", offset=self.data_offset,
+                               shape=(self._capacity, self.row_size))
+
+    def append(self, poses):
+        """Record one step: a flat array of len(body_names) * POSE_SIZE floats, body by body."""
+        if self.steps == self._capacity:
+            self._grow()
+        self._rows[self.steps] = poses
+        self.steps += 1
+        self._step_count[0] = self.steps
+
+    def close(self):
+        """Flush and trim the unused tail of the last chunk."""
+        if self._rows is None:
+            return
+        self._rows.flush()
+        self._step_count.flush()
+        self._rows = None
+        self._step_count = None
+        with open(self.path, "r+b") as f:
+            f.truncate(self.data_offset + self.steps * self.row_size * 4)
+
+
+class TrajectoryReader:
+    """Read-only view of a recorded trajectory; frames are served from the page cache, no physics."""
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, version, _, header_length, _ = PREFIX.unpack(f.read(PREFIX.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} trajectory file")
+            header = json.loads(f.read(header_length))
+        self.body_names = header["bodies"]
+        self.step_rate = header["step_rate"]
+        self.data_offset = _data_offset(header_length)
+        self.row_size = len(self.body_names) * POSE_SIZE
+        self._poses = None
+        self.steps = 0
+        self.refresh()
+
+    def refresh(self):
+        """Pick up steps appended since the reader was opened."""
+        with open(self.path, "rb") as f:
+            f.seek(STEP_COUNT_OFFSET)
+            steps = struct.unpack("<Q", f.read(8))[0]
+        if steps != self.steps or self._poses is None:
+            self.steps = steps
+            shape = (steps, len(self.body_names), POSE_SIZE)
+            if steps:
+                self._poses = np.memmap(self.path, dtype="<f4", mode="r", offset=self.data_offset, shape=shape)
+            else:
+                # An empty region cannot be memory-mapped
+                self._poses = np.zeros(shape, dtype=np.float32)
+        return self.steps
+
+    def __len__(self):
+        return self.steps
+
+    def frames(self, start=0, stop=None):
+        """Poses for steps [start, stop) as a (steps, bodies, POSE_SIZE) float32 array view."""
+        return self._poses[start:stop]
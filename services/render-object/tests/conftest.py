@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the service modules as the app does, from the render-object directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def emitted(monkeypatch):
+    """Socket.IO calls of main are recorded instead of sent; there are no connected clients."""
+    main = pytest.importorskip("main")
+    events = []
+
+    async def emit(event, data=None, room=None, **kwargs):
+        events.append((event, data, room))
+
+    async def no_op(*args, **kwargs):
+        pass
+
+    monkeypatch.setattr(main.sio, "emit", emit)
+    monkeypatch.setattr(main.sio, "enter_room", no_op)
+    monkeypatch.setattr(main.sio, "leave_room", no_op)
+    return events
@@ -0,0 +1,28 @@
+import importlib
+
+import pytest
+
+
+@pytest.mark.parametrize("module", ["pybullet_env.agent", "pybullet_env.env", "pybullet_env.session"])
+def test_simulation_modules_import(module):
+    importlib.import_module(module)
+
+
+def test_service_imports():
+    pytest.importorskip("fastapi")
+    pytest.importorskip("socketio")
+    importlib.import_module("main")
+
+
+def test_env_steps_with_agent():
+    from pybullet_env.agent import AgentBall
+    from pybullet_env.env import MultiObjectBulletEnv, POSE_SIZE
+
+    env = MultiObjectBulletEnv(objects=[], agent=AgentBall(radius=0.2, start_pos=[0, 0, 1]))
+    try:
+        obs = env.reset()
+        assert obs.shape == (POSE_SIZE,)
+        obs, reward, done, info = env.step(0)
+        assert reward == 0.0 and not done
+    finally:
+        env.close()
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from pybullet_env.asset_cache import AssetCache
+
+main = pytest.importorskip("main")
+
+
+def test_joiners_get_the_error_of_a_session_that_fails_to_start(emitted, monkeypatch, tmp_path):
+    started = asyncio.Event()
+    joined = asyncio.Event()
+
+    def failing_lease(*args):
+        raise OSError("assets missing")
+
+    async def slow_join(self, sid):
+        # The first client's session only goes on once the second has joined it
+        self.viewers.add(sid)
+        if sid == "a":
+            started.set()
+            await joined.wait()
+        else:
+            joined.set()
+
+    cache = AssetCache(tmp_path / "asset_cache")
+    monkeypatch.setattr(main, "get_asset_cache", lambda: cache)
+    monkeypatch.setattr(main, "lease_dir", failing_lease)
+    monkeypatch.setattr(main.FrameBroadcast, "join", slow_join)
+
+    async def run():
+        first = asyncio.create_task(main.start_training("a", {"filename": "env"}))
+        await started.wait()
+        second = asyncio.create_task(main.start_training("b", {"filename": "env"}))
+        return await asyncio.gather(first, second)
+
+    first, second = asyncio.run(asyncio.wait_for(run(), timeout=5))
+    assert first == second == {"error": "assets missing"}
+    assert ("simulation_error", {"message": "Simulation error: assets missing"}, "session:env") in emitted
+    assert main.training_sessions == {}
+
+
+@pytest.mark.parametrize("payload", [{}, {"filename": None}, {"filename": ""}, {"filename": 3}, "env"])
+def test_start_training_rejects_payload_without_filename(emitted, payload):
+    result = asyncio.run(main.start_training("a", payload))
+    assert result == {"error": "start_training needs an environment filename"}
+    assert emitted == [("simulation_error", {"message": "start_training needs an environment filename"}, "a")]
+    assert main.training_sessions == {}
@@ -0,0 +1,45 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from pybullet_env.env import POSE_SIZE
+from pybullet_env.trajectory import TrajectoryRecorder
+
+main = pytest.importorskip("main")
+
+
+@pytest.fixture
+def recording(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "RECORDINGS_DIR", str(tmp_path))
+    monkeypatch.setattr(main, "MAX_TRAJECTORY_FRAMES", 4)
+    recorder = TrajectoryRecorder(main.recording_path("run"), ["agent", "cube.obj"], step_rate=240)
+    for step in range(10):
+        recorder.append(np.full(2 * POSE_SIZE, step, dtype=np.float32))
+    recorder.close()
+    return "run"
+
+
+def request(payload):
+    asyncio.run(main.get_trajectory_frames("a", payload))
+
+
+def test_frames_are_capped_per_request(emitted, recording):
+    request({"recording_id": recording, "start": 2})
+    [(event, data, room)] = emitted
+    assert event == "trajectory_frames" and room == "a"
+    assert (data["start"], data["stop"]) == (2, 6)
+    poses = np.frombuffer(data["poses"], dtype="<f4").reshape(-1, 2, POSE_SIZE)
+    assert poses[:, 0, 0].tolist() == [2, 3, 4, 5]
+
+
+def test_frames_stop_at_the_end_of_the_recording(emitted, recording):
+    request({"recording_id": recording, "start": 8, "stop": 20})
+    assert (emitted[0][1]["start"], emitted[0][1]["stop"]) == (8, 10)
+
+
+@pytest.mark.parametrize("start, stop", [(-1, 3), (0, -3), (5, 2), ("x", 3), ([1], 3)])
+def test_invalid_ranges_are_rejected(emitted, recording, start, stop):
+    request({"recording_id": recording, "start": start, "stop": stop})
+    [(event, data, room)] = emitted
+    assert event == "replay_error" and room == "a"
@@ -6,13 +6,18 @@ import xml.etree.ElementTree as ET
 import socketio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from google.cloud import storage
 import asyncio
 import uvicorn
 
 from training_env.agent import AgentBall
 from training_env.env_setup import MultiObjectBulletEnv, GeneralObject
+from training_env.mesh_cache import preprocess_assets
+from training_env.streaming import FrameBroadcast, STREAM_FPS
+from training_env.asset_sync import sync_prefix
+from training_env.asset_cache import get_asset_cache
+from training_env.storage_backend import get_storage
 from training_env.trainer import Trainer
+from training_env.shared_vec_env import available_cpus
 
 # Initialize FastAPI app
 app = FastAPI()
@@ -32,43 +37,60 @@ sio = socketio.AsyncServer(async_mode="asgi", cors_allowed_origins="*")
 # Mount the Socket.IO ASGI app on top of the FastAPI app.
 asgi_app = socketio.ASGIApp(sio, other_asgi_app=app)
 
-# Initialize GCP storage client
-storage_client = storage.Client()
+# GCS by default; STORAGE_BACKEND=local serves the bucket from a directory (no client is created until first use)
 BUCKET_NAME = os.environ.get('BUCKET_NAME', 'genai-genesis-storage')
+asset_storage = get_storage(BUCKET_NAME)
 
 @app.get("/")
 def read_root():
     return {"Hello": "World"}
 
-def download_env_from_gcp(env_id):
-    """Download all files (URDF and OBJ) from the GCP bucket."""
-    bucket = storage_client.bucket(BUCKET_NAME)
+def download_env_from_gcp(env_id, lease=None):
+    """
+    Sync the environment's files from the bucket. assets/<env_id> links into the shared
+    asset cache, so only files missing from the cache are downloaded. With `lease`, the
+    files are kept from eviction until get_asset_cache().release(lease).
+    """
     assets_dir = os.path.join(os.getcwd(), "assets", env_id)
-    os.makedirs(assets_dir, exist_ok=True)
-
-    prefix = f"{env_id}/"
-    blobs = bucket.list_blobs(prefix=prefix)
-
-    for blob in blobs:
-        relative_path = blob.name[len(prefix):]
-        local_file_path = os.path.join(assets_dir, relative_path)
-        os.makedirs(os.path.dirname(local_file_path), exist_ok=True)
-        blob.download_to_filename(local_file_path)
-
+    sync_prefix(asset_storage, f"{env_id}/", assets_dir, cache=get_asset_cache(), lease=lease)
     return assets_dir
 
+# Running trainings by run id; clients that start a run that is already going join its room
+training_runs = {}
+
 @sio.event
 async def start_training(sid, data):
-    """Start the training process with real-time updates via Socket.IO."""
+    """
+    Start the training process with real-time updates via Socket.IO. Runs are keyed by
+    `run_id` (default: the env_id); starting a run that is already in progress joins it as a
+    viewer, so training happens and each update is serialized once however many clients watch.
+    """
     env_id = data.get('env_id')
     if not env_id:
         await sio.emit('training_error', {"message": "Environment name not provided"}, room=sid)
         return
+    run_id = data.get('run_id') or env_id
+    if run_id in training_runs:
+        await training_runs[run_id].join(sid)
+        await sio.emit('training_status', {"message": f"Joined training run '{run_id}'"}, room=sid)
+        return
 
+    # Updates go through the run's latest-frame-wins mailbox: training never waits on the
+    # viewers, and a busy viewer skips to the newest update instead of growing a backlog.
+    broadcast = FrameBroadcast(sio, f"training:{run_id}", fps=data.get('fps', STREAM_FPS))
+    training_runs[run_id] = broadcast
+    room = broadcast.room
     try:
+        await broadcast.join(sid)
         # Download environment assets from GCP first
-        await sio.emit('training_status', {"message": f"Downloading environment '{env_id}' assets..."}, room=sid)
-        assets_dir = download_env_from_gcp(env_id)
+        await sio.emit('training_status', {"message": f"Downloading environment '{env_id}' assets..."}, room=room)
+        # The sync blocks on network I/O, so it runs off the event loop
+        # Leased for the whole run, so other syncs cannot evict files the run still loads
+        assets_dir = await asyncio.get_running_loop().run_in_executor(None, download_env_from_gcp, env_id,
+                                                                      ("training", run_id))
+        # Convex-decompose new meshes once; cached results are reused on later runs. V-HACD can
+        # take seconds per mesh, so it runs off the event loop too.
+        await asyncio.get_running_loop().run_in_executor(None, preprocess_assets, assets_dir)
         
         # Setup objects from URDF files
         objects = []
@@ -90,36 +112,61 @@ async def start_training(sid, data):
         # Initialize agent, environment and trainer
         agent = AgentBall(start_pos=[0, 0, 1], radius=0.2)
         env = MultiObjectBulletEnv(objects=objects, agent=agent)
-        trainer = Trainer(env)
+        # One batched world per CPU this container may use; a single CPU keeps the plain env
+        trainer = Trainer(env, n_envs=available_cpus())
         
         # Start training with progress updates
-        await sio.emit('training_started', {"message": "Training started", "object_count": len(objects)}, room=sid)
+        await sio.emit('training_started', {"message": "Training started", "object_count": len(objects)}, room=room)
         
-        # Assuming trainer.train() is modified to yield step info or we create a custom training loop
-        for step, step_data in enumerate(trainer.train_with_updates()):
-            # Send update with step number, reward, and any other relevant data
-            await sio.emit('training_step', {
-                "step": step,
-                "agent_position": step_data.get("position", [0, 0, 0]),
-                "reward": step_data.get("reward", 0),
-                "objects": [{"position": obj.position} for obj in objects]
-            }, room=sid)
-            await asyncio.sleep(0.05)  # Small delay to prevent flooding
+        await broadcast.start(lambda update: ('training_step', update))
+        loop = asyncio.get_running_loop()
+        updates = trainer.train_with_updates()
+        step = 0
+        try:
+            while True:
+                # Advance training off the event loop so the sender keeps running meanwhile
+                step_data = await loop.run_in_executor(None, next, updates, None)
+                if step_data is None:
+                    break
+                # Send update with step number, reward, and any other relevant data
+                broadcast.publish({
+                    "step": step,
+                    "agent_position": step_data.get("position", [0, 0, 0]),
+                    "reward": step_data.get("reward", 0),
+                    "objects": [{"position": obj.position} for obj in objects]
+                })
+                step += 1
+        finally:
+            dropped = await broadcast.close()
+            print(f"Training run {run_id} finished, skipped {dropped} updates while viewers were busy")
         
         # Training complete
         await sio.emit('training_complete', {
             "message": "Training completed successfully",
             "final_reward": trainer.get_total_reward()
-        }, room=sid)
+        }, room=room)
         
     except Exception as e:
         print(f"Error during training: {e}")
-        await sio.emit('training_error', {"message": f"Training error: {str(e)}"}, room=sid)
+        await sio.emit('training_error', {"message": f"Training error: {str(e)}"}, room=room)
+    finally:
+        get_asset_cache().release(("training", run_id))
+        del training_runs[run_id]
+        for viewer in list(broadcast.viewers):
+            await broadcast.leave(viewer)
+
+@sio.event
+async def disconnect(sid):
+    """Stop sending a disconnected client the updates of the runs it was watching."""
+    for broadcast in list(training_runs.values()):
+        if sid in broadcast.viewers:
+            await broadcast.leave(sid)
 
 def start_training_process(env_id):
     """Start the training process."""
     objects = []
     assets_dir = os.path.join(os.getcwd(), "assets", env_id)
+    preprocess_assets(assets_dir)
     urdf_files = glob.glob(os.path.join(assets_dir, "**/*.urdf"), recursive=True)
     for urdf_file in urdf_files:
         try:
@@ -136,7 +183,8 @@ def start_training_process(env_id):
 
     agent = AgentBall(start_pos=[0, 0, 1], radius=0.2)
     env = MultiObjectBulletEnv(objects=objects, agent=agent)
-    trainer = Trainer(env)
+    # One env per CPU this container may use, stepped in shared-memory worker processes
+    trainer = Trainer(env, n_envs=available_cpus())
     training_result = trainer.train()
     env.render()
     return training_result
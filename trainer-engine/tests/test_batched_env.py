@@ -0,0 +1,49 @@
+import pybullet as p
+import pytest
+
+from training_env import mesh_cache
+from training_env.batched_env import BatchedBulletVecEnv
+from training_env.env_setup import GeneralObject
+
+TETRAHEDRON = b"v 0 0 0\nv 1 0 0\nv 0 1 0\nv 0 0 1\nf 1 3 2\nf 1 2 4\nf 1 4 3\nf 2 3 4\n"
+
+
+@pytest.fixture
+def mesh(tmp_path, monkeypatch):
+    monkeypatch.setattr(mesh_cache, "DECOMPOSITION_DIR", str(tmp_path / "decompositions"))
+    path = tmp_path / "tetra.obj"
+    path.write_bytes(TETRAHEDRON)
+    # An absolute filename is used as is instead of being looked up under assets/
+    return str(path)
+
+
+def make_env(mesh):
+    objects = [GeneralObject(mesh, [2, 0, 0.5], scale=[0.5, 0.5, 0.5])]
+    return BatchedBulletVecEnv(2, objects=objects)
+
+
+def assert_objects_have_shapes(env):
+    for world in env._worlds:
+        for obj in world.objects:
+            assert p.getCollisionShapeData(obj.body_id, -1, physicsClientId=world.client)
+            assert p.getVisualShapeData(obj.body_id, physicsClientId=world.client)
+
+
+def test_rebuild_after_close_creates_fresh_shapes(mesh):
+    env = make_env(mesh)
+    clients = [world.client for world in env._worlds]
+    assert_objects_have_shapes(env)
+    env.close()
+    assert not [key for key in mesh_cache._collision_shapes if key[0] in clients]
+    assert not [key for key in mesh_cache._visual_shapes if key[0] in clients]
+
+    # The new worlds get the ids the old ones released
+    env = make_env(mesh)
+    try:
+        assert sorted(world.client for world in env._worlds) == sorted(clients)
+        assert_objects_have_shapes(env)
+        env.reset()
+        obs, rewards, dones, infos = env.step(None)
+        assert obs.shape == (2, env.observation_space.shape[0])
+    finally:
+        env.close()
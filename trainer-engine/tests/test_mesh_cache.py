@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from training_env import mesh_cache
+
+TETRAHEDRON = "v {} 0 0\nv 1 0 0\nv 0 1 0\nv 0 0 1\nf 1 3 2\nf 1 2 4\nf 1 4 3\nf 2 3 4\n"
+
+
+@pytest.fixture
+def decomposition_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "decompositions"
+    directory.mkdir()
+    monkeypatch.setattr(mesh_cache, "DECOMPOSITION_DIR", str(directory))
+    return directory
+
+
+def cached(directory, name, size, mtime_ns):
+    path = directory / f"{name}.vhacd.obj"
+    path.write_bytes(b"x" * size)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+    return path
+
+
+def test_eviction_removes_least_recently_used_first(decomposition_dir, monkeypatch):
+    monkeypatch.setattr(mesh_cache, "DECOMPOSITION_CACHE_BYTES", 250)
+    oldest = cached(decomposition_dir, "a", 100, 1)
+    used = cached(decomposition_dir, "b", 100, 2)
+    newest = cached(decomposition_dir, "c", 100, 3)
+    unrelated = decomposition_dir / "notes.txt"
+    unrelated.write_bytes(b"x" * 1000)
+
+    mesh_cache.evict_decompositions(keep=str(newest))
+    assert not oldest.exists()
+    assert used.exists() and newest.exists() and unrelated.exists()
+
+
+def test_decompose_mesh_keeps_the_cache_within_budget(decomposition_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(mesh_cache, "DECOMPOSITION_CACHE_BYTES", 0)
+    first, second = tmp_path / "first.obj", tmp_path / "second.obj"
+    first.write_text(TETRAHEDRON.format(0))
+    second.write_text(TETRAHEDRON.format(2))
+
+    first_out = mesh_cache.decompose_mesh(str(first))
+    second_out = mesh_cache.decompose_mesh(str(second))
+    # The decomposition just written is kept even over budget; older ones go
+    assert os.path.exists(second_out)
+    assert not os.path.exists(first_out)
+    assert mesh_cache.decompose_mesh(str(first)) == first_out
+    assert os.path.exists(first_out) and not os.path.exists(second_out)
@@ -0,0 +1,16 @@
+import numpy as np
+import pytest
+
+from training_env.sensors import RaySensor
+
+
+@pytest.mark.parametrize("num_rays", [1, 8, np.int64(8)])
+def test_ray_sensor_accepts_integer_ray_counts(num_rays):
+    sensor = RaySensor(num_rays=num_rays)
+    assert sensor.num_rays == num_rays
+
+
+@pytest.mark.parametrize("num_rays", [0, -1, 8.0, True, "8", None])
+def test_ray_sensor_rejects_other_ray_counts(num_rays):
+    with pytest.raises(ValueError):
+        RaySensor(num_rays=num_rays)
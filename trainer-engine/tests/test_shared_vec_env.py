@@ -0,0 +1,51 @@
+import gymnasium as gym
+import numpy as np
+import pytest
+from gymnasium import spaces
+from stable_baselines3.common.vec_env import DummyVecEnv
+
+from training_env.shared_vec_env import SharedMemoryVecEnv
+
+
+class IndexEnv(gym.Env):
+    """Tiny env that knows its position in the vector, to check where results come from."""
+    observation_space = spaces.Box(low=0, high=100, shape=(1,), dtype=np.float32)
+    action_space = spaces.Discrete(1)
+
+    def __init__(self, index):
+        self.index = index
+
+    def reset(self, seed=None, options=None):
+        return np.array([self.index], dtype=np.float32), {}
+
+    def step(self, action):
+        return np.array([self.index], dtype=np.float32), 0.0, False, False, {}
+
+    def describe(self, suffix=""):
+        return f"env-{self.index}{suffix}"
+
+
+def make(index):
+    return lambda: IndexEnv(index)
+
+
+@pytest.fixture
+def vec_envs():
+    env_fns = [make(i) for i in range(5)]
+    shared = SharedMemoryVecEnv(env_fns, n_workers=2, start_method="fork")
+    dummy = DummyVecEnv(env_fns)
+    yield shared, dummy
+    shared.close()
+    dummy.close()
+
+
+@pytest.mark.parametrize("indices", [None, 3, [3, 0], [0, 3, 1], [3, 0, 4], [2, 2]])
+def test_env_method_returns_results_in_indices_order(vec_envs, indices):
+    shared, dummy = vec_envs
+    expected = dummy.env_method("describe", "!", indices=indices)
+    assert shared.env_method("describe", "!", indices=indices) == expected
+
+
+def test_get_attr_matches_dummy_vec_env(vec_envs):
+    shared, dummy = vec_envs
+    assert shared.get_attr("index", indices=[4, 0, 2]) == dummy.get_attr("index", indices=[4, 0, 2])
@@ -6,7 +6,7 @@ from stable_baselines3 import PPO
 from stable_baselines3.common.env_util import make_vec_env
 from stable_baselines3.common.vec_env import VecNormalize, DummyVecEnv
 from stable_baselines3.common.evaluation import evaluate_policy
-from google.cloud import storage
+from training_env.storage_backend import get_storage
 import gymnasium as gym
 from gymnasium.envs.registration import register
 
@@ -21,19 +21,13 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def download_from_gcs(bucket_name, source_blob_name, destination_file_name):
-    """Downloads a file from GCS."""
-    storage_client = storage.Client()
-    bucket = storage_client.bucket(bucket_name)
-    blob = bucket.blob(source_blob_name)
-    blob.download_to_filename(destination_file_name)
+    """Downloads a file from the bucket (GCS, or a local directory with STORAGE_BACKEND=local)."""
+    get_storage(bucket_name).download_to_filename(source_blob_name, destination_file_name)
     logger.info(f"Downloaded {source_blob_name} to {destination_file_name}")
 
 def upload_to_gcs(bucket_name, source_file_name, destination_blob_name):
-    """Uploads a file to GCS."""
-    storage_client = storage.Client()
-    bucket = storage_client.bucket(bucket_name)
-    blob = bucket.blob(destination_blob_name)
-    blob.upload_from_filename(source_file_name)
+    """Uploads a file to the bucket (GCS, or a local directory with STORAGE_BACKEND=local)."""
+    get_storage(bucket_name).upload_from_filename(source_file_name, destination_blob_name)
     logger.info(f"Uploaded {source_file_name} to {destination_blob_name}")
 
 log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
@@ -52,7 +46,7 @@ def train(env_id="HalfCheetahBulletEnv-v0"):
     else:
         bucket_name = os.environ["BUCKET_NAME"]
         
-    logger.info(f"Will save outputs to gs://{bucket_name}/test-train/")
+    logger.info(f"Will save outputs to {get_storage(bucket_name).name}/test-train/")
 
     # Initialize the agent
     model = PPO("MlpPolicy",
@@ -5,10 +5,13 @@ register(
     id='CustomBulletEnv-v0',
     entry_point='training_env.env_setup:MultiObjectBulletEnv',
     max_episode_steps=200,
+    # Override per workload, e.g. gym.make('CustomBulletEnv-v0', action_repeat=4)
+    kwargs={'action_repeat': 1, 'time_step': 1/240, 'solver_iterations': 50, 'settle_steps': 0},
 )
 
 register(
     id='BlockJumpEnv-v0',
     entry_point='training_env.jump_env:BlockJumpEnv',
     max_episode_steps=200,
+    kwargs={'action_repeat': 5, 'time_step': 1/240, 'solver_iterations': 50, 'settle_steps': 10},
 )
@@ -1,36 +1,48 @@
 import numpy as np
 import pybullet as p
 
+from .sensors import RaySensor
+
 class AgentBall:
-    """The agent represented as a ball starting at the origin."""
-    def __init__(self, radius=0.2, start_pos=[0,0,1]):
+    """The agent represented as a ball starting at the origin.
+    lidar_rays > 0 attaches a RaySensor with that many rays, see read_lidar()."""
+    def __init__(self, radius=0.2, start_pos=[0,0,1], lidar_rays=0, lidar_range=5.0, lidar_fov=2 * np.pi):
         self.radius = radius
         self.start_pos = start_pos
         self.body_id = None
+        self.physics_client = 0
+        self.lidar_rays = lidar_rays
+        self.lidar_range = lidar_range
+        self.lidar_fov = lidar_fov
+        self.lidar = RaySensor(lidar_rays, lidar_range, lidar_fov) if lidar_rays else None
 
-    def load(self):
-        collision_shape = p.createCollisionShape(p.GEOM_SPHERE, radius=self.radius)
-        visual_shape = p.createVisualShape(p.GEOM_SPHERE, radius=self.radius, rgbaColor=[1, 0, 0, 1])
+    def load(self, physics_client=0):
+        """Create the ball in the given physics client and remember the client for later calls."""
+        self.physics_client = physics_client
+        collision_shape = p.createCollisionShape(p.GEOM_SPHERE, radius=self.radius, physicsClientId=physics_client)
+        visual_shape = p.createVisualShape(p.GEOM_SPHERE, radius=self.radius, rgbaColor=[1, 0, 0, 1],
+                                           physicsClientId=physics_client)
         self.body_id = p.createMultiBody(
             baseMass=1.0,
             baseCollisionShapeIndex=collision_shape,
             baseVisualShapeIndex=visual_shape,
             basePosition=self.start_pos,
-            baseOrientation=p.getQuaternionFromEuler([0, 0, 0])
+            baseOrientation=p.getQuaternionFromEuler([0, 0, 0]),
+            physicsClientId=physics_client
         )
         return self.body_id
 
     def set_velocity_toward(self, target_pos, speed=4.0):
         """Compute a horizontal velocity vector from current position to target and update the agent's velocity,
         preserving the vertical (z-axis) component."""
-        pos, _ = p.getBasePositionAndOrientation(self.body_id)
+        pos, _ = p.getBasePositionAndOrientation(self.body_id, physicsClientId=self.physics_client)
         pos = np.array(pos)
         target = np.array(target_pos)
         direction = target - pos
         norm = np.linalg.norm(direction[:2])  # only consider x and y for horizontal movement
         
         # Get the current velocity so we can preserve the z component.
-        current_vel, _ = p.getBaseVelocity(self.body_id)
+        current_vel, _ = p.getBaseVelocity(self.body_id, physicsClientId=self.physics_client)
         current_vel = list(current_vel)
         
         if norm > 1e-3:
@@ -41,6 +53,11 @@ class AgentBall:
             current_vel[0] = 0
             current_vel[1] = 0
 
-        p.resetBaseVelocity(self.body_id, linearVelocity=current_vel)
-
+        p.resetBaseVelocity(self.body_id, linearVelocity=current_vel, physicsClientId=self.physics_client)
 
+    def read_lidar(self, position=None):
+        """Hit distances of the lidar fan around the agent, as a float32 array of length lidar_rays.
+        Pass the agent position if it was already fetched this step to skip querying it again."""
+        if position is None:
+            position, _ = p.getBasePositionAndOrientation(self.body_id, physicsClientId=self.physics_client)
+        return self.lidar.cast(position, physics_client=self.physics_client)
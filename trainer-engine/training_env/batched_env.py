@@ -0,0 +1,164 @@
+import numpy as np
+import pybullet as p
+import pybullet_data
+from gymnasium import spaces
+from stable_baselines3.common.vec_env.base_vec_env import VecEnv
+
+from .agent import AgentBall
+from .detection import detect_agent_contacts
+from .env_setup import GeneralObject
+from .mesh_cache import clear_shapes
+from .physics import validate_physics_settings, apply_physics_settings
+
+
+class _World:
+    """One Bullet world of the batch: its physics client, bodies and reset snapshot."""
+    def __init__(self, client, agent, objects, state_id):
+        self.client = client
+        self.agent = agent
+        self.objects = objects
+        self.objects_by_body = {obj.body_id: obj for obj in objects}
+        self.state_id = state_id
+        self.target = objects[0].position if objects else None
+
+
+class BatchedBulletVecEnv(VecEnv):
+    """
+    Stable-Baselines3 VecEnv that runs N copies of the MultiObjectBulletEnv scene, each in
+    its own DIRECT physics client, and steps them in one loop. Observations, rewards and
+    dones are written into contiguous arrays instead of going through one gym.Env and
+    DummyVecEnv bookkeeping per world.
+    """
+    def __init__(self, n_envs, objects=None, agent=None, max_episode_steps=200,
+                 action_repeat=1, time_step=1/240, solver_iterations=50, settle_steps=0):
+        validate_physics_settings(action_repeat, time_step, solver_iterations, settle_steps)
+        self.action_repeat = action_repeat
+        self.time_step = time_step
+        self.solver_iterations = solver_iterations
+        self.settle_steps = settle_steps
+        self.max_episode_steps = max_episode_steps
+        self.render_mode = None
+
+        # Templates: every world gets its own copies, since bodies are per client
+        self._object_specs = [(obj.filename, obj.position, obj.scale) for obj in (objects or [])]
+        agent = agent if agent is not None else AgentBall(radius=0.2, start_pos=[0, 0, 1])
+        self._agent_spec = dict(radius=agent.radius, start_pos=agent.start_pos, lidar_rays=agent.lidar_rays,
+                                lidar_range=agent.lidar_range, lidar_fov=agent.lidar_fov)
+        obs_size = 6 + agent.lidar_rays
+
+        observation_space = spaces.Box(low=-np.inf, high=np.inf, shape=(obs_size,), dtype=np.float32)
+        super().__init__(n_envs, observation_space, spaces.Discrete(1))
+
+        self._worlds = [self._build_world() for _ in range(n_envs)]
+        self._obs = np.zeros((n_envs, obs_size), dtype=np.float32)
+        self._rewards = np.zeros(n_envs, dtype=np.float32)
+        self._dones = np.zeros(n_envs, dtype=bool)
+        self._episode_steps = np.zeros(n_envs, dtype=np.int64)
+        self._actions = None
+
+    @classmethod
+    def from_env(cls, env, n_envs, **kwargs):
+        """
+        Batch the scene and physics settings of an existing MultiObjectBulletEnv. The batch
+        builds its own worlds; `env` stays with the caller, who should close it if unused.
+        """
+        return cls(n_envs, objects=env.objects, agent=env.agent,
+                   action_repeat=env.action_repeat, time_step=env.time_step,
+                   solver_iterations=env.solver_iterations, settle_steps=env.settle_steps, **kwargs)
+
+    def _build_world(self):
+        client = p.connect(p.DIRECT)
+        # pybullet reuses client ids, so drop shapes cached for an earlier client with this id
+        clear_shapes(client)
+        p.setAdditionalSearchPath(pybullet_data.getDataPath(), physicsClientId=client)
+        p.setGravity(0, 0, -9.81, physicsClientId=client)
+        apply_physics_settings(client, self.time_step, self.solver_iterations)
+        p.loadURDF("plane.urdf", physicsClientId=client)
+
+        agent = AgentBall(**self._agent_spec)
+        agent.load(client)
+        objects = [GeneralObject(filename=filename, position=position, scale=scale)
+                   for filename, position, scale in self._object_specs]
+        for obj in objects:
+            obj.load(client)
+
+        for _ in range(self.settle_steps):
+            p.stepSimulation(physicsClientId=client)
+        return _World(client, agent, objects, p.saveState(physicsClientId=client))
+
+    def _write_obs(self, index):
+        world = self._worlds[index]
+        pos_agent, _ = p.getBasePositionAndOrientation(world.agent.body_id, physicsClientId=world.client)
+        self._obs[index, 0:3] = pos_agent
+        if world.objects:
+            self._obs[index, 3:6], _ = p.getBasePositionAndOrientation(world.objects[0].body_id,
+                                                                       physicsClientId=world.client)
+        if world.agent.lidar is not None:
+            self._obs[index, 6:] = world.agent.read_lidar(pos_agent)
+
+    def _reset_world(self, index):
+        world = self._worlds[index]
+        p.restoreState(stateId=world.state_id, physicsClientId=world.client)
+        self._episode_steps[index] = 0
+        self._write_obs(index)
+
+    def reset(self):
+        for index in range(self.num_envs):
+            self._reset_world(index)
+        self._reset_seeds()
+        self._reset_options()
+        return self._obs.copy()
+
+    def step_async(self, actions):
+        # Actions are accepted for API compatibility; the agent auto-steers like MultiObjectBulletEnv.
+        self._actions = actions
+
+    def step_wait(self):
+        infos = []
+        for index, world in enumerate(self._worlds):
+            if world.target is not None:
+                world.agent.set_velocity_toward(world.target, speed=4.0)
+            for _ in range(self.action_repeat):
+                p.stepSimulation(physicsClientId=world.client)
+            self._episode_steps[index] += 1
+            self._write_obs(index)
+
+            hit = bool(detect_agent_contacts(world.agent.body_id, world.objects_by_body,
+                                             physics_client=world.client))
+            truncated = not hit and self._episode_steps[index] >= self.max_episode_steps
+            self._rewards[index] = 1.0 if hit else 0.0
+            self._dones[index] = hit or truncated
+
+            if self._dones[index]:
+                infos.append({"terminal_observation": self._obs[index].copy(), "TimeLimit.truncated": truncated})
+                self._reset_world(index)
+            else:
+                infos.append({})
+        return self._obs.copy(), self._rewards.copy(), self._dones.copy(), infos
+
+    def close(self):
+        for world in self._worlds:
+            clear_shapes(world.client)
+            p.disconnect(world.client)
+        self._worlds = []
+
+    def _indices(self, indices):
+        if indices is None:
+            return range(self.num_envs)
+        if isinstance(indices, int):
+            return [indices]
+        return indices
+
+    def get_attr(self, attr_name, indices=None):
+        # The worlds share their configuration, so attributes come from the batch itself.
+        return [getattr(self, attr_name) for _ in self._indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        method = getattr(self, method_name)
+        return [method(*method_args, **method_kwargs) for _ in self._indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._indices(indices)]
@@ -0,0 +1,51 @@
+import numpy as np
+import pybullet as p
+
+
+class Camera:
+    """
+    Headless orbit camera rendering with Bullet's TinyRenderer, which works in DIRECT mode
+    without X or OpenGL. View and projection matrices are computed once and only recomputed
+    when the camera is moved, and frames are written into one reused (height, width, 3)
+    uint8 buffer, so copy a frame if you need to keep it past the next capture().
+    """
+    def __init__(self, width=320, height=240, target=(0, 0, 0), distance=6.0, yaw=45.0, pitch=-30.0,
+                 fov=60.0, near=0.1, far=100.0):
+        self.width = width
+        self.height = height
+        self.target = list(target)
+        self.distance = distance
+        self.yaw = yaw
+        self.pitch = pitch
+        self.projection_matrix = p.computeProjectionMatrixFOV(fov=fov, aspect=width / height,
+                                                              nearVal=near, farVal=far)
+        self.view_matrix = None
+        self.look_at(target, distance, yaw, pitch)
+        self.frame = np.zeros((height, width, 3), dtype=np.uint8)
+
+    def look_at(self, target=None, distance=None, yaw=None, pitch=None):
+        """Move the camera; arguments left as None keep their current value."""
+        if target is not None:
+            self.target = list(target)
+        if distance is not None:
+            self.distance = distance
+        if yaw is not None:
+            self.yaw = yaw
+        if pitch is not None:
+            self.pitch = pitch
+        self.view_matrix = p.computeViewMatrixFromYawPitchRoll(
+            cameraTargetPosition=self.target, distance=self.distance,
+            yaw=self.yaw, pitch=self.pitch, roll=0, upAxisIndex=2
+        )
+
+    def capture(self, physics_client=0):
+        """Render the scene into the camera's frame buffer and return it."""
+        _, _, rgba, _, _ = p.getCameraImage(
+            self.width, self.height, self.view_matrix, self.projection_matrix,
+            renderer=p.ER_TINY_RENDERER, flags=p.ER_NO_SEGMENTATION_MASK,
+            physicsClientId=physics_client
+        )
+        # rgba is an array when pybullet was built with NumPy and a flat list otherwise
+        rgba = np.asarray(rgba, dtype=np.uint8).reshape(self.height, self.width, 4)
+        np.copyto(self.frame, rgba[:, :, :3])
+        return self.frame
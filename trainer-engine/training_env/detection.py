@@ -1,6 +1,20 @@
 import pybullet as p
 
-def detect_collision(body_a, body_b, distance_threshold=0.0):
+def detect_collision(body_a, body_b, distance_threshold=0.0, physics_client=0):
     """Return True if a collision (contact point) exists between the two bodies."""
-    contacts = p.getClosestPoints(bodyA=body_a, bodyB=body_b, distance=distance_threshold)
-    return len(contacts) > 0
\ No newline at end of file
+    contacts = p.getClosestPoints(bodyA=body_a, bodyB=body_b, distance=distance_threshold,
+                                  physicsClientId=physics_client)
+    return len(contacts) > 0
+
+def detect_agent_contacts(agent_body, bodies, distance_threshold=0.0, physics_client=0):
+    """
+    Return the objects touching the agent, given a dict of body id -> object.
+    Reads the contact manifold of the last stepSimulation with a single query,
+    so the cost scales with the number of contacts rather than the number of objects.
+    """
+    touching = {}
+    for contact in p.getContactPoints(bodyA=agent_body, physicsClientId=physics_client):
+        body_b, contact_distance = contact[2], contact[8]
+        if contact_distance <= distance_threshold and body_b in bodies:
+            touching[body_b] = bodies[body_b]
+    return list(touching.values())
@@ -3,12 +3,15 @@ import gymnasium as gym
 import pybullet as p
 import pybullet_data
 import numpy as np
-import time
 import xml.etree.ElementTree as ET
 import os
 
-from .detection import detect_collision
+from .detection import detect_collision, detect_agent_contacts
 from .agent import AgentBall
+from .mesh_cache import get_mesh_shapes, clear_shapes
+from .physics import validate_physics_settings, apply_physics_settings
+from .spatial_index import SpatialGrid
+from .camera import Camera
 
 class GeneralObject:
     """A general object loaded from a mesh file."""
@@ -17,9 +20,11 @@ class GeneralObject:
         self.position = position  # Expected to be a list [x, y, z]
         self.scale = scale
         self.body_id = None
+        self.physics_client = 0
 
-    def load(self):
-        """Load the mesh object as a collision and visual shape."""
+    def load(self, physics_client=0):
+        """Load the mesh object as a collision and visual shape in the given physics client."""
+        self.physics_client = physics_client
         # Construct the full path to the obj file in the assets directory
         base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         obj_path = os.path.join(base_dir, "assets", self.filename)
@@ -31,23 +36,20 @@ class GeneralObject:
         if not os.path.exists(obj_path):
             raise FileNotFoundError(f"Could not find model file at {obj_path}")
             
-        collision_shape = p.createCollisionShape(
-            shapeType=p.GEOM_MESH,
-            fileName=obj_path,
-            meshScale=self.scale
-        )
-        visual_shape = p.createVisualShape(
-            shapeType=p.GEOM_MESH,
-            fileName=obj_path,
-            meshScale=self.scale,
-            rgbaColor=[0, 1, 0, 1]  # Green color
+        # Shapes are shared across bodies and resets that use the same mesh in this client.
+        collision_shape, visual_shape = get_mesh_shapes(
+            obj_path,
+            self.scale,
+            rgba_color=[0, 1, 0, 1],  # Green color
+            physics_client=physics_client
         )
         self.body_id = p.createMultiBody(
             baseMass=1.0,
             baseCollisionShapeIndex=collision_shape,
             baseVisualShapeIndex=visual_shape,
             basePosition=self.position,
-            baseOrientation=p.getQuaternionFromEuler([0, 0, 0])
+            baseOrientation=p.getQuaternionFromEuler([0, 0, 0]),
+            physicsClientId=physics_client
         )
         return self.body_id
     
@@ -60,7 +62,7 @@ class GeneralObject:
         A matching collision element is also added.
         """
         # Get the current position and orientation (as quaternion) of the body.
-        pos, orn = p.getBasePositionAndOrientation(self.body_id)
+        pos, orn = p.getBasePositionAndOrientation(self.body_id, physicsClientId=self.physics_client)
         # Convert quaternion to Euler angles (roll, pitch, yaw)
         rpy = p.getEulerFromQuaternion(orn)
         
@@ -117,8 +119,11 @@ class BulletEnv(gym.Env):
     """Custom Gym environment wrapping a PyBullet simulation."""
     metadata = {"render.modes": ["human", "rgb_array"]}
 
-    def __init__(self, target_filename, target_position, render_mode=None):
+    def __init__(self, target_filename, target_position, render_mode=None, camera=None):
         super(BulletEnv, self).__init__()
+        self.render_mode = render_mode
+        # Headless camera used by render() in "rgb_array" mode
+        self.camera = camera if camera is not None else Camera()
         # Observation: agent and target positions (6 numbers)
         self.observation_space = spaces.Box(low=-np.inf, high=np.inf, shape=(6,), dtype=np.float32)
         # Dummy action space; actions are not manually controlled here.
@@ -132,72 +137,100 @@ class BulletEnv(gym.Env):
         else:
             self.physics_client = p.connect(p.DIRECT)
         
-        p.setAdditionalSearchPath(pybullet_data.getDataPath())
-        p.setGravity(0, 0, -9.81)
+        p.setAdditionalSearchPath(pybullet_data.getDataPath(), physicsClientId=self.physics_client)
+        # Simulated seconds per stepSimulation call; step() advances sim_time by this instead of sleeping.
+        self.time_step = p.getPhysicsEngineParameters(physicsClientId=self.physics_client)["fixedTimeStep"]
+        p.setGravity(0, 0, -9.81, physicsClientId=self.physics_client)
 
         # Load a plane as the ground
-        self.plane_id = p.loadURDF("plane.urdf")
+        self.plane_id = p.loadURDF("plane.urdf", physicsClientId=self.physics_client)
 
         # Create our agent (ball) and target object
         self.agent = AgentBall(radius=0.2, start_pos=[0, 0, 1])
-        self.agent.load()
+        self.agent.load(self.physics_client)
 
         self.target_object = GeneralObject(filename=self.target_filename, position=self.target_position)
-        self.target_object.load()
+        self.target_object.load(self.physics_client)
+
+        # Snapshot the freshly built world so reset() can restore it without reloading meshes.
+        self.initial_state_id = p.saveState(physicsClientId=self.physics_client)
 
         self.done = False
+        self.sim_time = 0.0
 
     def reset(self):
-        # Reset simulation by reloading agent and target.
-        p.resetSimulation()
-        p.setGravity(0, 0, -9.81)
-        p.loadURDF("plane.urdf")
-        self.agent.load()
-        self.target_object.load()
+        # Reset simulation by restoring the initial snapshot.
+        p.restoreState(stateId=self.initial_state_id, physicsClientId=self.physics_client)
         self.done = False
+        self.sim_time = 0.0
         return self._get_obs()
 
     def _get_obs(self):
-        pos_agent, _ = p.getBasePositionAndOrientation(self.agent.body_id)
-        pos_target, _ = p.getBasePositionAndOrientation(self.target_object.body_id)
+        pos_agent, _ = p.getBasePositionAndOrientation(self.agent.body_id, physicsClientId=self.physics_client)
+        pos_target, _ = p.getBasePositionAndOrientation(self.target_object.body_id,
+                                                        physicsClientId=self.physics_client)
         return np.array(list(pos_agent) + list(pos_target), dtype=np.float32)
 
     def step(self, action):
         # Auto-steer agent toward target.
         self.agent.set_velocity_toward(self.target_object.position, speed=4.0)
-        p.stepSimulation()
-        time.sleep(1/20)
+        p.stepSimulation(physicsClientId=self.physics_client)
+        self.sim_time += self.time_step
         obs = self._get_obs()
         reward = 0.0
-        if detect_collision(self.agent.body_id, self.target_object.body_id):
+        if detect_collision(self.agent.body_id, self.target_object.body_id, physics_client=self.physics_client):
             reward = 1.0
             self.done = True
 
         return obs, reward, self.done, {}
 
-    def render(self, mode="human"):
-        # Rendering is handled via the PyBullet GUI.
-        pass
+    def render(self, mode=None):
+        # "rgb_array" returns the camera's reused frame buffer; "human" is handled via the PyBullet GUI.
+        if (mode or self.render_mode) == "rgb_array":
+            return self.camera.capture(self.physics_client)
 
     def close(self):
+        clear_shapes(self.physics_client)
         p.disconnect(self.physics_client)
 
 class MultiObjectBulletEnv(gym.Env):
     """Custom Gym environment that loads multiple GeneralObject instances and an agent."""
     metadata = {"render.modes": ["human", "rgb_array"]}
 
-    def __init__(self, objects=None, agent=None, render_mode=None):
+    def __init__(self, objects=None, agent=None, render_mode=None,
+                 action_repeat=1, time_step=1/240, solver_iterations=50, settle_steps=0,
+                 spatial_cell_size=1.0, camera=None):
+        self.render_mode = render_mode
+        # Headless camera used by render() in "rgb_array" mode
+        self.camera = camera if camera is not None else Camera()
+
+        # Fidelity/throughput knobs: physics substeps per action, seconds per substep,
+        # constraint solver iterations and substeps run before the initial snapshot.
+        validate_physics_settings(action_repeat, time_step, solver_iterations, settle_steps)
+        self.action_repeat = action_repeat
+        self.time_step = time_step
+        self.solver_iterations = solver_iterations
+        self.settle_steps = settle_steps
+
+        # Grid over object positions for proximity queries; rebuilt with the world and refreshed
+        # from the dynamic bodies before a query whenever the simulation has stepped
+        self.spatial_index = SpatialGrid(cell_size=spatial_cell_size)
+        self._spatial_index_stale = False
+
         # Initialize with default values if not provided
         if agent is None:
             self.agent = AgentBall(radius=0.2, start_pos=[0, 0, 1])
         else:
             self.agent = agent
             
-        self.objects = objects
+        self.objects = objects if objects is not None else []
             
-        self.observation_space = spaces.Box(low=-np.inf, high=np.inf, shape=(6,), dtype=np.float32)
+        # Agent position, first object position, then the agent's lidar distances if it has one
+        self.observation_space = spaces.Box(low=-np.inf, high=np.inf, shape=(6 + self.agent.lidar_rays,),
+                                            dtype=np.float32)
         self.action_space = spaces.Discrete(1)
         self.done = False
+        self.sim_time = 0.0
         
         # Connect to PyBullet
         if render_mode == "human":
@@ -205,49 +238,127 @@ class MultiObjectBulletEnv(gym.Env):
         else:
             self.physics_client = p.connect(p.DIRECT)
             
-        p.setAdditionalSearchPath(pybullet_data.getDataPath())
-        p.setGravity(0, 0, -9.81)
-        self.plane_id = p.loadURDF("plane.urdf")
-        
+        p.setAdditionalSearchPath(pybullet_data.getDataPath(), physicsClientId=self.physics_client)
+        self.initial_state_id = None
+        self._build_world()
+
+    def _build_world(self):
+        """Load the plane, agent and objects from scratch and snapshot the resulting world."""
+        p.resetSimulation(physicsClientId=self.physics_client)
+        clear_shapes(self.physics_client)
+        p.setGravity(0, 0, -9.81, physicsClientId=self.physics_client)
+        apply_physics_settings(self.physics_client, self.time_step, self.solver_iterations)
+        self.plane_id = p.loadURDF("plane.urdf", physicsClientId=self.physics_client)
+
         # Load the agent and objects
-        self.agent.load()
+        self.agent.load(self.physics_client)
         for obj in self.objects:
-            obj.load()
+            obj.load(self.physics_client)
+        # Body id -> object, used to map agent contacts back to objects
+        self._objects_by_body = {obj.body_id: obj for obj in self.objects}
+
+        # Settle once here so every restored episode starts from the settled world.
+        for _ in range(self.settle_steps):
+            p.stepSimulation(physicsClientId=self.physics_client)
+
+        # Only bodies with mass move; static ones (mass 0) never need re-reading
+        self._dynamic_objects = [index for index, obj in enumerate(self.objects)
+                                 if p.getDynamicsInfo(obj.body_id, -1, physicsClientId=self.physics_client)[0] > 0]
+
+        # Index the settled object positions; snapshot restores bring them back to these
+        self._initial_positions = self._object_positions()
+        self.spatial_index.build(self._initial_positions)
+        self._spatial_index_stale = False
+
+        # In-memory snapshot used by reset() to avoid reloading meshes every episode.
+        self.initial_state_id = p.saveState(physicsClientId=self.physics_client)
 
     def set_object_and_agent(self, objects, agent):
         self.objects = objects
         self.agent = agent
+        self.observation_space = spaces.Box(low=-np.inf, high=np.inf, shape=(6 + self.agent.lidar_rays,),
+                                            dtype=np.float32)
+        # The scene definition changed, so the next reset() has to rebuild the world.
+        if self.initial_state_id is not None:
+            p.removeState(self.initial_state_id, physicsClientId=self.physics_client)
+        self.initial_state_id = None
 
     def reset(self):
-        p.resetSimulation()
-        p.setGravity(0, 0, -9.81)
-        p.loadURDF("plane.urdf")
-        self.agent.load()
-        for obj in self.objects:
-            obj.load()
+        if self.initial_state_id is None:
+            self._build_world()
+        else:
+            p.restoreState(stateId=self.initial_state_id, physicsClientId=self.physics_client)
+            # Only objects that moved during the last episode are re-bucketed
+            self.spatial_index.update(self._initial_positions)
+            self._spatial_index_stale = False
         self.done = False
+        self.sim_time = 0.0
         return self._get_obs()
 
+    def _object_positions(self, indices=None):
+        positions = np.zeros((len(self.objects), 3))
+        for index in range(len(self.objects)) if indices is None else indices:
+            positions[index], _ = p.getBasePositionAndOrientation(self.objects[index].body_id,
+                                                                  physicsClientId=self.physics_client)
+        return positions
+
+    def refresh_spatial_index(self):
+        """Re-read the poses of dynamic objects and move the index entries of those that moved."""
+        positions = self.spatial_index.positions.copy()
+        positions[self._dynamic_objects] = self._object_positions(self._dynamic_objects)[self._dynamic_objects]
+        self._spatial_index_stale = False
+        return self.spatial_index.update(positions)
+
+    def objects_near_agent(self, radius):
+        """Objects whose base lies within `radius` of the agent, nearest first."""
+        if self._spatial_index_stale:
+            self.refresh_spatial_index()
+        pos_agent, _ = p.getBasePositionAndOrientation(self.agent.body_id, physicsClientId=self.physics_client)
+        return [self.objects[i] for i in self.spatial_index.query_radius(pos_agent, radius)]
+
+    def nearest_objects(self, k):
+        """The k objects nearest to the agent, nearest first."""
+        if self._spatial_index_stale:
+            self.refresh_spatial_index()
+        pos_agent, _ = p.getBasePositionAndOrientation(self.agent.body_id, physicsClientId=self.physics_client)
+        return [self.objects[i] for i in self.spatial_index.query_knn(pos_agent, k)]
+
     def _get_obs(self):
-        pos_agent, _ = p.getBasePositionAndOrientation(self.agent.body_id)
+        pos_agent, _ = p.getBasePositionAndOrientation(self.agent.body_id, physicsClientId=self.physics_client)
         # For simplicity, we return agent position and the position of the first object.
         if self.objects:
-            pos_obj, _ = p.getBasePositionAndOrientation(self.objects[0].body_id)
+            pos_obj, _ = p.getBasePositionAndOrientation(self.objects[0].body_id,
+                                                         physicsClientId=self.physics_client)
         else:
             pos_obj = [0, 0, 0]
-        return np.array(list(pos_agent) + list(pos_obj), dtype=np.float32)
+        obs = np.array(list(pos_agent) + list(pos_obj), dtype=np.float32)
+        if self.agent.lidar is not None:
+            # Fixed-size ray distances from one rayTestBatch call, however many objects there are
+            obs = np.concatenate([obs, self.agent.read_lidar(pos_agent)])
+        return obs
 
     def step(self, action):
         # For demonstration, steer the agent toward the first object.
         if self.objects:
             self.agent.set_velocity_toward(self.objects[0].position, speed=4.0)
-        p.stepSimulation()
-        time.sleep(1/20)
+        for _ in range(self.action_repeat):
+            p.stepSimulation(physicsClientId=self.physics_client)
+        self.sim_time += self.time_step * self.action_repeat
+        # Dynamic objects may have moved; the index is refreshed on the next proximity query
+        self._spatial_index_stale = bool(self._dynamic_objects)
         obs = self._get_obs()
         reward = 0.0
-        for obj in self.objects:
-            if detect_collision(self.agent.body_id, obj.body_id):
-                reward = 1.0
-                self.done = True
-                break
+        # One contact query for the agent instead of one distance query per object
+        if detect_agent_contacts(self.agent.body_id, self._objects_by_body, physics_client=self.physics_client):
+            reward = 1.0
+            self.done = True
         return obs, reward, self.done, {}
+
+    def render(self, mode=None):
+        # "rgb_array" returns the camera's reused frame buffer; "human" is handled via the PyBullet GUI.
+        if (mode or self.render_mode) == "rgb_array":
+            return self.camera.capture(self.physics_client)
+
+    def close(self):
+        clear_shapes(self.physics_client)
+        p.disconnect(self.physics_client)
@@ -5,13 +5,23 @@ from gymnasium import spaces
 import pybullet as p
 import pybullet_data
 
+from .physics import validate_physics_settings, apply_physics_settings
+
 class BlockJumpEnv(gym.Env):
     metadata = {'render.modes': ['human', 'rgb_array']}
     
-    def __init__(self, render_mode=None):
+    def __init__(self, render_mode=None, action_repeat=5, time_step=1/240, solver_iterations=50, settle_steps=10):
         super().__init__()
         
         self.render_mode = render_mode
+
+        # Fidelity/throughput knobs: physics substeps per action, seconds per substep,
+        # constraint solver iterations and substeps run after reset to let bodies settle.
+        validate_physics_settings(action_repeat, time_step, solver_iterations, settle_steps)
+        self.action_repeat = action_repeat
+        self.time_step = time_step
+        self.solver_iterations = solver_iterations
+        self.settle_steps = settle_steps
         
         # Initialize connection to physics server
         if render_mode == "human":
@@ -20,8 +30,9 @@ class BlockJumpEnv(gym.Env):
             self.client = p.connect(p.DIRECT)
         
         # Configure physics client
-        p.setAdditionalSearchPath(pybullet_data.getDataPath())
-        p.setGravity(0, 0, -9.8)
+        p.setAdditionalSearchPath(pybullet_data.getDataPath(), physicsClientId=self.client)
+        p.setGravity(0, 0, -9.8, physicsClientId=self.client)
+        apply_physics_settings(self.client, self.time_step, self.solver_iterations)
         
         # Set up observation and action spaces
         # [robot_x, robot_y, robot_z, vel_x, vel_y, vel_z, target_x, target_y, target_z]
@@ -33,46 +44,62 @@ class BlockJumpEnv(gym.Env):
         self.step_counter = 0
         self.max_episode_steps = 1000
 
+        # Per-step state snapshot, fetched once after stepping and shared by
+        # observation, reward and termination (see _fetch_state)
+        self._position = np.zeros(3)
+        self._velocity = np.zeros(3)
+        self._target = np.zeros(3)
+        self._in_contact = False
+        self._observation = np.zeros(9, dtype=np.float32)
+
+        # Goal tolerance around the target for the reward bonus (x, y, z)
+        self._goal_tolerance = np.array([0.5, 0.5, 0.3])
+
     def reset(self, seed=None, options=None):
         super().reset(seed=seed)
         self.step_counter = 0
         
         # Reset simulation
-        p.resetSimulation()
-        p.setGravity(0, 0, -9.8)
+        p.resetSimulation(physicsClientId=self.client)
+        p.setGravity(0, 0, -9.8, physicsClientId=self.client)
+        apply_physics_settings(self.client, self.time_step, self.solver_iterations)
         
         # Load plane
-        plane_id = p.loadURDF("plane.urdf")
+        plane_id = p.loadURDF("plane.urdf", physicsClientId=self.client)
         # reduce friction
-        p.changeDynamics(plane_id, -1, lateralFriction=0.1)
+        p.changeDynamics(plane_id, -1, lateralFriction=0.1, physicsClientId=self.client)
         
         # Create robot (simple box)
         robot_start_pos = [0, 0, 0.5]
-        self.robot_id = p.createCollisionShape(p.GEOM_BOX, halfExtents=[0.2, 0.2, 0.2])
+        self.robot_id = p.createCollisionShape(p.GEOM_BOX, halfExtents=[0.2, 0.2, 0.2], physicsClientId=self.client)
         self.robot_body = p.createMultiBody(
             baseMass=1.0,
             baseCollisionShapeIndex=self.robot_id,
             basePosition=robot_start_pos,
+            physicsClientId=self.client,
         )
-        p.changeDynamics(self.robot_body, -1, linearDamping=0.0, angularDamping=0.0)
+        p.changeDynamics(self.robot_body, -1, linearDamping=0.0, angularDamping=0.0, physicsClientId=self.client)
         
         # Create target block
         block_pos = [2.0, 0, 0.5]  # Place block 2 meters ahead
-        block_shape = p.createCollisionShape(p.GEOM_BOX, halfExtents=[0.4, 0.4, 0.4])
+        block_shape = p.createCollisionShape(p.GEOM_BOX, halfExtents=[0.4, 0.4, 0.4], physicsClientId=self.client)
         self.block_id = p.createMultiBody(
             baseMass=0,  # Static object
             baseCollisionShapeIndex=block_shape,
             basePosition=block_pos,
+            physicsClientId=self.client,
         )
         
         # Store target position for reward calculation
         self.target_position = [block_pos[0], block_pos[1], block_pos[2] + 0.4]  # Top of block
+        self._target[:] = self.target_position
         
         # Wait for physics to stabilize
-        for _ in range(10):
-            p.stepSimulation()
+        for _ in range(self.settle_steps):
+            p.stepSimulation(physicsClientId=self.client)
         
         # Get initial observation
+        self._fetch_state()
         observation = self._get_observation()
         info = {}
         
@@ -88,15 +115,17 @@ class BlockJumpEnv(gym.Env):
             linkIndex=-1,  # -1 for base
             forceObj=[scaled_action[0], scaled_action[1], scaled_action[2]],
             posObj=[0, 0, 0],
-            flags=p.WORLD_FRAME
+            flags=p.WORLD_FRAME,
+            physicsClientId=self.client
         )
         
         # Step the simulation for each action the agent takes
         # Make physics more stable by stepping multiple times
-        for _ in range(5):
-            p.stepSimulation()
+        for _ in range(self.action_repeat):
+            p.stepSimulation(physicsClientId=self.client)
         
         # Get observation, calculate reward, check if done
+        self._fetch_state()
         observation = self._get_observation()
         reward = self._compute_reward()
         self.step_counter += 1
@@ -106,50 +135,49 @@ class BlockJumpEnv(gym.Env):
         
         return observation, reward, terminated, truncated, info
 
+    def _fetch_state(self):
+        """Query the robot's state from Bullet once per step into the preallocated arrays."""
+        position, _ = p.getBasePositionAndOrientation(self.robot_body, physicsClientId=self.client)
+        linear_vel, _ = p.getBaseVelocity(self.robot_body, physicsClientId=self.client)
+        self._position[:] = position
+        self._velocity[:] = linear_vel
+        self._in_contact = bool(p.getContactPoints(self.robot_body, self.block_id, physicsClientId=self.client))
+
     def _get_observation(self):
-        # Get robot state
-        position, _ = p.getBasePositionAndOrientation(self.robot_body)
-        linear_vel, _ = p.getBaseVelocity(self.robot_body)
-        
-        # Create observation vector
-        observation = np.array([
-            position[0], position[1], position[2],          # Robot position
-            linear_vel[0], linear_vel[1], linear_vel[2],    # Robot velocity
-            self.target_position[0], self.target_position[1], self.target_position[2]  # Target position
-        ])
-        
-        return observation.astype(np.float32)
+        # [robot position, robot velocity, target position]
+        self._observation[0:3] = self._position
+        self._observation[3:6] = self._velocity
+        self._observation[6:9] = self._target
+        return self._observation.copy()
 
     def _compute_reward(self):
-        robot_pos, _ = p.getBasePositionAndOrientation(self.robot_body)
-        
+        robot_z = self._position[2]
+        offset = self._position - self._target
+
         # Base reward: negative distance to target
-        distance = np.sqrt(sum([(robot_pos[i] - self.target_position[i])**2 for i in range(3)]))
+        distance = np.linalg.norm(offset)
         reward = -0.1 * distance  # Small penalty for distance
         
         # Bonus for being on the block
-        if (abs(robot_pos[0] - self.target_position[0]) < 0.5 and
-            abs(robot_pos[1] - self.target_position[1]) < 0.5 and
-            abs(robot_pos[2] - self.target_position[2]) < 0.3):
+        if np.all(np.abs(offset) < self._goal_tolerance):
             reward += 10.0  # Big bonus for reaching the goal
 
         # Reward for contacting
-        contact_points = p.getContactPoints(self.robot_body, self.block_id)
-        if contact_points:
+        if self._in_contact:
             reward += 1.0
         
         # Penalty for falling
-        if robot_pos[2] < 0.1:
+        if robot_z < 0.1:
             reward -= 5.0
 
         # Penalty for jumping too high
-        if robot_pos[2] > 5.0:
+        if robot_z > 5.0:
             reward -= 5.0
             
-        return reward
+        return float(reward)
 
     def _is_terminated(self):
-        robot_pos, _ = p.getBasePositionAndOrientation(self.robot_body)
+        robot_pos = self._position
         
         # Terminate if robot falls off the plane
         if robot_pos[2] < 0.1:
@@ -160,31 +188,20 @@ class BlockJumpEnv(gym.Env):
             return True
             
         # Terminate on success: robot is entirely on top of the block
-        robot_pos, _ = p.getBasePositionAndOrientation(self.robot_body)
-        block_top_z = self.target_position[2] - 0.5  # Height of block surface
-        
-        # Check if robot is within the bounds of the block surface
-        robot_x, robot_y = robot_pos[0], robot_pos[1]
-        block_x, block_y = self.target_position[0], self.target_position[1]
+        block_top_z = self._target[2] - 0.5  # Height of block surface
         
         # Block dimensions
         block_half_width = 0.4  # From block creation halfExtents
         robot_half_width = 0.2  # From robot creation halfExtents
         
-        # Check if robot is entirely on top of block
+        # Check if robot is entirely on top of block (x/y bounds, then z position
+        # where 0.2 is robot height and 0.1 is tolerance)
         on_top = (
-            abs(robot_x - block_x) + robot_half_width <= block_half_width and  # X bounds
-            abs(robot_y - block_y) + robot_half_width <= block_half_width and  # Y bounds
-            abs(robot_pos[2] - block_top_z - 0.2) < 0.1  # Z position (0.2 is robot height, 0.1 is tolerance)
+            np.all(np.abs(robot_pos[:2] - self._target[:2]) + robot_half_width <= block_half_width) and
+            abs(robot_pos[2] - block_top_z - 0.2) < 0.1
         )
-        
-        # check contact
-        contact_points = p.getContactPoints(self.robot_body, self.block_id)
 
-        if on_top and contact_points:
-            return True
-    
-        return False
+        return bool(on_top and self._in_contact)
 
     def close(self):
-        p.disconnect()
+        p.disconnect(self.client)
@@ -0,0 +1,158 @@
+import glob
+import hashlib
+import os
+import sys
+import pybullet as p
+
+# (physics_client, mesh path, scale, content hash) -> collision shape id
+_collision_shapes = {}
+# (physics_client, mesh path, scale, content hash, rgba) -> visual shape id
+_visual_shapes = {}
+# mesh path -> (mtime_ns, size, content hash), so unchanged files are hashed once
+_file_hashes = {}
+
+# V-HACD output, named by the source's content hash. Kept out of the asset directories: those
+# link into the asset cache, which only accounts for (and evicts) the files it fetched itself.
+DECOMPOSITION_DIR = os.environ.get("DECOMPOSITION_DIR", os.path.join(os.getcwd(), "mesh_decompositions"))
+# Byte budget of DECOMPOSITION_DIR; the least recently used decompositions are deleted beyond it
+DECOMPOSITION_CACHE_BYTES = int(os.environ.get("DECOMPOSITION_CACHE_BYTES", 1024 ** 3))
+
+
+def content_hash(path):
+    """Return the SHA-1 of a file, re-hashing only when its size or mtime changed."""
+    path = os.path.realpath(path)
+    stat = os.stat(path)
+    cached = _file_hashes.get(path)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    _file_hashes[path] = (stat.st_mtime_ns, stat.st_size, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def decomposed_mesh_path(obj_path):
+    """Return where the V-HACD decomposition of a mesh lives: DECOMPOSITION_DIR, keyed by the mesh's hash."""
+    return os.path.join(DECOMPOSITION_DIR, f"{content_hash(obj_path)}.vhacd.obj")
+
+
+def _touch(path):
+    """Mark a cached decomposition as used; False if it is not (or no longer) on disk."""
+    try:
+        os.utime(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def evict_decompositions(keep=None):
+    """Delete the least recently used decompositions until DECOMPOSITION_DIR fits its budget."""
+    entries = []
+    for entry in os.scandir(DECOMPOSITION_DIR):
+        if entry.name.endswith(".vhacd.obj") and entry.path != keep:
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries) + (os.path.getsize(keep) if keep else 0)
+    for _, size, path in sorted(entries):
+        if total <= DECOMPOSITION_CACHE_BYTES:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def decompose_mesh(obj_path, **vhacd_params):
+    """
+    Run V-HACD on a mesh once and cache the convex decomposition in DECOMPOSITION_DIR.
+    Extra keyword arguments are passed through to p.vhacd (e.g. resolution).
+    """
+    out_path = decomposed_mesh_path(obj_path)
+    if _touch(out_path):
+        return out_path
+
+    os.makedirs(DECOMPOSITION_DIR, exist_ok=True)
+    # Write to a temporary name first so an interrupted run never leaves a partial cache entry.
+    partial_path = out_path[:-len(".obj")] + ".partial.obj"
+    try:
+        p.vhacd(os.path.realpath(obj_path), partial_path, os.devnull, **vhacd_params)
+        os.replace(partial_path, out_path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    print(f"Decomposed {obj_path} into {out_path}")
+    evict_decompositions(keep=out_path)
+    return out_path
+
+
+def preprocess_assets(assets_dir, **vhacd_params):
+    """Decompose every source OBJ under an assets directory that has no cached decomposition yet."""
+    decomposed = []
+    for obj_path in glob.glob(os.path.join(assets_dir, "**/*.obj"), recursive=True):
+        # Skip decompositions written next to their sources by older versions
+        if ".vhacd-" in os.path.basename(obj_path):
+            continue
+        try:
+            decomposed.append(decompose_mesh(obj_path, **vhacd_params))
+        except Exception as e:
+            print(f"Error decomposing {obj_path}: {e}")
+    return decomposed
+
+
+def get_mesh_shapes(obj_path, scale, rgba_color, physics_client=0):
+    """
+    Return (collision_shape, visual_shape) for a mesh in the given physics client.
+    Shapes are created on first use and shared by every body that loads the same
+    mesh at the same scale, so Bullet parses each file once per client. The collision
+    shape uses the cached V-HACD decomposition when preprocess_assets() has produced one.
+    """
+    path = os.path.realpath(obj_path)
+    key = (physics_client, path, tuple(scale), content_hash(path))
+
+    collision_shape = _collision_shapes.get(key)
+    if collision_shape is None:
+        collision_path = decomposed_mesh_path(path)
+        if not _touch(collision_path):
+            collision_path = path
+        collision_shape = p.createCollisionShape(
+            shapeType=p.GEOM_MESH,
+            fileName=collision_path,
+            meshScale=scale,
+            physicsClientId=physics_client
+        )
+        _collision_shapes[key] = collision_shape
+
+    visual_key = key + (tuple(rgba_color),)
+    visual_shape = _visual_shapes.get(visual_key)
+    if visual_shape is None:
+        visual_shape = p.createVisualShape(
+            shapeType=p.GEOM_MESH,
+            fileName=path,
+            meshScale=scale,
+            rgbaColor=rgba_color,
+            physicsClientId=physics_client
+        )
+        _visual_shapes[visual_key] = visual_shape
+
+    return collision_shape, visual_shape
+
+
+def clear_shapes(physics_client=0):
+    """Forget the shapes of a client after resetSimulation or disconnect invalidated them."""
+    for registry in (_collision_shapes, _visual_shapes):
+        for key in [key for key in registry if key[0] == physics_client]:
+            del registry[key]
+
+
+if __name__ == "__main__":
+    # Offline preprocessing: python -m training_env.mesh_cache <assets_dir> [...]
+    for directory in sys.argv[1:] or [os.path.join(os.getcwd(), "assets")]:
+        preprocess_assets(directory)
@@ -0,0 +1,41 @@
+import numpy as np
+import pybullet as p
+
+from .physics import _is_integer
+
+
+class RaySensor:
+    """
+    Horizontal fan of rays cast from a point, e.g. the agent's center. All rays go out in
+    a single p.rayTestBatch call, and the hit distances are written into a reused float32
+    array of length num_rays (max_range where a ray hits nothing).
+    """
+    def __init__(self, num_rays=16, max_range=5.0, fov=2 * np.pi):
+        if not _is_integer(num_rays) or num_rays < 1:
+            raise ValueError(f"num_rays must be an integer >= 1, got {num_rays!r}")
+        if not max_range > 0:
+            raise ValueError(f"max_range must be positive, got {max_range!r}")
+        self.num_rays = int(num_rays)
+        self.max_range = max_range
+        self.fov = fov
+
+        # A full circle would repeat the first ray as the last one, so leave out the endpoint
+        if num_rays > 1:
+            angles = np.linspace(-fov / 2, fov / 2, num_rays, endpoint=not np.isclose(fov, 2 * np.pi))
+        else:
+            angles = np.zeros(1)
+        # World-frame directions: the agent is a rolling ball, so its orientation carries no heading
+        self._offsets = np.stack([np.cos(angles), np.sin(angles), np.zeros(num_rays)], axis=1) * max_range
+        self._ray_from = np.zeros((num_rays, 3))
+        self._ray_to = np.zeros((num_rays, 3))
+        self.distances = np.full(num_rays, max_range, dtype=np.float32)
+
+    def cast(self, origin, physics_client=0):
+        """Cast the fan from `origin` and return the hit distances (the sensor's own buffer)."""
+        self._ray_from[:] = origin
+        np.add(self._ray_from, self._offsets, out=self._ray_to)
+        results = p.rayTestBatch(self._ray_from, self._ray_to, physicsClientId=physics_client)
+        for index, result in enumerate(results):
+            # result[2] is the hit fraction along the ray, 1.0 when nothing was hit
+            self.distances[index] = result[2] * self.max_range
+        return self.distances
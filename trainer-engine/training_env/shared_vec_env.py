@@ -0,0 +1,279 @@
+import ctypes
+import multiprocessing as mp
+import os
+
+import numpy as np
+from stable_baselines3.common.vec_env.base_vec_env import CloudpickleWrapper, VecEnv
+from stable_baselines3.common.vec_env.patch_gym import _patch_env
+
+
+def _cgroup_cpu_limit():
+    """CPU quota of this container (e.g. a Kubernetes CPU limit) in whole CPUs, or None if unlimited."""
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        if quota == "max":
+            return None
+        quota, period = int(quota), int(period)
+    except (OSError, ValueError):
+        try:
+            # cgroup v1: a quota of -1 means unlimited
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                quota = int(f.read())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = int(f.read())
+        except (OSError, ValueError):
+            return None
+    if quota <= 0 or period <= 0:
+        return None
+    return max(1, quota // period)
+
+
+def available_cpus():
+    """
+    Number of CPUs this process may run on: the affinity mask where supported, capped by the
+    container's CFS quota, which the affinity mask does not reflect.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit()
+    return min(cpus, limit) if limit else cpus
+
+
+def _shared_array(ctx, shape, dtype):
+    """Allocate a zeroed array in shared memory; returns (raw buffer, numpy view)."""
+    dtype = np.dtype(dtype)
+    raw = ctx.RawArray(ctypes.c_char, max(1, int(np.prod(shape)) * dtype.itemsize))
+    return raw, _view(raw, shape, dtype)
+
+
+def _view(raw, shape, dtype):
+    dtype = np.dtype(dtype)
+    return np.frombuffer(raw, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+
+def _worker(remote, parent_remote, env_fns_wrapper, start, buffers):
+    """
+    Steps the envs [start, start + len(env_fns)) of the batch. Actions are read from and
+    observations/rewards/dones written to the shared buffers; only infos go over the pipe.
+    """
+    # Import here to avoid a circular import
+    from stable_baselines3.common.env_util import is_wrapped
+
+    parent_remote.close()
+    envs = [_patch_env(env_fn()) for env_fn in env_fns_wrapper.var]
+    obs, actions, rewards, dones = (_view(raw, shape, dtype) for raw, shape, dtype in buffers)
+    try:
+        while True:
+            cmd, data = remote.recv()
+            if cmd == "step":
+                infos, reset_infos = [], []
+                for offset, env in enumerate(envs):
+                    index = start + offset
+                    observation, reward, terminated, truncated, info = env.step(actions[index])
+                    done = terminated or truncated
+                    info["TimeLimit.truncated"] = truncated and not terminated
+                    reset_info = {}
+                    if done:
+                        # The terminal observation is only pickled at the end of an episode
+                        info["terminal_observation"] = observation
+                        observation, reset_info = env.reset()
+                    obs[index] = observation
+                    rewards[index] = reward
+                    dones[index] = done
+                    infos.append(info)
+                    reset_infos.append(reset_info)
+                remote.send((infos, reset_infos))
+            elif cmd == "reset":
+                seeds, options = data
+                reset_infos = []
+                for offset, env in enumerate(envs):
+                    maybe_options = {"options": options[offset]} if options[offset] else {}
+                    observation, reset_info = env.reset(seed=seeds[offset], **maybe_options)
+                    obs[start + offset] = observation
+                    reset_infos.append(reset_info)
+                remote.send(reset_infos)
+            elif cmd == "get_attr":
+                remote.send([env.get_wrapper_attr(data) for env in envs])
+            elif cmd == "has_attr":
+                try:
+                    for env in envs:
+                        env.get_wrapper_attr(data)
+                    remote.send(True)
+                except AttributeError:
+                    remote.send(False)
+            elif cmd == "set_attr":
+                offsets, attr_name, value = data
+                for offset in offsets:
+                    setattr(envs[offset], attr_name, value)
+                remote.send(None)
+            elif cmd == "env_method":
+                offsets, method_name, args, kwargs = data
+                remote.send([envs[offset].get_wrapper_attr(method_name)(*args, **kwargs) for offset in offsets])
+            elif cmd == "is_wrapped":
+                remote.send([is_wrapped(env, data) for env in envs])
+            elif cmd == "close":
+                for env in envs:
+                    env.close()
+                remote.close()
+                break
+            else:
+                raise NotImplementedError(f"`{cmd}` is not implemented in the worker")
+    except (EOFError, KeyboardInterrupt):
+        pass
+
+
+class SharedMemoryVecEnv(VecEnv):
+    """
+    Multi-process VecEnv in the style of SubprocVecEnv. The envs are split over `n_workers`
+    processes, each stepping its own slice of Bullet worlds, and observations, actions,
+    rewards and dones live in shared-memory arrays instead of being pickled through pipes.
+    Requires an array (Box/Discrete/MultiBinary/MultiDiscrete) observation space.
+    """
+    def __init__(self, env_fns, n_workers=None, start_method=None):
+        n_envs = len(env_fns)
+        self.n_workers = max(1, min(n_envs, n_workers or available_cpus()))
+
+        # Build one env in the parent only to read its spaces; the workers own the real ones
+        probe = env_fns[0]()
+        observation_space, action_space = probe.observation_space, probe.action_space
+        self.render_mode = probe.render_mode
+        probe.close()
+        if observation_space.shape is None:
+            raise ValueError("SharedMemoryVecEnv requires an array observation space, "
+                             f"got {observation_space}")
+
+        if start_method is None:
+            # Same default as SubprocVecEnv: fork is not thread-safe
+            start_method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+        ctx = mp.get_context(start_method)
+
+        buffer_specs = [
+            ((n_envs, *observation_space.shape), observation_space.dtype),
+            ((n_envs, *action_space.shape), action_space.dtype),
+            ((n_envs,), np.float32),
+            ((n_envs,), np.bool_),
+        ]
+        buffers = []
+        raws = []
+        for shape, dtype in buffer_specs:
+            raw, view = _shared_array(ctx, shape, dtype)
+            raws.append((raw, shape, np.dtype(dtype).str))
+            buffers.append(view)
+        self._obs, self._actions, self._rewards, self._dones = buffers
+
+        # Contiguous slices of envs per worker, e.g. 10 envs over 4 workers -> 3, 3, 2, 2
+        sizes = [n_envs // self.n_workers + (1 if i < n_envs % self.n_workers else 0)
+                 for i in range(self.n_workers)]
+        self._slices = []
+        self.remotes, self.processes = [], []
+        start = 0
+        for size in sizes:
+            remote, work_remote = ctx.Pipe()
+            args = (work_remote, remote, CloudpickleWrapper(env_fns[start:start + size]), start, raws)
+            # daemon=True: if the main process crashes, we should not cause things to hang
+            process = ctx.Process(target=_worker, args=args, daemon=True)
+            process.start()
+            work_remote.close()
+            self.remotes.append(remote)
+            self.processes.append(process)
+            self._slices.append((start, start + size))
+            start += size
+
+        self.waiting = False
+        self.closed = False
+        super().__init__(n_envs, observation_space, action_space)
+
+    def _worker_of(self, index):
+        """The worker whose slice holds env `index`."""
+        for worker, (start, stop) in enumerate(self._slices):
+            if start <= index < stop:
+                return worker
+        raise IndexError(f"env index {index} out of range for {self.num_envs} envs")
+
+    def _worker_offsets(self, indices):
+        """Group env indices by worker as {worker: [offset within the worker's slice]}."""
+        grouped = {}
+        for index in self._get_indices(indices):
+            worker = self._worker_of(index)
+            grouped.setdefault(worker, []).append(index - self._slices[worker][0])
+        return grouped
+
+    def step_async(self, actions):
+        self._actions[:] = np.asarray(actions).reshape(self._actions.shape)
+        for remote in self.remotes:
+            remote.send(("step", None))
+        self.waiting = True
+
+    def step_wait(self):
+        infos = []
+        for remote in self.remotes:
+            worker_infos, worker_reset_infos = remote.recv()
+            infos.extend(worker_infos)
+            start = len(infos) - len(worker_infos)
+            self.reset_infos[start:len(infos)] = worker_reset_infos
+        self.waiting = False
+        return self._obs.copy(), self._rewards.copy(), self._dones.copy(), infos
+
+    def reset(self):
+        for remote, (start, stop) in zip(self.remotes, self._slices):
+            remote.send(("reset", (self._seeds[start:stop], self._options[start:stop])))
+        reset_infos = []
+        for remote in self.remotes:
+            reset_infos.extend(remote.recv())
+        self.reset_infos = reset_infos
+        self._reset_seeds()
+        self._reset_options()
+        return self._obs.copy()
+
+    def close(self):
+        if self.closed:
+            return
+        if self.waiting:
+            for remote in self.remotes:
+                remote.recv()
+        for remote in self.remotes:
+            remote.send(("close", None))
+        for process in self.processes:
+            process.join()
+        self.closed = True
+
+    def has_attr(self, attr_name):
+        for remote in self.remotes:
+            remote.send(("has_attr", attr_name))
+        return all([remote.recv() for remote in self.remotes])
+
+    def get_attr(self, attr_name, indices=None):
+        values = []
+        for remote in self.remotes:
+            remote.send(("get_attr", attr_name))
+        for remote in self.remotes:
+            values.extend(remote.recv())
+        return [values[i] for i in self._get_indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        grouped = self._worker_offsets(indices)
+        for worker, offsets in grouped.items():
+            self.remotes[worker].send(("set_attr", (offsets, attr_name, value)))
+        for worker in grouped:
+            self.remotes[worker].recv()
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        indices = list(self._get_indices(indices))
+        grouped = self._worker_offsets(indices)
+        for worker, offsets in grouped.items():
+            self.remotes[worker].send(("env_method", (offsets, method_name, method_args, method_kwargs)))
+        # Each worker answers in the order of its offsets; hand the results back in `indices` order
+        replies = {worker: iter(self.remotes[worker].recv()) for worker in grouped}
+        return [next(replies[self._worker_of(index)]) for index in indices]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        flags = []
+        for remote in self.remotes:
+            remote.send(("is_wrapped", wrapper_class))
+        for remote in self.remotes:
+            flags.extend(remote.recv())
+        return [flags[i] for i in self._get_indices(indices)]
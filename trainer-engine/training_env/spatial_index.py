@@ -0,0 +1,115 @@
+import numpy as np
+
+
+class SpatialGrid:
+    """
+    Uniform grid over object positions for radius and k-nearest queries.
+    Positions are bucketed into cubic cells of side `cell_size`; update() only
+    re-buckets the entries that moved further than `move_threshold`.
+    """
+    def __init__(self, cell_size=1.0, move_threshold=1e-3):
+        if cell_size <= 0:
+            raise ValueError(f"cell_size must be positive, got {cell_size!r}")
+        self.cell_size = cell_size
+        self.move_threshold = move_threshold
+        self.positions = np.zeros((0, 3))
+        self._cell_of = np.zeros((0, 3), dtype=np.int64)
+        self._cells = {}
+
+    def __len__(self):
+        return len(self.positions)
+
+    def _cell_indices(self, positions):
+        return np.floor(np.asarray(positions, dtype=np.float64) / self.cell_size).astype(np.int64)
+
+    def build(self, positions):
+        """Index an (N, 3) array of positions from scratch; entry i is referred to by index i."""
+        self.positions = np.array(positions, dtype=np.float64).reshape(-1, 3)
+        self._cell_of = self._cell_indices(self.positions)
+        self._cells = {}
+        for index, cell in enumerate(map(tuple, self._cell_of)):
+            self._cells.setdefault(cell, []).append(index)
+
+    def update(self, positions):
+        """Move the entries whose position changed; returns the indices that were updated."""
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        if len(positions) != len(self.positions):
+            self.build(positions)
+            return np.arange(len(positions))
+
+        moved = np.flatnonzero(np.linalg.norm(positions - self.positions, axis=1) > self.move_threshold)
+        if len(moved) == 0:
+            return moved
+        new_cells = self._cell_indices(positions[moved])
+        for index, new_cell in zip(moved, new_cells):
+            old_cell = tuple(self._cell_of[index])
+            new_cell = tuple(new_cell)
+            if old_cell != new_cell:
+                bucket = self._cells[old_cell]
+                bucket.remove(index)
+                if not bucket:
+                    del self._cells[old_cell]
+                self._cells.setdefault(new_cell, []).append(index)
+                self._cell_of[index] = new_cell
+        self.positions[moved] = positions[moved]
+        return moved
+
+    def _candidates(self, center_cell, ring):
+        """Indices in the cells of the cubic shell at Chebyshev distance `ring` from center_cell."""
+        cx, cy, cz = center_cell
+        found = []
+        for dx in range(-ring, ring + 1):
+            for dy in range(-ring, ring + 1):
+                for dz in range(-ring, ring + 1):
+                    if max(abs(dx), abs(dy), abs(dz)) != ring:
+                        continue
+                    found.extend(self._cells.get((cx + dx, cy + dy, cz + dz), ()))
+        return found
+
+    def query_radius(self, point, radius):
+        """Indices of entries within `radius` of `point`, nearest first."""
+        point = np.asarray(point, dtype=np.float64)
+        low = self._cell_indices(point - radius)
+        high = self._cell_indices(point + radius)
+        # The cell box grows with (radius / cell_size)^3; once it has more cells than there are
+        # occupied ones, checking every entry is cheaper than walking the box
+        if np.prod(high - low + 1, dtype=np.float64) > len(self._cells):
+            candidates = list(range(len(self.positions)))
+        else:
+            candidates = []
+            for cx in range(low[0], high[0] + 1):
+                for cy in range(low[1], high[1] + 1):
+                    for cz in range(low[2], high[2] + 1):
+                        candidates.extend(self._cells.get((cx, cy, cz), ()))
+        if not candidates:
+            return np.zeros(0, dtype=np.int64)
+        candidates = np.asarray(candidates)
+        distances = np.linalg.norm(self.positions[candidates] - point, axis=1)
+        inside = distances <= radius
+        return candidates[inside][np.argsort(distances[inside], kind="stable")]
+
+    def query_knn(self, point, k):
+        """Indices of the k entries nearest to `point`, nearest first."""
+        k = min(k, len(self.positions))
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64)
+        point = np.asarray(point, dtype=np.float64)
+        center = tuple(self._cell_indices(point))
+
+        # Grow shells of cells until the k-th best candidate is closer than anything
+        # an unvisited shell could contain.
+        occupied = np.array(list(self._cells.keys()))
+        max_ring = int(np.abs(occupied - center).max())
+        candidates = []
+        for ring in range(max_ring + 1):
+            candidates.extend(self._candidates(center, ring))
+            if len(candidates) >= k:
+                distances = np.linalg.norm(self.positions[candidates] - point, axis=1)
+                kth = np.partition(distances, k - 1)[k - 1]
+                # Anything outside the visited shells is at least `ring * cell_size` away
+                if kth <= ring * self.cell_size:
+                    break
+        candidates = np.asarray(candidates)
+        distances = np.linalg.norm(self.positions[candidates] - point, axis=1)
+        order = np.argsort(distances, kind="stable")[:k]
+        return candidates[order]
@@ -0,0 +1,165 @@
+import asyncio
+import time
+
+# Default rate at which a client is sent frames; producers may publish faster
+STREAM_FPS = 30.0
+
+
+class FrameMailbox:
+    """
+    Latest-frame-wins slot between a producer and one client's sender. publish() never
+    blocks and replaces a frame that has not been sent yet, so a slow client costs the
+    server one pending frame instead of an ever-growing queue.
+    """
+    def __init__(self):
+        self._frame = None
+        self._ready = asyncio.Event()
+        self.closed = False
+        self.dropped = 0
+
+    def publish(self, frame):
+        if self._frame is not None:
+            self.dropped += 1
+        self._frame = frame
+        self._ready.set()
+
+    def close(self):
+        """No more frames; the sender still gets the pending one, then None."""
+        self.closed = True
+        self._ready.set()
+
+    def take(self):
+        """The pending frame (or None) without waiting."""
+        frame, self._frame = self._frame, None
+        if not self.closed:
+            self._ready.clear()
+        return frame
+
+    async def next(self):
+        """Wait for the newest frame; None once the mailbox is closed and drained."""
+        while self._frame is None and not self.closed:
+            await self._ready.wait()
+        return self.take()
+
+
+def socket_backlog(sio, sid, namespace="/"):
+    """Packets queued on the client's engine.io socket that have not been written yet."""
+    try:
+        eio_sid = sio.manager.eio_sid_from_sid(sid, namespace)
+        return sio.eio.sockets[eio_sid].queue.qsize()
+    except (AttributeError, KeyError, TypeError):
+        # Unknown or disconnected client: nothing is waiting to be written
+        return 0
+
+
+async def send_latest_frames(sio, sid, mailbox, encode, fps=STREAM_FPS):
+    """
+    Sender for one client: emits the newest frame in `mailbox` at most `fps` times per second,
+    and only once the socket has written out the previous one. encode(frame) returns the
+    (event, data) to emit, so per-frame serialization is only paid for frames actually sent.
+    """
+    interval = 1.0 / fps if fps else 0.0
+    next_due = time.monotonic()
+    while True:
+        frame = await mailbox.next()
+        if frame is None:
+            break
+        # Hold off while the transport is still busy, swapping in anything newer meanwhile
+        while socket_backlog(sio, sid) > 0:
+            await asyncio.sleep(interval or 0.005)
+            newer = mailbox.take()
+            if newer is not None:
+                mailbox.dropped += 1
+                frame = newer
+        event, data = encode(frame)
+        await sio.emit(event, data, room=sid)
+
+        next_due = max(next_due + interval, time.monotonic())
+        await asyncio.sleep(next_due - time.monotonic())
+    return mailbox.dropped
+
+
+class FrameBroadcast:
+    """
+    Fan-out of one producer's frames to every viewer in a Socket.IO room. Each frame is
+    encoded once and emitted once to the room, so the number of viewers multiplies neither
+    the simulation nor the serialization. Viewers whose socket is still busy are skipped for
+    that frame instead of holding back the room; once they catch up the next frame is sent
+    as a keyframe (if the encoding has one), so they never apply a delta to a missed frame.
+    """
+    def __init__(self, sio, room, fps=STREAM_FPS):
+        self.sio = sio
+        self.room = room
+        self.fps = fps
+        self.mailbox = FrameMailbox()
+        self.viewers = set()
+        # Viewers that missed a frame and are waiting for a keyframe
+        self._behind = set()
+        self._encode = None
+        self._header = None
+        self._keyframe = None
+        self._sender = None
+
+    async def join(self, sid):
+        await self.sio.enter_room(sid, self.room)
+        self.viewers.add(sid)
+        if self._encode is not None:
+            # Joined mid-stream: send the stream header now and hold deltas until a keyframe
+            for event, data in self._header():
+                await self.sio.emit(event, data, room=sid)
+            self._behind.add(sid)
+
+    async def leave(self, sid):
+        self.viewers.discard(sid)
+        self._behind.discard(sid)
+        await self.sio.leave_room(sid, self.room)
+
+    async def start(self, encode, header=None, keyframe=None):
+        """
+        Begin streaming. encode(frame) returns the (event, data) to emit, header() the events
+        a viewer needs before its first frame, keyframe() makes the next encode() self-contained.
+        """
+        self._encode = encode
+        self._header = header or (lambda: [])
+        self._keyframe = keyframe
+        for event, data in self._header():
+            await self.sio.emit(event, data, room=self.room)
+        self._sender = asyncio.create_task(self._send())
+
+    def publish(self, frame):
+        self.mailbox.publish(frame)
+
+    async def close(self):
+        """Send the pending frame, stop the sender and return the number of frames dropped."""
+        self.mailbox.close()
+        if self._sender is None:
+            return 0
+        return await self._sender
+
+    async def _send(self):
+        interval = 1.0 / self.fps if self.fps else 0.0
+        next_due = time.monotonic()
+        while True:
+            frame = await self.mailbox.next()
+            if frame is None:
+                break
+            # Hold off while every viewer is still busy, swapping in anything newer meanwhile
+            while self.viewers and all(socket_backlog(self.sio, sid) > 0 for sid in self.viewers):
+                await asyncio.sleep(interval or 0.005)
+                newer = self.mailbox.take()
+                if newer is not None:
+                    self.mailbox.dropped += 1
+                    frame = newer
+            busy = {sid for sid in self.viewers if socket_backlog(self.sio, sid) > 0}
+            self._behind |= busy
+            caught_up = self._behind - busy
+            if caught_up:
+                if self._keyframe is not None:
+                    self._keyframe()
+                self._behind -= caught_up
+            event, data = self._encode(frame)
+            await self.sio.emit(event, data, room=self.room, skip_sid=list(self._behind) or None)
+
+            next_due = max(next_due + interval, time.monotonic())
+            await asyncio.sleep(next_due - time.monotonic())
+        return self.mailbox.dropped
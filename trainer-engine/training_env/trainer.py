@@ -5,8 +5,9 @@ import numpy as np
 from stable_baselines3 import PPO
 from gymnasium.envs.registration import register
 from stable_baselines3.common.env_util import make_vec_env
-from stable_baselines3.common.vec_env import VecNormalize
+from stable_baselines3.common.vec_env import VecNormalize, DummyVecEnv
 from stable_baselines3.common.callbacks import BaseCallback
+from .shared_vec_env import SharedMemoryVecEnv, available_cpus
 # from google.cloud import storage
 
 # Configure logging
@@ -18,7 +19,6 @@ class TrainingProgressCallback(BaseCallback):
     
     def __init__(self, verbose=0):
         super(TrainingProgressCallback, self).__init__(verbose)
-        self.training_env = None
         self.step_data = None
         self.total_reward = 0
     
@@ -48,9 +48,15 @@ class TrainingProgressCallback(BaseCallback):
 
 class Trainer:
     """Trainer class to train a PPO agent on a custom environment."""
-    def __init__(self, env=None, env_id="CustomBulletEnv-v0", n_envs=1, total_timesteps=1000):
+    def __init__(self, env=None, env_id="CustomBulletEnv-v0", n_envs=1, total_timesteps=1000, env_kwargs=None,
+                 n_workers=None):
         self.env_id = env_id
+        # One environment unless the caller opts into more: every rollout collects n_steps per env,
+        # so n_envs multiplies the cost of a run. Extra envs get one worker process per available CPU.
         self.n_envs = n_envs
+        self.n_workers = min(self.n_envs, n_workers if n_workers is not None else available_cpus())
+        # Constructor kwargs for registered envs, e.g. action_repeat/time_step/solver_iterations/settle_steps
+        self.env_kwargs = env_kwargs or {}
         self.total_timesteps = total_timesteps
         self.custom_env = env  # Store custom environment if provided
         self.total_reward = 0
@@ -79,24 +85,37 @@ class Trainer:
     #     except Exception as e:
     #         logger.error(f"Failed to upload file: {e}")
     
+    def make_vec_env(self):
+        """Vectorize the registered env: worker processes with shared-memory buffers when
+        more than one CPU is available, otherwise all envs in this process."""
+        if self.n_workers > 1:
+            logger.info(f"Running {self.n_envs} envs in {self.n_workers} worker processes")
+            return make_vec_env(self.env_id, n_envs=self.n_envs, env_kwargs=self.env_kwargs,
+                                vec_env_cls=SharedMemoryVecEnv, vec_env_kwargs={"n_workers": self.n_workers})
+        return make_vec_env(self.env_id, n_envs=self.n_envs, env_kwargs=self.env_kwargs, vec_env_cls=DummyVecEnv)
+
     def train(self):
         # Environment setup using vectorized environment
-        vec_env = make_vec_env(self.env_id, n_envs=self.n_envs)
+        vec_env = self.make_vec_env()
         vec_env = VecNormalize(vec_env, norm_obs=True, norm_reward=True, clip_obs=10.0)
 
-        # Initialize the agent
-        model = PPO("MlpPolicy",
-                    vec_env,
-                    verbose=1,
-                    tensorboard_log=os.path.join(self.log_dir, "tensorboard"))
+        try:
+            # Initialize the agent
+            model = PPO("MlpPolicy",
+                        vec_env,
+                        verbose=1,
+                        tensorboard_log=os.path.join(self.log_dir, "tensorboard"))
 
-        # Train the agent
-        model.learn(total_timesteps=self.total_timesteps, tb_log_name="PPO_agent")
+            # Train the agent
+            model.learn(total_timesteps=self.total_timesteps, tb_log_name="PPO_agent")
 
-        # Save the model and normalization stats locally
-        model_path = os.path.join(self.log_dir, "ppo_agent")
-        model.save(model_path)
-        vec_env.save(self.stats_path)
+            # Save the model and normalization stats locally
+            model_path = os.path.join(self.log_dir, "ppo_agent")
+            model.save(model_path)
+            vec_env.save(self.stats_path)
+        finally:
+            # Disconnects the envs' physics clients and stops any worker processes
+            vec_env.close()
 
         # try:
         #     # Upload model and stats to GCS under test-train directory
@@ -123,47 +142,57 @@ class Trainer:
     def train_with_updates(self):
         """Train the agent and yield step information for progress updates."""
         # Setup environment - either use provided custom env or create a new vec_env
-        if self.custom_env:
+        if self.custom_env and self.n_envs > 1:
+            # Run n_envs copies of the custom scene as Bullet worlds stepped in one process
+            from .batched_env import BatchedBulletVecEnv
+            vec_env = BatchedBulletVecEnv.from_env(self.custom_env, self.n_envs)
+            # Only the template of the batch; release its physics client now
+            self.custom_env.close()
+            vec_env = VecNormalize(vec_env, norm_obs=True, norm_reward=True, clip_obs=10.0)
+        elif self.custom_env:
             # Wrapping custom env in VecNormalize
-            from stable_baselines3.common.vec_env import DummyVecEnv
             vec_env = DummyVecEnv([lambda: self.custom_env])
             vec_env = VecNormalize(vec_env, norm_obs=True, norm_reward=True, clip_obs=10.0)
         else:
             # Default vectorized environment setup
-            vec_env = make_vec_env(self.env_id, n_envs=self.n_envs)
+            vec_env = self.make_vec_env()
             vec_env = VecNormalize(vec_env, norm_obs=True, norm_reward=True, clip_obs=10.0)
 
-        # Initialize the agent
-        model = PPO("MlpPolicy",
-                    vec_env,
-                    verbose=1,
-                    tensorboard_log=os.path.join(self.log_dir, "tensorboard"))
+        try:
+            # Initialize the agent
+            model = PPO("MlpPolicy",
+                        vec_env,
+                        verbose=1,
+                        tensorboard_log=os.path.join(self.log_dir, "tensorboard"))
 
-        # Setup custom callback for training progress
-        progress_callback = TrainingProgressCallback()
-        progress_callback.training_env = vec_env
+            # Setup custom callback for training progress
+            # Reads observations through model.get_env(), i.e. the VecNormalize wrapper below
+            progress_callback = TrainingProgressCallback()
         
-        # Train in smaller chunks to yield progress updates
-        update_freq = max(1, self.total_timesteps // 100)  # Yield ~100 updates
-        remaining_steps = self.total_timesteps
+            # Train in smaller chunks to yield progress updates
+            update_freq = max(1, self.total_timesteps // 100)  # Yield ~100 updates
+            remaining_steps = self.total_timesteps
         
-        while remaining_steps > 0:
-            steps_this_iter = min(update_freq, remaining_steps)
-            model.learn(total_timesteps=steps_this_iter, 
-                        callback=progress_callback, 
-                        reset_num_timesteps=False,
-                        tb_log_name="PPO_agent")
+            while remaining_steps > 0:
+                steps_this_iter = min(update_freq, remaining_steps)
+                model.learn(total_timesteps=steps_this_iter, 
+                            callback=progress_callback, 
+                            reset_num_timesteps=False,
+                            tb_log_name="PPO_agent")
             
-            remaining_steps -= steps_this_iter
-            step_data = progress_callback.get_step_data()
-            if step_data:
-                self.total_reward = step_data.get("total_reward", 0)
-                yield step_data
+                remaining_steps -= steps_this_iter
+                step_data = progress_callback.get_step_data()
+                if step_data:
+                    self.total_reward = step_data.get("total_reward", 0)
+                    yield step_data
         
-        # Save the model and normalization stats locally
-        model_path = os.path.join(self.log_dir, "ppo_agent")
-        model.save(model_path)
-        vec_env.save(self.stats_path)
+            # Save the model and normalization stats locally
+            model_path = os.path.join(self.log_dir, "ppo_agent")
+            model.save(model_path)
+            vec_env.save(self.stats_path)
+        finally:
+            # Also runs when the consumer stops iterating early; disconnects every physics client
+            vec_env.close()
 
         # try:
         #     # Upload model and stats to GCS under test-train directory